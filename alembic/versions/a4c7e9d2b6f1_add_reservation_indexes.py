@@ -0,0 +1,77 @@
+"""Add reservation overlap and listing indexes
+
+Revision ID: a4c7e9d2b6f1
+Revises: 5d2f8c1a9e47
+Create Date: 2026-10-18 10:03:54.772915
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a4c7e9d2b6f1"
+down_revision: Union[str, None] = "5d2f8c1a9e47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def drop_invalid_index(name: str) -> None:
+    """Drop index ``name`` when a failed concurrent build left it INVALID.
+
+    IF NOT EXISTS would skip it on the next run and the planner never uses
+    an invalid index, so it is built again instead.
+    """
+    invalid = op.get_bind().scalar(
+        sa.text(
+            "SELECT NOT indisvalid FROM pg_index "
+            "WHERE indexrelid = to_regclass(:name)"
+        ),
+        {"name": name},
+    )
+    if invalid:
+        op.drop_index(name, table_name="reservation", postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction, but it doesn't
+    # block writes to the reservation table while the index is built.
+    with op.get_context().autocommit_block():
+        drop_invalid_index("ix_reservation_room_id_end_time")
+        drop_invalid_index("ix_reservation_room_id_start_time_id")
+        # Overlap checks: room_id = ? AND end_time > :start AND start_time < :end
+        op.create_index(
+            "ix_reservation_room_id_end_time",
+            "reservation",
+            ["room_id", "end_time"],
+            postgresql_include=["start_time"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Per-room listings ordered by start_time.
+        op.create_index(
+            "ix_reservation_room_id_start_time_id",
+            "reservation",
+            ["room_id", "start_time", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_reservation_room_id_start_time_id",
+            table_name="reservation",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_reservation_room_id_end_time",
+            table_name="reservation",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,71 @@
+"""Add room capacity and location indexes
+
+Revision ID: c81e3b5f0a92
+Revises: a4c7e9d2b6f1
+Create Date: 2026-10-18 11:26:08.531447
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c81e3b5f0a92"
+down_revision: Union[str, None] = "a4c7e9d2b6f1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def drop_invalid_index(name: str) -> None:
+    """Drop index ``name`` when a failed concurrent build left it INVALID, see
+    a4c7e9d2b6f1."""
+    invalid = op.get_bind().scalar(
+        sa.text(
+            "SELECT NOT indisvalid FROM pg_index "
+            "WHERE indexrelid = to_regclass(:name)"
+        ),
+        {"name": name},
+    )
+    if invalid:
+        op.drop_index(name, table_name="room", postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        drop_invalid_index("ix_room_location_capacity")
+        drop_invalid_index("ix_room_capacity")
+        # Free room search: location = ? AND capacity >= ?
+        op.create_index(
+            "ix_room_location_capacity",
+            "room",
+            ["location", "capacity"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Free room search without a location: capacity >= ?
+        op.create_index(
+            "ix_room_capacity",
+            "room",
+            ["capacity"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_room_capacity",
+            table_name="room",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_room_location_capacity",
+            table_name="room",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
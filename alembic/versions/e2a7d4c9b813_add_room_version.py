@@ -0,0 +1,30 @@
+"""Add room version column for optimistic locking
+
+Revision ID: e2a7d4c9b813
+Revises: c81e3b5f0a92
+Create Date: 2026-10-18 14:02:41.274310
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e2a7d4c9b813"
+down_revision: Union[str, None] = "c81e3b5f0a92"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "room",
+        sa.Column("version", sa.INTEGER(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("room", "version")
@@ -0,0 +1,45 @@
+"""Add reservation exclusive flag for seat bookings
+
+Revision ID: f3b9c6e1d274
+Revises: e2a7d4c9b813
+Create Date: 2026-10-18 15:27:09.518342
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f3b9c6e1d274"
+down_revision: Union[str, None] = "e2a7d4c9b813"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "reservation",
+        sa.Column("exclusive", sa.BOOLEAN(), server_default=sa.true(), nullable=False),
+    )
+
+    # Seat bookings overlap each other, the constraint only covers whole room
+    # bookings. Both statements run in the migration's transaction, so the
+    # table is never left without it.
+    op.execute("ALTER TABLE reservation DROP CONSTRAINT reservation_room_period_excl;")
+    op.execute(
+        "ALTER TABLE reservation ADD CONSTRAINT reservation_room_period_excl "
+        "EXCLUDE USING gist (room_id WITH =, period WITH &&) WHERE (exclusive);"
+    )
+
+
+def downgrade() -> None:
+    # Fails while overlapping seat bookings are left in the table.
+    op.execute("ALTER TABLE reservation DROP CONSTRAINT reservation_room_period_excl;")
+    op.execute(
+        "ALTER TABLE reservation ADD CONSTRAINT reservation_room_period_excl "
+        "EXCLUDE USING gist (room_id WITH =, period WITH &&);"
+    )
+    op.drop_column("reservation", "exclusive")
@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
 
 from app.core import constants
 from app.core.logger import logger
-from app.db.settings import get_db
+from app.db.routing import track_write
+from app.db.settings import DBSession, get_db
 from app.schemas.user import Token, UserCreate
 from app.services.auth_service import login_user, register_user
 
@@ -12,9 +12,13 @@ auth_router = APIRouter()
 
 
 @auth_router.post("/register", response_model=Token)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(
+    user_data: UserCreate, http_response: Response, db: DBSession = Depends(get_db)
+):
     try:
-        token = register_user(user_data, db)
+        token = await register_user(user_data, db)
+        # Replicas may not have the user yet when the token is first used.
+        track_write(http_response, user_data.username)
         logger.info(f"User {user_data.username} registered successfully.")
         return {"access_token": token, "token_type": "bearer"}
     except Exception as e:
@@ -28,11 +32,11 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @auth_router.post("/login", response_model=Token)
-def login(
-    user_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+async def login(
+    user_data: OAuth2PasswordRequestForm = Depends(), db: DBSession = Depends(get_db)
 ):
     try:
-        token = login_user(user_data, db)
+        token = await login_user(user_data, db)
         logger.info(f"User {user_data.username} logged in successfully.")
         return {"access_token": token, "token_type": "bearer"}
     except Exception as e:
@@ -1,17 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from datetime import date, datetime
+from functools import partial
+from typing import Optional, Union
 
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import Response, StreamingResponse
+
+from app.config.settings import settings
 from app.core import constants
+from app.core.idempotency import idempotency_store
 from app.core.security import get_current_user
-from app.db.settings import get_db
+from app.db.routing import get_current_read_user, get_read_sessionmaker, track_write
+from app.db.settings import DBSession, get_db
 from app.schemas.reservations import (
+    RerservationBulkRequest,
+    RerservationBulkResponse,
     RerservationCreateRequest,
     RerservationCreateResponse,
+    RerservationRecurringResponse,
+    ReservationExportFormat,
 )
 from app.schemas.user import UserBase
+from app.services.export_service import (
+    MEDIA_TYPES,
+    export_query,
+    export_reservations,
+)
 from app.services.reservation_service import (
+    book_reservation,
+    book_seat,
     cancel_reservation,
     is_reservation_valid,
+    make_bulk_reservation,
+    make_recurring_reservation,
     make_reservation,
 )
 
@@ -20,22 +40,85 @@ reservation_router = APIRouter()
 
 @reservation_router.post(
     "/",
-    description="Make a room reservation",
-    response_model=RerservationCreateResponse,
+    description=(
+        "Make a room reservation. With a recurrence rule every occurrence "
+        "that doesn't conflict is booked and the conflicting ones are listed."
+    ),
+    response_model=Union[RerservationCreateResponse, RerservationRecurringResponse],
 )
 async def make_room_reservation(
     reservation_data: RerservationCreateRequest,
-    db: Session = Depends(get_db),
+    http_response: Response,
+    db: DBSession = Depends(get_db),
     current_user: UserBase = Depends(get_current_user),
-) -> RerservationCreateResponse:
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+) -> Union[RerservationCreateResponse, RerservationRecurringResponse]:
     try:
-        if not is_reservation_valid(reservation_data=reservation_data, db=db):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=constants.INVALID_RESERVATION,
-            )
+        response = await idempotency_store.run(
+            "POST /reservations/",
+            current_user.username,
+            idempotency_key,
+            reservation_data,
+            partial(reserve, reservation_data, db),
+        )
+        track_write(http_response, current_user.username)
+        return response
+    except Exception as e:
+        raise HTTPException(
+            status_code=e.status_code or status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=e.detail or str(e),
+        )
+
+
+async def reserve(
+    reservation_data: RerservationCreateRequest, db: DBSession
+) -> Union[RerservationCreateResponse, RerservationRecurringResponse]:
+    if reservation_data.recurrence is None and settings.BOOKING_MODE == "seat":
+        return await book_seat(reservation_data=reservation_data, db=db)
+    if (
+        reservation_data.recurrence is None
+        and settings.BOOKING_LOCK_STRATEGY == "atomic"
+    ):
+        return await book_reservation(reservation_data=reservation_data, db=db)
+
+    if not await is_reservation_valid(reservation_data=reservation_data, db=db):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=constants.INVALID_RESERVATION,
+        )
+
+    if reservation_data.recurrence is not None:
+        return await make_recurring_reservation(
+            reservation_data=reservation_data, db=db
+        )
+    return await make_reservation(reservation_data=reservation_data, db=db)
+
 
-        response = await make_reservation(reservation_data=reservation_data, db=db)
+@reservation_router.post(
+    "/bulk",
+    description=(
+        "Book many reservations with a single commit. In atomic mode nothing "
+        "is booked if any reservation fails, in best_effort mode the valid "
+        "ones are. Results are returned per reservation, in request order."
+    ),
+    response_model=RerservationBulkResponse,
+)
+async def make_bulk_room_reservation(
+    bulk_data: RerservationBulkRequest,
+    http_response: Response,
+    db: DBSession = Depends(get_db),
+    current_user: UserBase = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+) -> RerservationBulkResponse:
+    try:
+        response = await idempotency_store.run(
+            "POST /reservations/bulk",
+            current_user.username,
+            idempotency_key,
+            bulk_data,
+            partial(make_bulk_reservation, bulk_data=bulk_data, db=db),
+        )
+        track_write(http_response, current_user.username)
         return response
     except Exception as e:
         raise HTTPException(
@@ -44,18 +127,69 @@ async def make_room_reservation(
         )
 
 
+@reservation_router.get(
+    "/export",
+    description=(
+        "Export reservations as newline delimited JSON or CSV, optionally only "
+        "the ones of a room or a user, overlapping from / to or a date. Rows "
+        "are streamed in start time order as they are read."
+    ),
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {media_type: {} for media_type in MEDIA_TYPES.values()}}
+    },
+)
+async def export_room_reservations(
+    export_format: ReservationExportFormat = Query(
+        ReservationExportFormat.NDJSON, alias="format"
+    ),
+    room_id: Optional[int] = Query(None),
+    user_name: Optional[str] = Query(None),
+    start_time: Optional[datetime] = Query(None, alias="from"),
+    end_time: Optional[datetime] = Query(None, alias="to"),
+    day: Optional[date] = Query(None, alias="date"),
+    session_factory=Depends(get_read_sessionmaker),
+    current_user: UserBase = Depends(get_current_read_user),
+) -> StreamingResponse:
+    try:
+        query = export_query(
+            room_id=room_id,
+            user_name=user_name,
+            start_time=start_time,
+            end_time=end_time,
+            day=day,
+        )
+        return StreamingResponse(
+            export_reservations(query, export_format, session_factory),
+            media_type=MEDIA_TYPES[export_format],
+            headers={
+                "Content-Disposition": (
+                    f'attachment; filename="reservations.{export_format.value}"'
+                )
+            },
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=e.status_code or status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=e.detail or str(e),
+        )
+
+
 @reservation_router.delete(
     "/{reservation_id}", description="Cancel a room reservation", response_model=dict
 )
 async def cancel_room_reservation(
     reservation_id: int,
-    db: Session = Depends(get_db),
+    http_response: Response,
+    db: DBSession = Depends(get_db),
     current_user: UserBase = Depends(get_current_user),
 ) -> dict:
     try:
-        return await cancel_reservation(
+        response = await cancel_reservation(
             reservation_id=reservation_id, db=db, username=current_user.username
         )
+        track_write(http_response, current_user.username)
+        return response
     except Exception as e:
         raise HTTPException(
             status_code=e.status_code or status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,37 +1,82 @@
-from typing import Dict
+from datetime import date, datetime
+from functools import partial
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import Response, StreamingResponse
 
 from app.core import constants
+from app.core.idempotency import idempotency_store
 from app.core.security import get_current_user
-from app.db.settings import get_db
+from app.core.versions import etag_matches, versions
+from app.db.routing import (
+    get_current_read_user,
+    get_read_db,
+    get_read_sessionmaker,
+    track_write,
+)
+from app.db.settings import DBSession, get_db, reads_replica
 from app.schemas.reservations import ReservationGetAllResponse
 from app.schemas.rooms import (
+    RoomBatchAvailabilityRequest,
+    RoomBatchAvailabilityResponse,
     RoomCheckAvailabilityRequest,
     RoomCreateRequest,
     RoomCreateResponse,
+    RoomFreeBusyResponse,
     RoomGetAllResponse,
+    RoomSearchResponse,
+    RoomSlot,
 )
 from app.schemas.user import UserBase
+from app.services.freebusy_service import get_freebusy
 from app.services.room_service import (
     check_availability,
+    check_availability_batch,
     create_room,
-    get_reservations,
-    get_rooms,
+    get_reservations_json,
+    get_rooms_json,
+    search_free_rooms,
 )
+from app.services.slot_service import find_earliest_slots
 
 room_router = APIRouter()
 
 
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+def read_etag(etag: str, db: DBSession) -> Optional[str]:
+    """``etag``, unless the body is read from a replica.
+
+    Versions are bumped on commit to the primary, so a lagging replica could
+    serve older rows under a newer tag, and clients would keep them.
+    """
+    return None if reads_replica(db) else etag
+
+
+def etag_headers(etag: Optional[str]) -> Optional[Dict[str, str]]:
+    return {"ETag": etag} if etag else None
+
+
 @room_router.post("/", description="Create a room", response_model=RoomCreateResponse)
 async def create(
     room_data: RoomCreateRequest,
-    db: Session = Depends(get_db),
+    http_response: Response,
+    db: DBSession = Depends(get_db),
     current_user: UserBase = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, max_length=255),
 ) -> RoomCreateResponse:
     try:
-        response = await create_room(room_data, db)
+        response = await idempotency_store.run(
+            "POST /rooms/",
+            current_user.username,
+            idempotency_key,
+            room_data,
+            partial(create_room, room_data, db),
+        )
+        track_write(http_response, current_user.username)
         return response
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -42,15 +87,151 @@ async def create(
         )
 
 
-@room_router.get("/", description="Get all rooms", response_model=RoomGetAllResponse)
+@room_router.get(
+    "/",
+    description=(
+        "Get all rooms ordered by id. Pass the next_cursor of a page as cursor "
+        "to get the next one, offset is only kept for older clients. fields "
+        "lists the keys to return, e.g. id,name."
+    ),
+    response_model=RoomGetAllResponse,
+)
 async def get_all(
     limit: int = Query(10, ge=1),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
-    current_user: UserBase = Depends(get_current_user),
-) -> RoomGetAllResponse:
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+    if_none_match: Optional[str] = Header(None),
+    db: DBSession = Depends(get_read_db),
+    current_user: UserBase = Depends(get_current_read_user),
+) -> Response:
+    try:
+        etag = read_etag(versions.catalog_etag(), db)
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        content = await get_rooms_json(
+            db=db, limit=limit, offset=offset, cursor=cursor, fields=fields
+        )
+        return Response(
+            content=content, media_type="application/json", headers=etag_headers(etag)
+        )
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=constants.INTERNAL_SERVER_ERROR,
+        )
+
+
+@room_router.get(
+    "/search",
+    description=(
+        "Find rooms free for the whole time window, optionally with a minimum "
+        "capacity and a location (📄 supports cursor pagination)."
+    ),
+    response_model=RoomSearchResponse,
+)
+async def search(
+    start_time: datetime = Query(...),
+    end_time: datetime = Query(...),
+    capacity: Optional[int] = Query(None, ge=1),
+    location: Optional[str] = Query(None),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    db: DBSession = Depends(get_read_db),
+    current_user: UserBase = Depends(get_current_read_user),
+) -> RoomSearchResponse:
+    try:
+        response = await search_free_rooms(
+            start_time=start_time,
+            end_time=end_time,
+            limit=limit,
+            capacity=capacity,
+            location=location,
+            cursor=cursor,
+            db=db,
+        )
+        return response
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=constants.INTERNAL_SERVER_ERROR,
+        )
+
+
+@room_router.get(
+    "/slots",
+    description=(
+        "Earliest slots of duration_minutes before end_time in any room "
+        "matching the capacity and location filters, one per free gap, "
+        "streamed as newline delimited JSON in start time order."
+    ),
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}, "model": RoomSlot}},
+)
+async def earliest_slots(
+    duration_minutes: int = Query(..., ge=1, le=1440),
+    end_time: datetime = Query(...),
+    start_time: Optional[datetime] = Query(None),
+    capacity: Optional[int] = Query(None, ge=1),
+    location: Optional[str] = Query(None),
+    limit: int = Query(10, ge=1, le=100),
+    session_factory=Depends(get_read_sessionmaker),
+    current_user: UserBase = Depends(get_current_read_user),
+) -> StreamingResponse:
     try:
-        response = await get_rooms(db=db, limit=limit, offset=offset)
+        slots = find_earliest_slots(
+            duration_minutes=duration_minutes,
+            end_time=end_time,
+            limit=limit,
+            session_factory=session_factory,
+            start_time=start_time,
+            capacity=capacity,
+            location=location,
+        )
+        return StreamingResponse(
+            (slot.model_dump_json() + "\n" async for slot in slots),
+            media_type="application/x-ndjson",
+        )
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=constants.INTERNAL_SERVER_ERROR,
+        )
+
+
+@room_router.get(
+    "/freebusy",
+    description=(
+        "Free/busy grid of rooms over a time window split in slots of "
+        "granularity_minutes. busy holds one character per slot and room "
+        "(1 = booked), all_free marks slots where every room is free and "
+        "any_free slots where at least one is."
+    ),
+    response_model=RoomFreeBusyResponse,
+)
+async def freebusy(
+    room_ids: List[int] = Query(..., min_length=1, max_length=200),
+    start_time: datetime = Query(...),
+    end_time: datetime = Query(...),
+    granularity_minutes: int = Query(15, ge=1, le=1440),
+    db: DBSession = Depends(get_read_db),
+    current_user: UserBase = Depends(get_current_read_user),
+) -> RoomFreeBusyResponse:
+    try:
+        response = await get_freebusy(
+            room_ids=room_ids,
+            start_time=start_time,
+            end_time=end_time,
+            granularity_minutes=granularity_minutes,
+            db=db,
+        )
         return response
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -63,21 +244,46 @@ async def get_all(
 
 @room_router.get(
     "/{room_id}/reservations",
-    description="Get room reservations",
+    description=(
+        "Get room reservations ordered by start time, optionally only the ones "
+        "overlapping from / to or a date. Pass the next_cursor of a page as "
+        "cursor to get the next one, offset is only kept for older clients. "
+        "fields lists the keys to return, e.g. id,start_time,end_time."
+    ),
     response_model=ReservationGetAllResponse,
 )
 async def get_room_reservations(
     room_id: int,
     limit: int = Query(10, ge=1),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
-    current_user: UserBase = Depends(get_current_user),
-) -> ReservationGetAllResponse:
+    cursor: Optional[str] = Query(None),
+    start_time: Optional[datetime] = Query(None, alias="from"),
+    end_time: Optional[datetime] = Query(None, alias="to"),
+    day: Optional[date] = Query(None, alias="date"),
+    fields: Optional[str] = Query(None),
+    if_none_match: Optional[str] = Header(None),
+    db: DBSession = Depends(get_read_db),
+    current_user: UserBase = Depends(get_current_read_user),
+) -> Response:
     try:
-        response = await get_reservations(
-            limit=limit, offset=offset, room_id=room_id, db=db
+        etag = read_etag(versions.room_etag(room_id), db)
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        content = await get_reservations_json(
+            limit=limit,
+            offset=offset,
+            room_id=room_id,
+            db=db,
+            cursor=cursor,
+            start_time=start_time,
+            end_time=end_time,
+            day=day,
+            fields=fields,
+        )
+        return Response(
+            content=content, media_type="application/json", headers=etag_headers(etag)
         )
-        return response
     except Exception as e:
         if isinstance(e, HTTPException):
             raise e
@@ -90,18 +296,26 @@ async def get_room_reservations(
 @room_router.get("/{id}/availability", description="Check room availability")
 async def check_room_availability(
     id: int,
+    response: Response,
     start_time: str = Query(...),
     end_time: str = Query(...),
-    db: Session = Depends(get_db),
-    current_user: UserBase = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
+    db: DBSession = Depends(get_read_db),
+    current_user: UserBase = Depends(get_current_read_user),
 ) -> Dict[str, str]:
     try:
+        etag = read_etag(versions.room_etag(id), db)
+        if etag and etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
         room_params = RoomCheckAvailabilityRequest(
             id=id, start_time=start_time, end_time=end_time
         )
         is_available = await check_availability(room_params, db)
 
         availability = "available" if is_available else "unavailable"
+        if etag:
+            response.headers["ETag"] = etag
         return {"message": f"Room is {availability}"}
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -110,3 +324,30 @@ async def check_room_availability(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=constants.INTERNAL_SERVER_ERROR,
         )
+
+
+@room_router.post(
+    "/availability",
+    description=(
+        "Check the availability of many rooms at once, either for a list of "
+        "room windows (checks) or for a list of rooms (room_ids) over one "
+        "window. Returns, per room, whether each of its windows is available "
+        "in request order."
+    ),
+    response_model=RoomBatchAvailabilityResponse,
+)
+async def check_rooms_availability(
+    params: RoomBatchAvailabilityRequest,
+    db: DBSession = Depends(get_read_db),
+    current_user: UserBase = Depends(get_current_read_user),
+) -> RoomBatchAvailabilityResponse:
+    try:
+        response = await check_availability_batch(params, db)
+        return response
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=constants.INTERNAL_SERVER_ERROR,
+        )
@@ -1,4 +1,5 @@
 from os import getenv
+from typing import List, Literal
 
 from dotenv import load_dotenv
 from pydantic import computed_field
@@ -22,6 +23,43 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     DB_HOST: str
     DB_PORT: int
+    DB_ASYNC: bool = True
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+    DB_REPLICA_URLS: List[str] = []
+    DB_READ_YOUR_WRITES_SECONDS: float = 5
+
+    INTERVAL_INDEX_ENABLED: bool = True
+    INTERVAL_INDEX_MAX_INTERVALS: int = 1_000_000
+    INTERVAL_INDEX_TTL_SECONDS: float = 60
+
+    AVAILABILITY_CACHE_ENABLED: bool = True
+    AVAILABILITY_CACHE_SLOT_MINUTES: int = 5
+    AVAILABILITY_CACHE_MAX_ENTRIES: int = 100_000
+    AVAILABILITY_CACHE_TTL_SECONDS: float = 5
+
+    ROOM_CATALOG_ENABLED: bool = True
+    ROOM_CATALOG_MAX_ROOMS: int = 100_000
+    ROOM_CATALOG_TTL_SECONDS: float = 60
+
+    ETAG_TTL_SECONDS: float = 60
+
+    INVALIDATION_BUS_ENABLED: bool = True
+    INVALIDATION_BUS_CHANNEL: str = "smart_room_invalidation"
+    INVALIDATION_BUS_RECONNECT_SECONDS: float = 1
+    INVALIDATION_BUS_PING_SECONDS: float = 10
+
+    BOOKING_MODE: Literal["room", "seat"] = "room"
+    BOOKING_LOCK_STRATEGY: Literal["atomic", "for_update", "advisory", "optimistic"] = (
+        "atomic"
+    )
+    BOOKING_OPTIMISTIC_RETRIES: int = 5
+
+    IDEMPOTENCY_MAX_KEYS: int = 100_000
+    IDEMPOTENCY_TTL_SECONDS: float = 86_400
 
     @computed_field
     @property
@@ -31,5 +69,13 @@ class Settings(BaseSettings):
             f"{self.DB_HOST}:{self.DB_PORT}/{self.POSTGRES_DB}"
         )
 
+    @computed_field
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        return (
+            f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@"
+            f"{self.DB_HOST}:{self.DB_PORT}/{self.POSTGRES_DB}"
+        )
+
 
 settings = Settings()
@@ -0,0 +1,134 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+from time import monotonic
+from typing import Dict, Optional, Set, Tuple
+
+from app.config.settings import settings
+from app.core.interval_index import to_naive_utc
+
+Key = Tuple[int, datetime, datetime]
+
+GRID_ORIGIN = datetime(1970, 1, 1)
+
+
+class AvailabilityCache:
+    """Cached overlap check results, keyed by room and slot grid window.
+
+    Only windows whose bounds fall on the ``slot_minutes`` grid are cached,
+    which is what kiosks and calendar views ask for, so a cached answer is
+    always exact. Writes invalidate the cached windows of the room they
+    overlap. Entries expire after ``ttl_seconds`` so writes made by other
+    workers are picked up, and at most ``max_entries`` are kept, evicting
+    the least recently used.
+    """
+
+    def __init__(self, slot_minutes: int, max_entries: int, ttl_seconds: float):
+        self.slot = timedelta(minutes=slot_minutes)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = Lock()
+        self._entries: "OrderedDict[Key, Tuple[bool, float]]" = OrderedDict()
+        self._rooms: Dict[int, Set[Key]] = {}
+        self._writes: Dict[int, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(
+        self, room_id: int, start_time: datetime, end_time: datetime
+    ) -> Optional[Key]:
+        start_time, end_time = to_naive_utc(start_time), to_naive_utc(end_time)
+        if (start_time - GRID_ORIGIN) % self.slot or (
+            end_time - GRID_ORIGIN
+        ) % self.slot:
+            return None
+        return room_id, start_time, end_time
+
+    def get(
+        self, room_id: int, start_time: datetime, end_time: datetime
+    ) -> Optional[bool]:
+        """Whether the window overlaps a reservation, None when not cached."""
+        key = self.key(room_id, start_time, end_time)
+        with self._lock:
+            entry = self._entries.get(key) if key else None
+            if entry is None or monotonic() - entry[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def writes(self, room_id: int) -> int:
+        """Write counter of a room, to be passed back to ``set``."""
+        return self._writes.get(room_id, 0)
+
+    def set(
+        self,
+        room_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        reserved: bool,
+        writes: int,
+    ) -> None:
+        key = self.key(room_id, start_time, end_time)
+        with self._lock:
+            # Don't cache a result read before a write to the room landed.
+            if key is None or self._writes.get(room_id, 0) != writes:
+                return
+
+            self._entries[key] = (reserved, monotonic())
+            self._entries.move_to_end(key)
+            self._rooms.setdefault(room_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._discard(evicted)
+                self.evictions += 1
+
+    def invalidate(
+        self, room_id: int, start_time: datetime, end_time: datetime
+    ) -> None:
+        """Drop the cached windows of a room overlapping a written range."""
+        start_time, end_time = to_naive_utc(start_time), to_naive_utc(end_time)
+        with self._lock:
+            self._writes[room_id] = self._writes.get(room_id, 0) + 1
+            for key in list(self._rooms.get(room_id, ())):
+                if key[1] < end_time and key[2] > start_time:
+                    del self._entries[key]
+                    self._discard(key)
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._rooms.clear()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _discard(self, key: Key) -> None:
+        keys = self._rooms.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._rooms[key[0]]
+
+
+availability_cache = AvailabilityCache(
+    slot_minutes=settings.AVAILABILITY_CACHE_SLOT_MINUTES,
+    max_entries=settings.AVAILABILITY_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AVAILABILITY_CACHE_TTL_SECONDS,
+)
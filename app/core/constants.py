@@ -1,16 +1,28 @@
 ERROR_REGISTERING_USER = "Error registering user"
 ERROR_LOGGING_USER = "Error logging in user"
 ERROR_MAKING_RESERVATION = "Error making reservation"
+ERROR_MAKING_BULK_RESERVATION = "Error making bulk reservation"
 ERROR_CANCELLING_RESERVATION = "Error cancelling reservation"
 ERROR_VALIDATING_RESERVATION = "Error validating reservation"
 ERROR_GETTING_RESERVATIONS = "Error getting reservations"
+ERROR_EXPORTING_RESERVATIONS = "Error exporting reservations"
 ERROR_CREATING_ROOM = "Error creating room"
 ERROR_CREATING_ROOM_CAPACITY = "Room capacity should be greater than 0"
 ERROR_CHECKING_ROOM = "Error checking room availability"
+ERROR_CHECKING_ROOMS = "Error checking rooms availability"
 ERROR_GETTING_ROOMS = "Error getting rooms"
+ERROR_WARMING_ROOM_CATALOG = "Error loading the room catalog"
+ERROR_SEARCHING_ROOMS = "Error searching free rooms"
+ERROR_GETTING_FREEBUSY = "Error getting rooms free/busy"
+FREEBUSY_TOO_MANY_SLOTS = "Time window has too many slots, use a coarser granularity."
+ERROR_FINDING_SLOTS = "Error finding available slots"
 NOT_AUTHORIZED_TO_CANCEL_RESERVATION = "User not authorized to cancel reservation"
 INVALID_RESERVATION = "Not a valid reservation"
+BULK_RESERVATION_ABORTED = "Not booked, another reservation of the request failed."
 INVALID_CREDENTIALS = "Invalid credentials"
+INVALID_CURSOR = "Invalid pagination cursor"
+INVALID_FIELDS = "Invalid fields, expected a comma separated list of response keys."
+IDEMPOTENCY_KEY_REUSED = "Idempotency-Key was already used with a different request."
 INVALID_DATETIME = "datetime not valid, start_time should be lower than end_time."
 INVALID_DATETIME_NOW = "datetime not valid, start_time should be greater or equal now."
 USER_ALREADY_EXISTS = "User already exists"
@@ -18,6 +30,7 @@ USER_REGISTERED_SUCCESSFULLY = "User registered successfully"
 ROOM_DONT_EXISTS = "Room does not exists."
 ROOM_CAPACITY_FULL = "Room capacity is already full."
 ROOM_ALREADY_RESERVERD = "Room already reserved for this date."
+ROOM_UPDATED_CONCURRENTLY = "Room was updated concurrently, please try again."
 ROOM_CREATED_SUCCESSFULLY = "Room created successfully"
 ROOM_RESERVED_SUCCESSFULLY = "Room reserved successfully."
 RESERVATION_NOT_FOUND = "Reservation not found"
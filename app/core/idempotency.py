@@ -0,0 +1,113 @@
+import asyncio
+from collections import OrderedDict
+from hashlib import sha256
+from time import monotonic
+from typing import Awaitable, Callable, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+
+from app.config.settings import settings
+from app.core import constants
+from app.core.logger import logger
+
+T = TypeVar("T")
+Key = Tuple[str, str, str]
+
+
+class IdempotencyStore:
+    """First outcome of requests sent with an ``Idempotency-Key`` header.
+
+    Outcomes are keyed by endpoint, user and key. A duplicate gets the stored
+    response back, or the same error for client errors, without running the
+    request again, and duplicates arriving while the first one is in flight
+    wait for its outcome. Server errors aren't stored so the request can be
+    retried. Reusing a key with a different payload is rejected. Entries
+    expire after ``ttl_seconds`` and at most ``max_entries`` are kept,
+    evicting the least recently used. Like the availability cache the store
+    lives in the worker, a retry landing on another worker runs again.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Key, Tuple[str, asyncio.Future, float]]" = (
+            OrderedDict()
+        )
+        self.replays = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def run(
+        self,
+        endpoint: str,
+        username: str,
+        key: Optional[str],
+        payload: BaseModel,
+        call: Callable[[], Awaitable[T]],
+    ) -> T:
+        """Await ``call()`` once per key, replaying its outcome to duplicates."""
+        if key is None:
+            return await call()
+
+        entry_key = (endpoint, username, key)
+        fingerprint = sha256(payload.model_dump_json().encode()).hexdigest()
+        entry = self._entries.get(entry_key)
+        if entry is not None and monotonic() - entry[2] <= self.ttl_seconds:
+            if entry[0] != fingerprint:
+                logger.error(constants.IDEMPOTENCY_KEY_REUSED)
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=constants.IDEMPOTENCY_KEY_REUSED,
+                )
+            self._entries.move_to_end(entry_key)
+            self.replays += 1
+            logger.info(f"Replaying {endpoint} for idempotency key {key}.")
+            if entry[1].done():
+                return entry[1].result()
+            return await asyncio.shield(entry[1])
+
+        outcome = asyncio.get_running_loop().create_future()
+        self._store(entry_key, (fingerprint, outcome, monotonic()))
+        try:
+            result = await call()
+        except BaseException as e:
+            if not (isinstance(e, HTTPException) and e.status_code < 500):
+                self._discard(entry_key, outcome)
+            # A cancelled request (client gone) fails its waiting duplicates.
+            outcome.set_exception(
+                e
+                if isinstance(e, Exception)
+                else HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=constants.INTERNAL_SERVER_ERROR,
+                )
+            )
+            # Retrieved here, waiting duplicates (if any) get it too.
+            outcome.exception()
+            raise
+        outcome.set_result(result)
+        return result
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _store(self, key: Key, entry: Tuple[str, asyncio.Future, float]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _discard(self, key: Key, outcome: asyncio.Future) -> None:
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] is outcome:
+            del self._entries[key]
+
+
+idempotency_store = IdempotencyStore(
+    max_entries=settings.IDEMPOTENCY_MAX_KEYS,
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+)
@@ -0,0 +1,194 @@
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from time import monotonic
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.config.settings import settings
+from app.core.logger import logger
+from app.db.settings import DBSession, resolve
+from app.models.reservation import Reservation
+
+Interval = Tuple[datetime, datetime, int]
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Reservations are stored as TIMESTAMP WITHOUT TIME ZONE in UTC."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass
+class RoomIntervals:
+    """Reservations of a room ending after ``loaded_from``, sorted by start."""
+
+    loaded_from: datetime
+    loaded_at: float
+    intervals: List[Interval] = field(default_factory=list)
+
+    def overlaps(self, start_time: datetime, end_time: datetime) -> bool:
+        # The exclusion constraint keeps a room's reservations disjoint, so
+        # they are sorted by end time too and only the reservation starting
+        # right before end_time can overlap.
+        position = bisect_left(self.intervals, (end_time,))
+        return position > 0 and self.intervals[position - 1][1] > start_time
+
+
+class IntervalIndex:
+    """In-process index of reservations per room for overlap checks.
+
+    Rooms are loaded lazily from the reservation table on first use and kept
+    up to date by ``make_reservation`` and ``cancel_reservation``. Only
+    reservations ending after the load time are kept, windows starting
+    before it are answered by the database. The index holds at most
+    ``max_intervals`` reservations, evicting the least recently used rooms,
+    and rooms loaded more than ``ttl_seconds`` ago are checked against the
+    database again so writes from other workers are eventually picked up.
+    """
+
+    def __init__(self, max_intervals: int, ttl_seconds: float):
+        self.max_intervals = max_intervals
+        self.ttl_seconds = ttl_seconds
+        self._rooms: "OrderedDict[int, RoomIntervals]" = OrderedDict()
+        self._size = 0
+        self._writes: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    async def overlaps(
+        self, room_id: int, start_time: datetime, end_time: datetime, db: DBSession
+    ) -> Optional[bool]:
+        """Return whether the window overlaps a reservation of the room.
+
+        Returns None when the window starts before the loaded range and the
+        caller has to ask the database.
+        """
+        room = self._rooms.get(room_id)
+        if room is None or self._expired(room):
+            room = await self.verify(room_id, db)
+        return self._overlaps(room_id, room, start_time, end_time)
+
+    def loaded_overlaps(
+        self, room_id: int, start_time: datetime, end_time: datetime
+    ) -> Optional[bool]:
+        """``overlaps`` from memory only, None unless the room is loaded and fresh."""
+        room = self._rooms.get(room_id)
+        if room is None or self._expired(room):
+            return None
+        return self._overlaps(room_id, room, start_time, end_time)
+
+    async def verify(self, room_id: int, db: DBSession) -> RoomIntervals:
+        """(Re)load a room from the database, logging any drift found."""
+        writes = self._writes.get(room_id, 0)
+        loaded_from = to_naive_utc(datetime.now(timezone.utc))
+        rows = (
+            await resolve(
+                db.execute(
+                    select(
+                        Reservation.start_time,
+                        Reservation.end_time,
+                        Reservation.id,
+                    )
+                    .where(
+                        Reservation.room_id == room_id,
+                        Reservation.end_time > loaded_from,
+                    )
+                    .order_by(Reservation.start_time)
+                )
+            )
+        ).all()
+        room = RoomIntervals(
+            loaded_from=loaded_from,
+            loaded_at=monotonic(),
+            intervals=[tuple(row) for row in rows],
+        )
+
+        cached = self._rooms.get(room_id)
+        if cached is not None:
+            current = [i for i in cached.intervals if i[1] > loaded_from]
+            if current != room.intervals:
+                logger.warning(f"Interval index for room {room_id} was out of date.")
+
+        # Don't install a snapshot that missed a write made while loading.
+        if self._writes.get(room_id, 0) == writes:
+            self._store(room_id, room)
+        return room
+
+    def add(
+        self, room_id: int, start_time: datetime, end_time: datetime, id: int
+    ) -> None:
+        self._writes[room_id] = self._writes.get(room_id, 0) + 1
+        room = self._rooms.get(room_id)
+        if room is None:
+            return
+
+        interval = (to_naive_utc(start_time), to_naive_utc(end_time), id)
+        if interval[1] > room.loaded_from:
+            insort(room.intervals, interval)
+            self._size += 1
+            self._evict()
+
+    def remove(self, room_id: int, id: int) -> None:
+        self._writes[room_id] = self._writes.get(room_id, 0) + 1
+        room = self._rooms.get(room_id)
+        if room is None:
+            return
+
+        intervals = [interval for interval in room.intervals if interval[2] != id]
+        self._size -= len(room.intervals) - len(intervals)
+        room.intervals = intervals
+
+    def invalidate(self, room_id: int) -> None:
+        """Drop a room written elsewhere, it is loaded again on next use."""
+        self._writes[room_id] = self._writes.get(room_id, 0) + 1
+        self.evict(room_id)
+
+    def evict(self, room_id: int) -> None:
+        room = self._rooms.pop(room_id, None)
+        if room is not None:
+            self._size -= len(room.intervals)
+
+    def clear(self) -> None:
+        self._rooms.clear()
+        self._size = 0
+
+    def _expired(self, room: RoomIntervals) -> bool:
+        return monotonic() - room.loaded_at > self.ttl_seconds
+
+    def _overlaps(
+        self,
+        room_id: int,
+        room: RoomIntervals,
+        start_time: datetime,
+        end_time: datetime,
+    ) -> Optional[bool]:
+        start_time, end_time = to_naive_utc(start_time), to_naive_utc(end_time)
+        if start_time < room.loaded_from:
+            return None
+
+        if room_id in self._rooms:
+            self._rooms.move_to_end(room_id)
+        return room.overlaps(start_time, end_time)
+
+    def _store(self, room_id: int, room: RoomIntervals) -> None:
+        self.evict(room_id)
+        self._rooms[room_id] = room
+        self._size += len(room.intervals)
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._size > self.max_intervals and len(self._rooms) > 1:
+            evicted_id, evicted = self._rooms.popitem(last=False)
+            self._size -= len(evicted.intervals)
+            logger.info(f"Evicted room {evicted_id} from the interval index.")
+
+
+interval_index = IntervalIndex(
+    max_intervals=settings.INTERVAL_INDEX_MAX_INTERVALS,
+    ttl_seconds=settings.INTERVAL_INDEX_TTL_SECONDS,
+)
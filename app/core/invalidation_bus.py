@@ -0,0 +1,205 @@
+import asyncio
+import json
+from datetime import datetime
+from secrets import token_hex
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import asyncpg
+from sqlalchemy import ColumnElement, UpdateBase, func, select
+
+from app.config.settings import settings
+from app.core.availability_cache import availability_cache
+from app.core.interval_index import interval_index, to_naive_utc
+from app.core.logger import logger
+from app.core.room_catalog import room_catalog
+from app.core.versions import versions
+from app.db.settings import DBSession, resolve
+
+# A room and the time range written in it, no range for a room created.
+Write = Tuple[int, Optional[datetime], Optional[datetime]]
+
+# Postgres caps NOTIFY payloads at 8000 bytes, a write takes about 60.
+WRITES_PER_EVENT = 100
+
+
+class InvalidationBus:
+    """Invalidates the in-process caches of every worker on writes.
+
+    Writes send a NOTIFY with their rooms and time ranges in their own
+    transaction, so it is only delivered once they are committed. Each worker
+    LISTENs on one connection of its own and applies the events of other
+    workers to its availability cache, interval index, room catalog and
+    ETag versions. The connection is pinged every ``ping_seconds`` and
+    opened again after ``reconnect_seconds`` when it is lost. Events sent
+    while a worker wasn't listening are gone, so the caches are flushed
+    whenever it starts listening again.
+    """
+
+    def __init__(
+        self, dsn: str, channel: str, reconnect_seconds: float, ping_seconds: float
+    ):
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_seconds = reconnect_seconds
+        self.ping_seconds = ping_seconds
+        self.origin = token_hex(4)
+        self._task: Optional[asyncio.Task] = None
+        self._listening: Optional[asyncio.Event] = None
+        self.events = 0
+        self.flushes = 0
+
+    async def start(self, timeout: float = 5) -> None:
+        """Listen in the background, waiting up to ``timeout`` for it."""
+        self._listening = asyncio.Event()
+        self._task = asyncio.create_task(self._listen())
+        try:
+            await asyncio.wait_for(self._listening.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.error("Invalidation bus not listening yet, retrying.")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def notify(self, writes: Iterable[Write], db: DBSession) -> None:
+        """Tell the other workers about writes made in the transaction of ``db``."""
+        columns = self.notify_columns(writes)
+        if columns:
+            await resolve(db.execute(select(*columns)))
+
+    def notify_columns(self, writes: Iterable[Write]) -> List[ColumnElement]:
+        """``pg_notify`` calls sending the events of ``writes``.
+
+        Returned by a write statement they take no round trip of their own.
+        """
+        return [
+            func.pg_notify(self.channel, payload).label(f"notify_{index}")
+            for index, payload in enumerate(self.payloads(writes))
+        ]
+
+    def payloads(self, writes: Iterable[Write]) -> List[str]:
+        """Events for the writes, one time range per room covering its writes."""
+        rooms: Dict[int, List] = {}
+        for room_id, start_time, end_time in writes:
+            if start_time is None:
+                rooms.setdefault(room_id, [None, None])
+                continue
+            start_time, end_time = to_naive_utc(start_time), to_naive_utc(end_time)
+            written = rooms.setdefault(room_id, [start_time, end_time])
+            if written[0] is not None:
+                written[0] = min(written[0], start_time)
+                written[1] = max(written[1], end_time)
+
+        items = [
+            [room_id, *(time and time.isoformat() for time in written)]
+            for room_id, written in rooms.items()
+        ]
+        return [
+            json.dumps(
+                {
+                    "origin": self.origin,
+                    "writes": items[start : start + WRITES_PER_EVENT],
+                }
+            )
+            for start in range(0, len(items), WRITES_PER_EVENT)
+        ]
+
+    def apply(self, payload: str) -> None:
+        event = json.loads(payload)
+        if event["origin"] == self.origin:
+            return
+
+        self.events += 1
+        for room_id, start_time, end_time in event["writes"]:
+            if start_time is None:
+                versions.bump()
+                room_catalog.invalidate(room_id)
+                continue
+
+            availability_cache.invalidate(
+                room_id,
+                datetime.fromisoformat(start_time),
+                datetime.fromisoformat(end_time),
+            )
+            interval_index.invalidate(room_id)
+            # Only bookings in room mode write the room's capacity.
+            if settings.BOOKING_MODE == "room":
+                room_catalog.invalidate(room_id)
+            versions.bump(room_id)
+
+    def flush(self) -> None:
+        """Drop every cache, for when events may have been missed."""
+        self.flushes += 1
+        availability_cache.clear()
+        interval_index.clear()
+        room_catalog.clear()
+        versions.flush()
+
+    async def _listen(self) -> None:
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(self.channel, self._on_notification)
+                self.flush()
+                self._listening.set()
+                logger.info(f"Listening for cache invalidations on {self.channel}.")
+
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), self.ping_seconds)
+                    except asyncio.TimeoutError:
+                        await asyncio.wait_for(
+                            connection.fetchval("SELECT 1"), self.ping_seconds
+                        )
+                logger.error("Invalidation bus connection lost.")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Invalidation bus connection failed: {str(e)}")
+            finally:
+                self._listening.clear()
+                if connection is not None:
+                    connection.terminate()
+            await asyncio.sleep(self.reconnect_seconds)
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str):
+        try:
+            self.apply(payload)
+        except Exception as e:
+            # A broken event may hide a write, don't trust the caches.
+            logger.error(f"Invalid cache invalidation event {payload}: {str(e)}")
+            self.flush()
+
+
+invalidation_bus = InvalidationBus(
+    dsn=settings.DATABASE_URL,
+    channel=settings.INVALIDATION_BUS_CHANNEL,
+    reconnect_seconds=settings.INVALIDATION_BUS_RECONNECT_SECONDS,
+    ping_seconds=settings.INVALIDATION_BUS_PING_SECONDS,
+)
+
+
+async def notify_writes(writes: Iterable[Write], db: DBSession) -> None:
+    """``invalidation_bus.notify`` when the bus is enabled."""
+    if settings.INVALIDATION_BUS_ENABLED:
+        await invalidation_bus.notify(writes, db)
+
+
+def returning_notify(statement: UpdateBase, writes: Iterable[Write]) -> UpdateBase:
+    """``statement`` also notifying ``writes`` from its RETURNING, when the bus
+    is enabled, so it is only sent when a row is written.
+
+    ``statement`` has to target a Table, SQLAlchemy doesn't return plain SQL
+    expressions from ORM-enabled INSERT and UPDATE statements.
+    """
+    if not settings.INVALIDATION_BUS_ENABLED:
+        return statement
+    return statement.returning(*invalidation_bus.notify_columns(writes))
@@ -0,0 +1,38 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import Any, List
+
+from fastapi import HTTPException, status
+
+from app.core import constants
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque cursor holding the sort key of the last row of a page."""
+    return urlsafe_b64encode(json.dumps(values, default=str).encode()).decode()
+
+
+def decode_value(value: Any, value_type: type) -> Any:
+    if value_type is datetime:
+        return datetime.fromisoformat(value)
+    if value_type is int and (isinstance(value, bool) or not isinstance(value, int)):
+        raise TypeError(f"{value!r} isn't an int")
+    return value
+
+
+def decode_cursor(cursor: str, *types: type) -> List[Any]:
+    """Values of a cursor, one of each of ``types``.
+
+    Cursors come from clients, so one that doesn't decode to those types is
+    rejected here instead of failing in the query.
+    """
+    try:
+        values = json.loads(urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(f"{len(types)} values expected")
+        return [decode_value(value, type_) for value, type_ in zip(values, types)]
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=constants.INVALID_CURSOR
+        )
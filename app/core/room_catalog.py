@@ -0,0 +1,193 @@
+from bisect import insort
+from collections import OrderedDict
+from time import monotonic
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import select
+
+from app.config.settings import settings
+from app.core.logger import logger
+from app.db.settings import DBSession, resolve
+from app.models.room import Room
+
+
+class CachedRoom(NamedTuple):
+    id: int
+    name: str
+    capacity: int
+    location: str
+
+
+COLUMNS = (Room.id, Room.name, Room.capacity, Room.location)
+
+
+class RoomCatalog:
+    """In-process copy of the room table, keyed by id.
+
+    Rooms are loaded lazily on first use, or all at once by ``warm_up`` at
+    start-up. ``create_room`` adds new rooms and capacity writes drop the
+    room, which is read again on next use. While the whole table is cached
+    the room listing is served from it. At most ``max_entries`` rooms are
+    kept, evicting the least recently used, and rooms loaded more than
+    ``ttl_seconds`` ago are read again so writes from other workers are
+    eventually picked up.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._rooms: "OrderedDict[int, Tuple[CachedRoom, float]]" = OrderedDict()
+        self._writes: Dict[int, int] = {}
+        # Whether every room was cached by the last warm-up, and the ids
+        # dropped since then.
+        self._complete = False
+        self._warmed_at: Optional[float] = None
+        self._missing: Set[int] = set()
+        self._ids: List[int] = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    async def get(self, room_id: int, db: DBSession) -> Optional[CachedRoom]:
+        """The room with ``room_id``, None when it doesn't exist."""
+        return (await self.get_many([room_id], db)).get(room_id)
+
+    async def get_many(
+        self, room_ids: Iterable[int], db: DBSession
+    ) -> Dict[int, CachedRoom]:
+        """Rooms by id, reading the ones not cached in a single query."""
+        rooms, missed = {}, []
+        now = monotonic()
+        for room_id in set(room_ids):
+            entry = self._rooms.get(room_id)
+            if entry is not None and now - entry[1] <= self.ttl_seconds:
+                self._rooms.move_to_end(room_id)
+                rooms[room_id] = entry[0]
+                self.hits += 1
+            else:
+                missed.append(room_id)
+                self.misses += 1
+
+        if missed:
+            rooms.update((room.id, room) for room in await self._load(missed, db))
+        return rooms
+
+    async def rooms(self, db: DBSession) -> Optional[List[CachedRoom]]:
+        """Every room ordered by id, None when they don't fit in the catalog."""
+        if self._warmed_at is None or monotonic() - self._warmed_at > self.ttl_seconds:
+            await self.warm_up(db)
+        if self._complete and self._missing:
+            await self._load(list(self._missing), db)
+        if not self._complete or self._missing:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return [self._rooms[id][0] for id in self._ids]
+
+    async def warm_up(self, db: DBSession) -> int:
+        """(Re)load every room, as long as they fit in the catalog."""
+        self._warmed_at = monotonic()
+        writes = dict(self._writes)
+        rows = (
+            await resolve(
+                db.execute(
+                    select(*COLUMNS).order_by(Room.id).limit(self.max_entries + 1)
+                )
+            )
+        ).all()
+
+        # Start over, rooms cached before may have been written since.
+        self._rooms.clear()
+        self._ids.clear()
+        self._missing.clear()
+        complete = len(rows) <= self.max_entries
+        if not complete:
+            logger.info(
+                f"Room catalog holds {self.max_entries} rooms, the listing is "
+                "read from the database."
+            )
+        self._store(
+            [CachedRoom(*row) for row in rows[: self.max_entries]],
+            writes,
+            self._warmed_at,
+        )
+        self._complete = complete
+        logger.info(f"Loaded {len(rows[: self.max_entries])} rooms in the catalog.")
+        return len(self._rooms)
+
+    def add(self, room: CachedRoom) -> None:
+        """Cache a room just created, it doesn't need to be read again."""
+        self._writes[room.id] = self._writes.get(room.id, 0) + 1
+        self._store([room], self._writes, monotonic())
+
+    def invalidate(self, room_id: int) -> None:
+        """Drop a written room. While every room is cached, rooms created by
+        other workers are read on next use too."""
+        self._writes[room_id] = self._writes.get(room_id, 0) + 1
+        if self._rooms.pop(room_id, None) is not None:
+            self.invalidations += 1
+        elif not self._complete or room_id in self._missing:
+            return
+        else:
+            insort(self._ids, room_id)
+        self._missing.add(room_id)
+
+    def clear(self) -> None:
+        self._rooms.clear()
+        self._ids.clear()
+        self._missing.clear()
+        self._complete = False
+        self._warmed_at = None
+
+    def snapshot(self) -> Dict:
+        return {
+            "size": len(self._rooms),
+            "max_entries": self.max_entries,
+            "complete": self._complete and not self._missing,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    async def _load(self, room_ids: List[int], db: DBSession) -> List[CachedRoom]:
+        writes = dict(self._writes)
+        rows = (
+            await resolve(db.execute(select(*COLUMNS).where(Room.id.in_(room_ids))))
+        ).all()
+        rooms = [CachedRoom(*row) for row in rows]
+        self._store(rooms, writes, monotonic())
+        return rooms
+
+    def _store(
+        self, rooms: Iterable[CachedRoom], writes: Dict[int, int], loaded_at: float
+    ) -> None:
+        for room in rooms:
+            if room.id not in self._rooms and room.id not in self._missing:
+                insort(self._ids, room.id)
+            # Don't install a room read before a write to it landed, it is
+            # read again on next use.
+            if self._writes.get(room.id, 0) != writes.get(room.id, 0):
+                if room.id not in self._rooms:
+                    self._missing.add(room.id)
+                continue
+            self._rooms[room.id] = (room, loaded_at)
+            self._rooms.move_to_end(room.id)
+            self._missing.discard(room.id)
+
+        while len(self._rooms) > self.max_entries:
+            evicted_id, _ = self._rooms.popitem(last=False)
+            self._ids.remove(evicted_id)
+            self._complete = False
+            self.evictions += 1
+
+
+room_catalog = RoomCatalog(
+    max_entries=settings.ROOM_CATALOG_MAX_ROOMS,
+    ttl_seconds=settings.ROOM_CATALOG_TTL_SECONDS,
+)
@@ -5,9 +5,9 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 
-from app.db.settings import get_db
+from app.db.settings import DBSession, get_db, resolve
 from app.models.user import User
 from app.schemas.user import UserBase
 
@@ -44,9 +44,8 @@ def decode_access_token(token: str) -> Optional[dict]:
         return None
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> UserBase:
+def token_username(token: str) -> str:
+    """Username (sub) of a valid access token, read without the database."""
     decoded_token = decode_access_token(token)
     if decoded_token is None:
         raise HTTPException(
@@ -58,7 +57,14 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token missing username (sub)",
         )
-    user = db.query(User).filter(User.username == username).first()
+    return username
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), db: DBSession = Depends(get_db)
+) -> UserBase:
+    username = token_username(token)
+    user = await resolve(db.scalar(select(User).where(User.username == username)))
 
     if user is None:
         raise HTTPException(
@@ -0,0 +1,65 @@
+from secrets import token_hex
+from threading import Lock
+from time import monotonic
+from typing import Dict, Optional
+
+from app.config.settings import settings
+
+
+class VersionCounters:
+    """Versions of the room catalog and of each room, to build ETags from.
+
+    Writes bump the version of the room they touch and the catalog version,
+    after they are committed, so a tag read before a listing on the primary
+    is never newer than the rows listed. Replicas may lag behind it, so
+    responses read from one carry no tag. Like the availability cache the
+    counters live in the worker: tags carry an ``epoch`` drawn at start-up,
+    so a tag from another worker or an earlier process never matches, and
+    roll over every ``ttl_seconds``, so writes made on other workers are
+    picked up.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.epoch = token_hex(4)
+        self._lock = Lock()
+        self._catalog = 0
+        self._rooms: Dict[int, int] = {}
+
+    def bump(self, room_id: Optional[int] = None) -> None:
+        """Count a write to the catalog, and to ``room_id`` when given."""
+        with self._lock:
+            self._catalog += 1
+            if room_id is not None:
+                self._rooms[room_id] = self._rooms.get(room_id, 0) + 1
+
+    def catalog_etag(self) -> str:
+        return self._etag("rooms", self._catalog)
+
+    def room_etag(self, room_id: int) -> str:
+        return self._etag(f"room-{room_id}", self._rooms.get(room_id, 0))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._catalog = 0
+            self._rooms.clear()
+
+    def flush(self) -> None:
+        """Change every tag, when writes may have been missed."""
+        with self._lock:
+            self.epoch = token_hex(4)
+
+    def _etag(self, name: str, version: int) -> str:
+        window = int(monotonic() // self.ttl_seconds)
+        return f'"{self.epoch}-{window}-{name}-{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header lists ``etag`` (weak comparison)."""
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
+
+
+versions = VersionCounters(ttl_seconds=settings.ETAG_TTL_SECONDS)
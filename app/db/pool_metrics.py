@@ -0,0 +1,107 @@
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+WAIT_TIME_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class _TimedCheckoutMixin:
+    """Reports how long each checkout waited for a pooled connection."""
+
+    wait_observer: Optional[Callable[[float], None]] = None
+
+    def _do_get(self):
+        started = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.wait_observer is not None:
+                self.wait_observer(perf_counter() - started)
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class PoolMetrics:
+    """Connection pool statistics fed by SQLAlchemy pool events.
+
+    Gauges (checked out, idle, overflow) are read from the pool itself, event
+    counters are updated by the listeners and the wait time histogram is fed
+    by the ``Timed*`` pool classes on every checkout.
+    """
+
+    def __init__(self, pool: QueuePool):
+        self.pool = pool
+        self._lock = Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self._wait_buckets = [0] * (len(WAIT_TIME_BUCKETS_MS) + 1)
+        self._wait_count = 0
+        self._wait_sum_ms = 0.0
+
+        if isinstance(pool, _TimedCheckoutMixin):
+            pool.wait_observer = self.observe_wait
+
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+        event.listen(pool, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checkins += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def observe_wait(self, seconds: float) -> None:
+        wait_ms = seconds * 1000
+        with self._lock:
+            self._wait_buckets[bisect_left(WAIT_TIME_BUCKETS_MS, wait_ms)] += 1
+            self._wait_count += 1
+            self._wait_sum_ms += wait_ms
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            buckets = {}
+            cumulative = 0
+            for bound, count in zip(WAIT_TIME_BUCKETS_MS, self._wait_buckets):
+                cumulative += count
+                buckets[f"le_{bound}ms"] = cumulative
+            buckets["le_inf"] = cumulative + self._wait_buckets[-1]
+
+            return {
+                "pool_size": self.pool.size(),
+                "checked_out": self.pool.checkedout(),
+                "idle": self.pool.checkedin(),
+                "overflow": max(self.pool.overflow(), 0),
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "wait_time": {
+                    "buckets": buckets,
+                    "count": self._wait_count,
+                    "sum_ms": round(self._wait_sum_ms, 3),
+                },
+            }
@@ -0,0 +1,112 @@
+from math import ceil
+from threading import Lock
+from time import monotonic, time
+from typing import Dict, Optional
+
+from fastapi import Cookie, Depends, Response
+
+from app.config.settings import settings
+from app.core.security import get_current_user, oauth2_scheme, token_username
+from app.db.settings import (
+    AsyncSessionLocal,
+    DBSession,
+    SessionLocal,
+    next_read_sessionmaker,
+    resolve,
+)
+from app.schemas.user import UserBase
+
+# Wall clock time of the client's last write, set on write responses.
+LAST_WRITE_COOKIE = "last_write_at"
+
+
+class RecentWrites:
+    """Remembers which users wrote recently, to pin their reads to the primary.
+
+    Replicas lag behind the primary, so a user who just booked a room must
+    keep reading from the primary for ``window_seconds`` to see the booking.
+    Only the worker that served the write knows about it, the
+    ``LAST_WRITE_COOKIE`` set by ``track_write`` carries it to the others.
+    """
+
+    def __init__(self, window_seconds: float, max_users: int = 10_000):
+        self.window_seconds = window_seconds
+        self.max_users = max_users
+        self._writes: Dict[str, float] = {}
+        self._lock = Lock()
+
+    def mark(self, username: str) -> None:
+        now = monotonic()
+        with self._lock:
+            if len(self._writes) >= self.max_users:
+                self._writes = {
+                    user: written_at
+                    for user, written_at in self._writes.items()
+                    if now - written_at < self.window_seconds
+                }
+            self._writes[username] = now
+
+    def is_recent(self, username: str) -> bool:
+        written_at = self._writes.get(username)
+        return written_at is not None and monotonic() - written_at < self.window_seconds
+
+
+recent_writes = RecentWrites(settings.DB_READ_YOUR_WRITES_SECONDS)
+
+
+def track_write(response: Response, username: str) -> None:
+    """Pin the user's reads to the primary after a write, on every worker."""
+    recent_writes.mark(username)
+    response.set_cookie(
+        LAST_WRITE_COOKIE,
+        str(time()),
+        max_age=ceil(settings.DB_READ_YOUR_WRITES_SECONDS),
+        httponly=True,
+        samesite="lax",
+    )
+
+
+def wrote_recently(last_write_at: Optional[str]) -> bool:
+    """Whether a ``LAST_WRITE_COOKIE`` value is within the read-your-writes window."""
+    try:
+        elapsed = time() - float(last_write_at)
+    except (TypeError, ValueError):
+        return False
+    return 0 <= elapsed < settings.DB_READ_YOUR_WRITES_SECONDS
+
+
+def read_sessionmaker(username: str, last_write_at: Optional[str] = None):
+    if wrote_recently(last_write_at) or recent_writes.is_recent(username):
+        return AsyncSessionLocal if settings.DB_ASYNC else SessionLocal
+    return next_read_sessionmaker()
+
+
+def get_read_sessionmaker(
+    token: str = Depends(oauth2_scheme),
+    last_write_at: Optional[str] = Cookie(None),
+):
+    """Session factory of ``get_read_db``, for streamed responses.
+
+    Dependencies are closed before a StreamingResponse body is sent, so
+    generators reading while they stream open their own session from it.
+    """
+    return read_sessionmaker(token_username(token), last_write_at)
+
+
+async def get_read_db(
+    token: str = Depends(oauth2_scheme),
+    last_write_at: Optional[str] = Cookie(None),
+):
+    db = read_sessionmaker(token_username(token), last_write_at)()
+    try:
+        yield db
+    finally:
+        await resolve(db.close())
+
+
+async def get_current_read_user(
+    token: str = Depends(oauth2_scheme), db: DBSession = Depends(get_read_db)
+) -> UserBase:
+    """``get_current_user`` reading the user from the session of ``get_read_db``,
+    so read-only routes don't query the primary."""
+    return await get_current_user(token, db)
@@ -1,15 +1,130 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from inspect import isawaitable
+from itertools import cycle
+from typing import Union
+
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.config.settings import settings
+from app.db.pool_metrics import (
+    PoolMetrics,
+    TimedAsyncAdaptedQueuePool,
+    TimedQueuePool,
+)
+
+engine_options = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
+engine = create_engine(
+    settings.DATABASE_URL, poolclass=TimedQueuePool, **engine_options
+)
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
+
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    poolclass=TimedAsyncAdaptedQueuePool,
+    **engine_options,
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+pool_metrics = {
+    "sync": PoolMetrics(engine.pool),
+    "async": PoolMetrics(async_engine.sync_engine.pool),
+}
+
+
+# Session.info of replica sessions, see ``reads_replica``.
+REPLICA_INFO = {"replica": True}
+
+
+def replica_sessionmaker(replica_url: str):
+    """Session factory of a read replica and its pool, following ``DB_ASYNC``."""
+    if settings.DB_ASYNC:
+        replica_engine = create_async_engine(
+            make_url(replica_url).set(drivername="postgresql+asyncpg"),
+            poolclass=TimedAsyncAdaptedQueuePool,
+            **engine_options,
+        )
+        return (
+            async_sessionmaker(
+                bind=replica_engine,
+                autoflush=False,
+                expire_on_commit=False,
+                info=REPLICA_INFO,
+            ),
+            replica_engine.sync_engine.pool,
+        )
+
+    replica_engine = create_engine(
+        replica_url, poolclass=TimedQueuePool, **engine_options
+    )
+    return (
+        sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False,
+            bind=replica_engine,
+            info=REPLICA_INFO,
+        ),
+        replica_engine.pool,
+    )
+
+
+replica_sessions = []
+for index, replica_url in enumerate(settings.DB_REPLICA_URLS):
+    replica_session, pool = replica_sessionmaker(replica_url)
+    replica_sessions.append(replica_session)
+    pool_metrics[f"replica_{index}"] = PoolMetrics(pool)
+
+_replica_cycle = cycle(replica_sessions)
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+DBSession = Union[Session, AsyncSession]
 
 
-def get_db():
+def reads_replica(db: DBSession) -> bool:
+    """Whether ``db`` reads a replica, which may lag behind the primary."""
+    return db.info.get("replica") is True
+
+
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+get_db = get_async_db if settings.DB_ASYNC else get_sync_db
+
+
+def next_read_sessionmaker():
+    """Round-robin over the replicas, falling back to the primary."""
+    if not replica_sessions:
+        return AsyncSessionLocal if settings.DB_ASYNC else SessionLocal
+    return next(_replica_cycle)
+
+
+async def resolve(result):
+    """Await session results coming from an AsyncSession.
+
+    Services are written once and run against both the sync ``Session`` and
+    the ``AsyncSession``, selected by ``settings.DB_ASYNC``.
+    """
+    if isawaitable(result):
+        return await result
+    return result
@@ -1,6 +1,7 @@
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, String
+from sqlalchemy import Computed, ForeignKey, Index, String, true
+from sqlalchemy.dialects.postgresql import TSRANGE, ExcludeConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models import Base
@@ -8,9 +9,30 @@ from app.models import Base
 
 class Reservation(Base):
     __tablename__ = "reservation"
+    __table_args__ = (
+        ExcludeConstraint(
+            ("room_id", "="),
+            ("period", "&&"),
+            name="reservation_room_period_excl",
+            using="gist",
+            where="exclusive",
+        ),
+        Index(
+            "ix_reservation_room_id_end_time",
+            "room_id",
+            "end_time",
+            postgresql_include=["start_time"],
+        ),
+        Index("ix_reservation_room_id_start_time_id", "room_id", "start_time", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_name: Mapped[str] = mapped_column(String(30))
     start_time: Mapped[datetime]
     end_time: Mapped[datetime]
     room_id: Mapped[int] = mapped_column(ForeignKey("room.id", ondelete="CASCADE"))
+    # Seat bookings share the room, only exclusive ones can't overlap.
+    exclusive: Mapped[bool] = mapped_column(server_default=true())
+    period = mapped_column(
+        TSRANGE, Computed("tsrange(start_time, end_time)"), deferred=True
+    )
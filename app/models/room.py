@@ -1,4 +1,4 @@
-from sqlalchemy import String, text
+from sqlalchemy import Index, String, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models import Base
@@ -6,6 +6,10 @@ from app.models import Base
 
 class Room(Base):
     __tablename__ = "room"
+    __table_args__ = (
+        Index("ix_room_location_capacity", "location", "capacity"),
+        Index("ix_room_capacity", "capacity"),
+    )
 
     id: Mapped[int] = mapped_column(
         primary_key=True,
@@ -16,3 +20,7 @@ class Room(Base):
     name: Mapped[str] = mapped_column(String(30))
     capacity: Mapped[int]
     location: Mapped[str] = mapped_column(String(100))
+    # Bumped on every update, stale writes fail under the optimistic strategy.
+    version: Mapped[int] = mapped_column(server_default="0")
+
+    __mapper_args__ = {"version_id_col": version}
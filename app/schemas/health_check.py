@@ -1,3 +1,5 @@
+from typing import Dict
+
 from pydantic import BaseModel
 
 
@@ -5,3 +7,45 @@ class HealthCheck(BaseModel):
     name: str
     version: str
     description: str
+
+
+class PoolWaitTime(BaseModel):
+    buckets: Dict[str, int]
+    count: int
+    sum_ms: float
+
+
+class PoolStats(BaseModel):
+    pool_size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    connects: int
+    checkouts: int
+    checkins: int
+    invalidations: int
+    wait_time: PoolWaitTime
+
+
+class PoolStatsResponse(BaseModel):
+    max_overflow: int
+    pools: Dict[str, PoolStats]
+
+
+class AvailabilityCacheStats(BaseModel):
+    size: int
+    max_entries: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+
+
+class RoomCatalogStats(BaseModel):
+    size: int
+    max_entries: int
+    complete: bool
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
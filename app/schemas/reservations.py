@@ -1,20 +1,166 @@
-from datetime import date, datetime
-from typing import List, Optional
+from datetime import date, datetime, timedelta
+from enum import Enum
+from itertools import count
+from typing import List, Optional, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
+RECURRENCE_MAX_OCCURRENCES = 366
+BULK_MAX_RESERVATIONS = 500
 
-class RerservationCreateRequest(BaseModel):
+
+class RecurrenceFrequency(str, Enum):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    WEEKDAYS = "weekdays"
+
+
+class RecurrenceRule(BaseModel):
+    """Repeat a reservation every ``interval`` days, weeks or weekdays.
+
+    Weekly rules repeat on the ``weekdays`` given (0 is Monday), by default
+    the weekday of the first reservation. Either ``until`` (inclusive) or
+    ``count`` bounds the series.
+    """
+
+    frequency: RecurrenceFrequency
+    interval: int = Field(1, ge=1)
+    weekdays: Optional[List[int]] = Field(None, min_length=1)
+    until: Optional[date] = None
+    count: Optional[int] = Field(None, ge=1, le=RECURRENCE_MAX_OCCURRENCES)
+
+    @model_validator(mode="after")
+    def check_rule(self) -> "RecurrenceRule":
+        if (self.until is None) == (self.count is None):
+            raise ValueError("exactly one of until and count is required")
+        if self.weekdays is not None:
+            if self.frequency != RecurrenceFrequency.WEEKLY:
+                raise ValueError("weekdays is only allowed with a weekly frequency")
+            if not all(0 <= weekday <= 6 for weekday in self.weekdays):
+                raise ValueError("weekdays must be between 0 (Monday) and 6")
+        return self
+
+    def dates(self, first: date) -> List[date]:
+        if self.frequency == RecurrenceFrequency.DAILY:
+            candidates = (
+                first + timedelta(days=day * self.interval) for day in count()
+            )
+        elif self.frequency == RecurrenceFrequency.WEEKDAYS:
+            candidates = _every_nth_weekday(first, self.interval)
+        else:
+            weekdays = sorted(set(self.weekdays or [first.weekday()]))
+            monday = first - timedelta(days=first.weekday())
+            candidates = (
+                monday + timedelta(weeks=week * self.interval, days=weekday)
+                for week in count()
+                for weekday in weekdays
+            )
+
+        dates = []
+        for day in candidates:
+            if day < first:
+                continue
+            if (self.until and day > self.until) or len(dates) == self.count:
+                break
+            if len(dates) == RECURRENCE_MAX_OCCURRENCES:
+                raise ValueError(
+                    f"recurrence can't exceed {RECURRENCE_MAX_OCCURRENCES} "
+                    "occurrences"
+                )
+            dates.append(day)
+        return dates
+
+
+def _every_nth_weekday(first: date, interval: int):
+    day, skipped = first, 0
+    while True:
+        if day.weekday() < 5:
+            if skipped % interval == 0:
+                yield day
+            skipped += 1
+        day += timedelta(days=1)
+
+
+class ReservationBase(BaseModel):
     room_id: int
     user_name: str
     start_time: datetime
     end_time: datetime
 
 
-class RerservationCreateResponse(RerservationCreateRequest):
+class RerservationCreateRequest(ReservationBase):
+    recurrence: Optional[RecurrenceRule] = None
+
+    @model_validator(mode="after")
+    def check_recurrence(self) -> "RerservationCreateRequest":
+        if self.recurrence is not None:
+            self.occurrences()
+        return self
+
+    def occurrences(self) -> List[Tuple[datetime, datetime]]:
+        """Start and end of every reservation of the series."""
+        if self.recurrence is None:
+            return [(self.start_time, self.end_time)]
+
+        first = self.start_time.date()
+        duration = self.end_time - self.start_time
+        return [
+            (start, start + duration)
+            for start in (
+                self.start_time + (day - first) for day in self.recurrence.dates(first)
+            )
+        ]
+
+
+class RerservationCreateResponse(ReservationBase):
     id: int
 
 
+class ReservationOccurrence(BaseModel):
+    start_time: datetime
+    end_time: datetime
+
+
+class RerservationRecurringResponse(BaseModel):
+    reservations: List[RerservationCreateResponse]
+    conflicts: List[ReservationOccurrence]
+
+
+class ReservationBulkMode(str, Enum):
+    ATOMIC = "atomic"
+    BEST_EFFORT = "best_effort"
+
+
+class ReservationExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class RerservationBulkRequest(BaseModel):
+    reservations: List[RerservationCreateRequest] = Field(
+        ..., min_length=1, max_length=BULK_MAX_RESERVATIONS
+    )
+    mode: ReservationBulkMode = ReservationBulkMode.ATOMIC
+
+    @model_validator(mode="after")
+    def check_no_recurrence(self) -> "RerservationBulkRequest":
+        if any(item.recurrence is not None for item in self.reservations):
+            raise ValueError("recurrence is not supported in bulk reservations")
+        return self
+
+
+class ReservationBulkResult(BaseModel):
+    index: int
+    reservation: Optional[RerservationCreateResponse] = None
+    error: Optional[str] = None
+
+
+class RerservationBulkResponse(BaseModel):
+    mode: ReservationBulkMode
+    booked: int
+    results: List[ReservationBulkResult]
+
+
 class RoomGetReservationsRequest(BaseModel):
     room_id: int
     date: Optional[date]
@@ -22,3 +168,4 @@ class RoomGetReservationsRequest(BaseModel):
 
 class ReservationGetAllResponse(BaseModel):
     reservations: List[RerservationCreateResponse]
+    next_cursor: Optional[str] = None
@@ -1,7 +1,7 @@
 from datetime import date, datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
 
 class Room(BaseModel):
@@ -16,6 +16,17 @@ class RoomGetResponse(Room):
 
 class RoomGetAllResponse(BaseModel):
     rooms: List[RoomGetResponse]
+    next_cursor: Optional[str] = None
+
+
+class RoomSearchResponse(RoomGetAllResponse):
+    ...
+
+
+class RoomSlot(BaseModel):
+    room_id: int
+    start_time: datetime
+    end_time: datetime
 
 
 class RoomCreateRequest(Room):
@@ -32,6 +43,46 @@ class RoomCheckAvailabilityRequest(BaseModel):
     end_time: datetime
 
 
+class RoomAvailabilityWindow(BaseModel):
+    room_id: int
+    start_time: datetime
+    end_time: datetime
+
+
+class RoomBatchAvailabilityRequest(BaseModel):
+    checks: List[RoomAvailabilityWindow] = Field(default=[], max_length=1000)
+    room_ids: List[int] = Field(default=[], max_length=1000)
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def check_room_window(self) -> "RoomBatchAvailabilityRequest":
+        if self.room_ids and (self.start_time is None or self.end_time is None):
+            raise ValueError("start_time and end_time are required with room_ids")
+        return self
+
+    def windows(self) -> List[RoomAvailabilityWindow]:
+        return self.checks + [
+            RoomAvailabilityWindow(
+                room_id=room_id, start_time=self.start_time, end_time=self.end_time
+            )
+            for room_id in self.room_ids
+        ]
+
+
+class RoomBatchAvailabilityResponse(BaseModel):
+    rooms: Dict[int, List[bool]]
+
+
+class RoomFreeBusyResponse(BaseModel):
+    start_time: datetime
+    granularity_minutes: int
+    slots: int
+    busy: Dict[int, str]
+    all_free: str
+    any_free: str
+
+
 class RoomBookRequest(RoomCheckAvailabilityRequest):
     ...
 
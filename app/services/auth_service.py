@@ -1,17 +1,20 @@
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
 
 from app.core import constants
 from app.core.logger import logger
 from app.core.security import create_access_token, hash_password, verify_password
-from app.db.settings import get_db
+from app.db.settings import DBSession, get_db, resolve
 from app.models.user import User
 from app.schemas.user import UserCreate
 
 
-def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user_data: UserCreate, db: DBSession = Depends(get_db)):
     try:
-        user = db.query(User).filter(User.username == user_data.username).first()
+        user = await resolve(
+            db.scalar(select(User).where(User.username == user_data.username))
+        )
         if user:
             logger.error(f"{constants.USER_ALREADY_EXISTS}: {user_data.username}.")
             raise HTTPException(
@@ -21,11 +24,12 @@ def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
 
         new_user = User(
             username=user_data.username,
-            hashed_password=hash_password(user_data.password),
+            # bcrypt takes a while, don't hold the event loop meanwhile.
+            hashed_password=await run_in_threadpool(hash_password, user_data.password),
         )
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await resolve(db.commit())
+        await resolve(db.refresh(new_user))
 
         token = create_access_token({"sub": new_user.username})
         logger.info(f"{constants.USER_REGISTERED_SUCCESSFULLY}: {new_user.username}.")
@@ -45,10 +49,14 @@ def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
         )
 
 
-def login_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def login_user(user_data: UserCreate, db: DBSession = Depends(get_db)):
     try:
-        user = db.query(User).filter(User.username == user_data.username).first()
-        if not user or not verify_password(user_data.password, user.hashed_password):
+        user = await resolve(
+            db.scalar(select(User).where(User.username == user_data.username))
+        )
+        if not user or not await run_in_threadpool(
+            verify_password, user_data.password, user.hashed_password
+        ):
             logger.error(
                 f"{constants.INVALID_CREDENTIALS} for user {user_data.username}."
             )
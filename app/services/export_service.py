@@ -0,0 +1,118 @@
+import csv
+import json
+from datetime import date, datetime
+from io import StringIO
+from typing import AsyncIterator, Callable, Optional, Sequence
+
+from sqlalchemy import Row, Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import constants
+from app.core.logger import logger
+from app.db.settings import DBSession, resolve
+from app.models.reservation import Reservation
+from app.schemas.reservations import ReservationExportFormat
+from app.services.reservation_service import reservation_window
+
+EXPORT_BATCH_SIZE = 1_000
+EXPORT_COLUMNS = ["id", "room_id", "user_name", "start_time", "end_time"]
+MEDIA_TYPES = {
+    ReservationExportFormat.NDJSON: "application/x-ndjson",
+    ReservationExportFormat.CSV: "text/csv",
+}
+
+
+def export_query(
+    room_id: Optional[int] = None,
+    user_name: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    day: Optional[date] = None,
+) -> Select:
+    """Reservations to export, overlapping the window when one is given.
+
+    Raises on invalid filters, so it's called before the response starts.
+    """
+    start_time, end_time = reservation_window(start_time, end_time, day)
+    query = select(
+        Reservation.id,
+        Reservation.room_id,
+        Reservation.user_name,
+        Reservation.start_time,
+        Reservation.end_time,
+    ).order_by(Reservation.start_time, Reservation.id)
+    if room_id is not None:
+        query = query.where(Reservation.room_id == room_id)
+    if user_name is not None:
+        query = query.where(Reservation.user_name == user_name)
+    if start_time is not None:
+        query = query.where(Reservation.end_time > start_time)
+    if end_time is not None:
+        query = query.where(Reservation.start_time < end_time)
+    return query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+
+def to_ndjson(rows: Sequence[Row]) -> str:
+    return "".join(
+        json.dumps(
+            {
+                "id": id,
+                "room_id": room_id,
+                "user_name": user_name,
+                "start_time": start_time.isoformat(),
+                "end_time": end_time.isoformat(),
+            }
+        )
+        + "\n"
+        for id, room_id, user_name, start_time, end_time in rows
+    )
+
+
+def to_csv(rows: Sequence[Row]) -> str:
+    buffer = StringIO()
+    csv.writer(buffer).writerows(
+        (id, room_id, user_name, start_time.isoformat(), end_time.isoformat())
+        for id, room_id, user_name, start_time, end_time in rows
+    )
+    return buffer.getvalue()
+
+
+async def export_reservations(
+    query: Select,
+    export_format: ReservationExportFormat,
+    session_factory: Callable[[], DBSession],
+) -> AsyncIterator[str]:
+    """Stream the rows of ``query`` encoded a batch at a time.
+
+    Rows come from a server-side cursor, ``EXPORT_BATCH_SIZE`` at a time, and
+    each batch is encoded and sent before the next one is fetched, so memory
+    use doesn't depend on the number of rows. The session is opened here
+    since the request's own is closed before the body is sent. An error
+    midway can't change the status anymore, it aborts the response instead.
+    """
+    if export_format == ReservationExportFormat.CSV:
+        encode = to_csv
+        yield ",".join(EXPORT_COLUMNS) + "\r\n"
+    else:
+        encode = to_ndjson
+
+    exported = 0
+    db = session_factory()
+    try:
+        if isinstance(db, AsyncSession):
+            result = await db.stream(query)
+            async for rows in result.partitions():
+                exported += len(rows)
+                yield encode(rows)
+        else:
+            for rows in db.execute(query).partitions():
+                exported += len(rows)
+                yield encode(rows)
+        logger.info(f"Exported {exported} reservations.")
+    except Exception as e:
+        logger.error(
+            f"{constants.ERROR_EXPORTING_RESERVATIONS} after {exported} rows: {str(e)}"
+        )
+        raise
+    finally:
+        await resolve(db.close())
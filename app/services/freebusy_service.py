@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import select
+
+from app.core import constants
+from app.core.interval_index import to_naive_utc
+from app.core.logger import logger
+from app.db.settings import DBSession, get_db, resolve
+from app.models.reservation import Reservation
+from app.schemas.rooms import RoomFreeBusyResponse
+
+FREEBUSY_MAX_SLOTS = 10_000
+_BITS = bytes.maketrans(b"\x00\x01", b"01")
+
+
+def busy_bitmap(
+    room_ids: Sequence[int],
+    reservations: Sequence[Tuple[int, datetime, datetime]],
+    start_time: datetime,
+    slot_count: int,
+    granularity: timedelta,
+) -> np.ndarray:
+    """Boolean ``rooms x slots`` array, True where a slot is (partly) booked.
+
+    Every reservation marks the slots from the one holding its start to the
+    one holding its end, through a difference array so all rooms are filled
+    with a single cumulative sum.
+    """
+    busy = np.zeros((len(room_ids), slot_count + 1), dtype=np.int32)
+    if reservations:
+        rows = {room_id: row for row, room_id in enumerate(room_ids)}
+        room_rows = np.fromiter(
+            (rows[room_id] for room_id, _, _ in reservations), dtype=np.int64
+        )
+        origin = np.datetime64(start_time, "us")
+        step = np.timedelta64(granularity, "us")
+        starts = np.array([start for _, start, _ in reservations], "datetime64[us]")
+        ends = np.array([end for _, _, end in reservations], "datetime64[us]")
+
+        first_slots = np.clip((starts - origin) // step, 0, slot_count)
+        last_slots = np.clip(-((origin - ends) // step), 0, slot_count)
+        np.add.at(busy, (room_rows, first_slots), 1)
+        np.add.at(busy, (room_rows, last_slots), -1)
+
+    return np.cumsum(busy[:, :slot_count], axis=1) > 0
+
+
+def to_bits(slots: np.ndarray) -> str:
+    """Encode a boolean slot row as a string of "0" and "1" characters."""
+    return slots.astype(np.uint8).tobytes().translate(_BITS).decode()
+
+
+async def get_freebusy(
+    room_ids: List[int],
+    start_time: datetime,
+    end_time: datetime,
+    granularity_minutes: int,
+    db: DBSession = Depends(get_db),
+) -> RoomFreeBusyResponse:
+    try:
+        start_time, end_time = to_naive_utc(start_time), to_naive_utc(end_time)
+        if start_time >= end_time:
+            logger.error(constants.INVALID_DATETIME)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=constants.INVALID_DATETIME,
+            )
+
+        granularity = timedelta(minutes=granularity_minutes)
+        slot_count = -((start_time - end_time) // granularity)
+        if slot_count > FREEBUSY_MAX_SLOTS:
+            logger.error(constants.FREEBUSY_TOO_MANY_SLOTS)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=constants.FREEBUSY_TOO_MANY_SLOTS,
+            )
+
+        room_ids = list(dict.fromkeys(room_ids))
+        reservations = (
+            await resolve(
+                db.execute(
+                    select(
+                        Reservation.room_id,
+                        Reservation.start_time,
+                        Reservation.end_time,
+                    ).where(
+                        Reservation.room_id.in_(room_ids),
+                        Reservation.start_time < end_time,
+                        Reservation.end_time > start_time,
+                    )
+                )
+            )
+        ).all()
+
+        busy = busy_bitmap(room_ids, reservations, start_time, slot_count, granularity)
+
+        logger.info(f"Got free/busy of {len(room_ids)} rooms in {slot_count} slots.")
+        return RoomFreeBusyResponse(
+            start_time=start_time,
+            granularity_minutes=granularity_minutes,
+            slots=slot_count,
+            busy={
+                room_id: to_bits(room_busy)
+                for room_id, room_busy in zip(room_ids, busy)
+            },
+            all_free=to_bits(~busy.any(axis=0)),
+            any_free=to_bits(~busy.all(axis=0)),
+        )
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        logger.error(f"{constants.ERROR_GETTING_FREEBUSY}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=constants.ERROR_GETTING_FREEBUSY,
+        )
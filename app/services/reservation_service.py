@@ -1,34 +1,66 @@
-from datetime import datetime, timezone
-from typing import Dict, Union
+from datetime import date, datetime, time, timedelta, timezone
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple, Union
 
 from fastapi import Depends, HTTPException, status
-from sqlalchemy import and_
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    BigInteger,
+    ColumnElement,
+    DateTime,
+    Integer,
+    Row,
+    and_,
+    column,
+    delete,
+    exists,
+    func,
+    literal,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.exc import StaleDataError
 
+from app.config.settings import settings
 from app.core import constants
+from app.core.availability_cache import availability_cache
+from app.core.interval_index import interval_index, to_naive_utc
+from app.core.invalidation_bus import notify_writes, returning_notify
 from app.core.logger import logger
-from app.db.settings import get_db
+from app.core.room_catalog import CachedRoom, room_catalog
+from app.core.versions import versions
+from app.db.settings import DBSession, get_db, resolve
 from app.models.reservation import Reservation as ReservationModel
 from app.models.room import Room
 from app.schemas.reservations import (
+    RerservationBulkRequest,
+    RerservationBulkResponse,
     RerservationCreateRequest,
     RerservationCreateResponse,
+    RerservationRecurringResponse,
+    ReservationBulkMode,
+    ReservationBulkResult,
+    ReservationOccurrence,
 )
 
+EXCLUSION_VIOLATION = "23P01"
+# Advisory lock class of room locks, keeps them apart from other lock users.
+ROOM_LOCK_NAMESPACE = 0x526F6F6D
+# Seat bookings lock the hours of a room they touch. Their keys are single
+# bigints, a key space apart from the (namespace, room id) pairs.
+SEAT_LOCK_PERIOD = timedelta(hours=1)
+
 
-def is_reservation_valid(
-    reservation_data: RerservationCreateRequest, db: Session = Depends(get_db)
+async def is_reservation_valid(
+    reservation_data: RerservationCreateRequest, db: DBSession = Depends(get_db)
 ) -> bool:
     try:
-        if reservation_data.start_time >= reservation_data.end_time:
-            logger.error(constants.INVALID_DATETIME)
-            raise HTTPException(status_code=400, detail=constants.INVALID_DATETIME)
+        check_reservation_times(reservation_data)
 
-        if reservation_data.start_time <= datetime.now(timezone.utc):
-            logger.error(constants.INVALID_DATETIME_NOW)
-            raise HTTPException(status_code=400, detail=constants.INVALID_DATETIME_NOW)
-
-        room = db.get(Room, reservation_data.room_id)
+        room = await lock_room(reservation_data.room_id, db)
         if not room:
             logger.error(constants.ROOM_DONT_EXISTS)
             raise HTTPException(status_code=400, detail=constants.ROOM_DONT_EXISTS)
@@ -37,14 +69,11 @@ def is_reservation_valid(
             logger.error(constants.ROOM_CAPACITY_FULL)
             raise HTTPException(status_code=400, detail=constants.ROOM_CAPACITY_FULL)
 
-        already_reserved = room_already_reserved_query(
-            reservation_data.start_time,
-            reservation_data.end_time,
-            reservation_data.room_id,
-            db,
-        )
+        # Recurring series report conflicting occurrences instead of failing.
+        if reservation_data.recurrence is not None:
+            return True
 
-        if already_reserved:
+        if await is_known_overlap(reservation_data, db):
             logger.error(constants.ROOM_ALREADY_RESERVERD)
             raise HTTPException(
                 status_code=400, detail=constants.ROOM_ALREADY_RESERVERD
@@ -63,31 +92,416 @@ def is_reservation_valid(
         )
 
 
+def check_reservation_times(reservation_data: RerservationCreateRequest) -> None:
+    start_time = to_naive_utc(reservation_data.start_time)
+    if start_time >= to_naive_utc(reservation_data.end_time):
+        logger.error(constants.INVALID_DATETIME)
+        raise HTTPException(status_code=400, detail=constants.INVALID_DATETIME)
+
+    if start_time <= to_naive_utc(datetime.now(timezone.utc)):
+        logger.error(constants.INVALID_DATETIME_NOW)
+        raise HTTPException(status_code=400, detail=constants.INVALID_DATETIME_NOW)
+
+
+def reservation_window(
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    day: Optional[date] = None,
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Naive UTC bounds of a listing filter, ``day`` narrowing it to one day."""
+    if start_time is not None:
+        start_time = to_naive_utc(start_time)
+    if end_time is not None:
+        end_time = to_naive_utc(end_time)
+    if day is not None:
+        day_start = datetime.combine(day, time())
+        day_end = day_start + timedelta(days=1)
+        start_time = max(start_time or day_start, day_start)
+        end_time = min(end_time or day_end, day_end)
+    if start_time and end_time and start_time >= end_time:
+        logger.error(constants.INVALID_DATETIME)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=constants.INVALID_DATETIME,
+        )
+    return start_time, end_time
+
+
+async def is_known_overlap(
+    reservation_data: RerservationCreateRequest,
+    db: DBSession = Depends(get_db),
+    load: bool = True,
+) -> bool:
+    """Whether the availability cache or the interval index know of an overlap.
+
+    Overlaps are rejected by the reservation_room_period_excl constraint when
+    the reservation is inserted, this only turns known conflicts away before
+    that round trip. Without ``load`` rooms missing from the interval index or
+    expired aren't loaded, so nothing is queried.
+    """
+    reserved = None
+    if settings.AVAILABILITY_CACHE_ENABLED:
+        reserved = availability_cache.get(
+            reservation_data.room_id,
+            reservation_data.start_time,
+            reservation_data.end_time,
+        )
+    if reserved is None and settings.INTERVAL_INDEX_ENABLED:
+        writes = availability_cache.writes(reservation_data.room_id)
+        if load:
+            reserved = await interval_index.overlaps(
+                reservation_data.room_id,
+                reservation_data.start_time,
+                reservation_data.end_time,
+                db,
+            )
+        else:
+            reserved = interval_index.loaded_overlaps(
+                reservation_data.room_id,
+                reservation_data.start_time,
+                reservation_data.end_time,
+            )
+        if reserved is not None and settings.AVAILABILITY_CACHE_ENABLED:
+            availability_cache.set(
+                reservation_data.room_id,
+                reservation_data.start_time,
+                reservation_data.end_time,
+                reserved,
+                writes,
+            )
+    return bool(reserved)
+
+
+async def book_reservation(
+    reservation_data: RerservationCreateRequest, db: DBSession = Depends(get_db)
+) -> RerservationCreateResponse:
+    """Validate and book a reservation in a single statement.
+
+    The room's capacity is decremented by an UPDATE that only matches when
+    the room exists, has capacity left and no reservation overlaps, and the
+    reservation is inserted from its RETURNING, so the checks, the capacity
+    update, the insert and the invalidation NOTIFY take one round trip plus
+    the commit. Why nothing was booked is only looked up when the statement
+    returns no row.
+    """
+    try:
+        check_reservation_times(reservation_data)
+        # Loading a cold room would cost a round trip the statement saves.
+        if await is_known_overlap(reservation_data, db, load=False):
+            logger.error(constants.ROOM_ALREADY_RESERVERD)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=constants.ROOM_ALREADY_RESERVERD,
+            )
+
+        room_id = reservation_data.room_id
+        start_time = to_naive_utc(reservation_data.start_time)
+        end_time = to_naive_utc(reservation_data.end_time)
+        # The overlap check has to be part of the UPDATE: data-modifying CTEs
+        # always run to completion, whatever the outer statement filters.
+        room = (
+            update(Room)
+            .where(
+                Room.id == room_id,
+                Room.capacity > 0,
+                ~exists().where(
+                    room_already_reserved_clause(start_time, end_time, room_id)
+                ),
+            )
+            .values(capacity=Room.capacity - 1, version=Room.version + 1)
+            .returning(Room.id)
+            .cte("booked_room")
+        )
+        try:
+            booked = (
+                await resolve(
+                    db.execute(
+                        returning_notify(
+                            insert(ReservationModel.__table__)
+                            .from_select(
+                                ["room_id", "user_name", "start_time", "end_time"],
+                                select(
+                                    room.c.id,
+                                    literal(reservation_data.user_name),
+                                    literal(start_time),
+                                    literal(end_time),
+                                ),
+                            )
+                            .returning(
+                                ReservationModel.id,
+                                ReservationModel.room_id,
+                                ReservationModel.user_name,
+                                ReservationModel.start_time,
+                                ReservationModel.end_time,
+                            ),
+                            [(room_id, start_time, end_time)],
+                        )
+                    )
+                )
+            ).first()
+            if booked is None:
+                capacity = await resolve(
+                    db.scalar(select(Room.capacity).where(Room.id == room_id))
+                )
+                await resolve(db.rollback())
+                detail = (
+                    constants.ROOM_DONT_EXISTS
+                    if capacity is None
+                    else (
+                        constants.ROOM_CAPACITY_FULL
+                        if not capacity
+                        else constants.ROOM_ALREADY_RESERVERD
+                    )
+                )
+                logger.error(detail)
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail=detail
+                )
+            await resolve(db.commit())
+        except IntegrityError as e:
+            await resolve(db.rollback())
+            if not is_overlap_violation(e):
+                raise
+            availability_cache.invalidate(room_id, start_time, end_time)
+            logger.error(constants.ROOM_ALREADY_RESERVERD)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=constants.ROOM_ALREADY_RESERVERD,
+            )
+
+        availability_cache.invalidate(room_id, start_time, end_time)
+        interval_index.add(room_id, start_time, end_time, booked.id)
+        track_room_write(room_id)
+        logger.info(constants.ROOM_RESERVED_SUCCESSFULLY)
+
+        return RerservationCreateResponse(**booked._mapping)
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        logger.error(f"{constants.ERROR_MAKING_RESERVATION}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=constants.ERROR_MAKING_RESERVATION,
+        )
+
+
+async def book_seat(
+    reservation_data: RerservationCreateRequest, db: DBSession = Depends(get_db)
+) -> RerservationCreateResponse:
+    """Book a seat of a room in seat mode, see ``insert_seat_reservations``."""
+    try:
+        check_reservation_times(reservation_data)
+
+        room_id = reservation_data.room_id
+        start_time = to_naive_utc(reservation_data.start_time)
+        end_time = to_naive_utc(reservation_data.end_time)
+        inserted = await insert_seat_reservations(
+            [
+                {
+                    "room_id": room_id,
+                    "user_name": reservation_data.user_name,
+                    "start_time": start_time,
+                    "end_time": end_time,
+                }
+            ],
+            db,
+        )
+        if not inserted:
+            room = await read_room(room_id, db)
+            await resolve(db.rollback())
+            detail = (
+                constants.ROOM_DONT_EXISTS
+                if room is None
+                else constants.ROOM_CAPACITY_FULL
+            )
+            logger.error(detail)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+        await notify_reservations(inserted, db)
+        await resolve(db.commit())
+
+        track_reservations(inserted)
+        logger.info(constants.ROOM_RESERVED_SUCCESSFULLY)
+
+        return RerservationCreateResponse(
+            id=inserted[0][0],
+            room_id=room_id,
+            user_name=reservation_data.user_name,
+            start_time=start_time,
+            end_time=end_time,
+        )
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        logger.error(f"{constants.ERROR_MAKING_RESERVATION}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=constants.ERROR_MAKING_RESERVATION,
+        )
+
+
 async def make_reservation(
-    reservation_data: RerservationCreateRequest, db: Session = Depends(get_db)
+    reservation_data: RerservationCreateRequest, db: DBSession = Depends(get_db)
 ) -> Union[RerservationCreateResponse, Dict[str, str]]:
     try:
-        new_reservation = ReservationModel(**reservation_data.model_dump())
+        attempts = lock_attempts()
+        for attempt in range(attempts):
+            new_reservation = ReservationModel(
+                **reservation_data.model_dump(
+                    exclude={"recurrence", "start_time", "end_time"}
+                ),
+                start_time=to_naive_utc(reservation_data.start_time),
+                end_time=to_naive_utc(reservation_data.end_time),
+            )
+
+            room = await lock_room(reservation_data.room_id, db)
+
+            if not room:
+                logger.error(constants.ROOM_DONT_EXISTS)
+                return {"error": constants.ROOM_DONT_EXISTS}
+            if not room.capacity:
+                logger.error(constants.ROOM_CAPACITY_FULL)
+                return {"error": constants.ROOM_CAPACITY_FULL}
+
+            room.capacity -= 1
+
+            db.add(new_reservation)
+            try:
+                await notify_writes(
+                    [
+                        (
+                            new_reservation.room_id,
+                            new_reservation.start_time,
+                            new_reservation.end_time,
+                        )
+                    ],
+                    db,
+                )
+                await resolve(db.commit())
+                break
+            except StaleDataError:
+                await resolve(db.rollback())
+                check_lock_attempt(attempt, attempts)
+            except IntegrityError as e:
+                await resolve(db.rollback())
+                if not is_overlap_violation(e):
+                    raise
+                availability_cache.invalidate(
+                    reservation_data.room_id,
+                    reservation_data.start_time,
+                    reservation_data.end_time,
+                )
+                logger.error(constants.ROOM_ALREADY_RESERVERD)
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=constants.ROOM_ALREADY_RESERVERD,
+                )
+
+        availability_cache.invalidate(
+            new_reservation.room_id,
+            new_reservation.start_time,
+            new_reservation.end_time,
+        )
+        interval_index.add(
+            new_reservation.room_id,
+            new_reservation.start_time,
+            new_reservation.end_time,
+            new_reservation.id,
+        )
+        track_room_write(new_reservation.room_id)
+        logger.info(constants.ROOM_RESERVED_SUCCESSFULLY)
+
+        return RerservationCreateResponse(**new_reservation.__dict__)
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        logger.error(f"{constants.ERROR_MAKING_RESERVATION}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=constants.ERROR_MAKING_RESERVATION,
+        )
+
 
-        room = db.get(Room, reservation_data.room_id)
+async def make_recurring_reservation(
+    reservation_data: RerservationCreateRequest, db: DBSession = Depends(get_db)
+) -> RerservationRecurringResponse:
+    """Book every occurrence of a series that doesn't conflict.
 
+    All occurrences go in one multi-row INSERT ... ON CONFLICT DO NOTHING,
+    so the reservation_room_period_excl constraint skips the ones overlapping
+    an existing reservation (or each other) in the same statement that books
+    the rest, and the skipped ones are reported as conflicts. In seat mode
+    the conflicts are the occurrences finding the room full.
+    """
+    try:
+        seats = settings.BOOKING_MODE == "seat"
+        occurrences = [
+            (to_naive_utc(start), to_naive_utc(end))
+            for start, end in reservation_data.occurrences()
+        ]
+
+        room = await lock_room(reservation_data.room_id, db)
         if not room:
             logger.error(constants.ROOM_DONT_EXISTS)
-            return {"error": constants.ROOM_DONT_EXISTS}
-        if not room.capacity:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=constants.ROOM_DONT_EXISTS,
+            )
+        if not seats and room.capacity < len(occurrences):
             logger.error(constants.ROOM_CAPACITY_FULL)
-            return {"error": constants.ROOM_CAPACITY_FULL}
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=constants.ROOM_CAPACITY_FULL,
+            )
 
-        room.capacity -= 1
+        inserted = await (insert_seat_reservations if seats else insert_reservations)(
+            [
+                {
+                    "room_id": reservation_data.room_id,
+                    "user_name": reservation_data.user_name,
+                    "start_time": start_time,
+                    "end_time": end_time,
+                }
+                for start_time, end_time in occurrences
+            ],
+            db,
+        )
 
-        db.add(new_reservation)
-        db.commit()
-        db.refresh(new_reservation)
+        if not seats:
+            room.capacity -= len(inserted)
+        try:
+            await notify_reservations(inserted, db)
+            await resolve(db.commit())
+        except StaleDataError:
+            await resolve(db.rollback())
+            check_lock_attempt(0, 1)
 
-        logger.info(constants.ROOM_RESERVED_SUCCESSFULLY)
+        booked = {(start_time, end_time) for _, _, start_time, end_time in inserted}
+        track_reservations(inserted)
 
-        return RerservationCreateResponse(**new_reservation.__dict__)
+        logger.info(
+            f"Booked {len(inserted)} of {len(occurrences)} occurrences "
+            f"in room {room.id}."
+        )
+        return RerservationRecurringResponse(
+            reservations=[
+                RerservationCreateResponse(
+                    id=id,
+                    room_id=room.id,
+                    user_name=reservation_data.user_name,
+                    start_time=start_time,
+                    end_time=end_time,
+                )
+                for id, _, start_time, end_time in sorted(inserted, key=itemgetter(2))
+            ],
+            conflicts=[
+                ReservationOccurrence(start_time=start_time, end_time=end_time)
+                for start_time, end_time in occurrences
+                if (start_time, end_time) not in booked
+            ],
+        )
     except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
         logger.error(f"{constants.ERROR_MAKING_RESERVATION}: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -95,11 +509,339 @@ async def make_reservation(
         )
 
 
+async def make_bulk_reservation(
+    bulk_data: RerservationBulkRequest, db: DBSession = Depends(get_db)
+) -> RerservationBulkResponse:
+    """Validate and book a list of reservations with a single commit.
+
+    Rooms are loaded in one query, then all valid reservations are inserted
+    by one statement that skips the ones overlapping existing bookings or an
+    earlier item of the request. In atomic mode any failure rolls the whole
+    request back, so capacities are checked in memory before inserting. In
+    best effort mode the rest is booked and capacity is only charged for the
+    rows inserted, see ``within_capacity``. Every item gets its reservation
+    or error back. In seat mode capacities are left to
+    ``insert_seat_reservations``.
+    """
+    try:
+        seats = settings.BOOKING_MODE == "seat"
+        items = bulk_data.reservations
+        atomic = bulk_data.mode == ReservationBulkMode.ATOMIC
+        results = [ReservationBulkResult(index=index) for index in range(len(items))]
+        windows = [
+            (to_naive_utc(item.start_time), to_naive_utc(item.end_time))
+            for item in items
+        ]
+
+        now = to_naive_utc(datetime.now(timezone.utc))
+        for result, (start_time, end_time) in zip(results, windows):
+            if start_time >= end_time:
+                result.error = constants.INVALID_DATETIME
+            elif start_time <= now:
+                result.error = constants.INVALID_DATETIME_NOW
+
+        rooms = await lock_rooms([item.room_id for item in items], db)
+        capacities = {room_id: room.capacity for room_id, room in rooms.items()}
+
+        candidates = []
+        for result, item in zip(results, items):
+            if result.error:
+                continue
+            if item.room_id not in rooms:
+                result.error = constants.ROOM_DONT_EXISTS
+            elif seats:
+                candidates.append(result.index)
+            elif capacities[item.room_id] <= 0:
+                result.error = constants.ROOM_CAPACITY_FULL
+            else:
+                if atomic:
+                    capacities[item.room_id] -= 1
+                candidates.append(result.index)
+
+        inserted: List[Row] = []
+        full: List[Row] = []
+        attempted = candidates and not (atomic and len(candidates) < len(items))
+        if attempted:
+            inserted = await (
+                insert_seat_reservations if seats else insert_reservations
+            )(
+                [
+                    {
+                        "room_id": items[index].room_id,
+                        "user_name": items[index].user_name,
+                        "start_time": windows[index][0],
+                        "end_time": windows[index][1],
+                    }
+                    for index in candidates
+                ],
+                db,
+            )
+            if not (seats or atomic):
+                inserted, full = within_capacity(inserted, capacities)
+                if full:
+                    await delete_reservations([row[0] for row in full], db)
+
+        # Seat bookings of the same window are only told apart by their ids.
+        booked: Dict[tuple, List[int]] = {}
+        for id, room_id, start_time, end_time in inserted:
+            booked.setdefault((room_id, start_time, end_time), []).append(id)
+        full_windows = {tuple(row[1:]) for row in full}
+        for index in candidates:
+            key = (items[index].room_id, *windows[index])
+            ids = booked.get(key)
+            id = ids.pop(0) if ids else None
+            if id is None:
+                results[index].error = (
+                    (
+                        constants.ROOM_CAPACITY_FULL
+                        if seats or key in full_windows
+                        else constants.ROOM_ALREADY_RESERVERD
+                    )
+                    if attempted
+                    else constants.BULK_RESERVATION_ABORTED
+                )
+            else:
+                results[index].reservation = RerservationCreateResponse(
+                    id=id,
+                    room_id=items[index].room_id,
+                    user_name=items[index].user_name,
+                    start_time=windows[index][0],
+                    end_time=windows[index][1],
+                )
+
+        if atomic and len(inserted) < len(items):
+            if inserted:
+                await resolve(db.rollback())
+            for result in results:
+                result.reservation = None
+                result.error = result.error or constants.BULK_RESERVATION_ABORTED
+            inserted = []
+        elif inserted:
+            if not seats:
+                for _, room_id, _, _ in inserted:
+                    rooms[room_id].capacity -= 1
+            try:
+                await notify_reservations(inserted, db)
+                await resolve(db.commit())
+            except StaleDataError:
+                await resolve(db.rollback())
+                check_lock_attempt(0, 1)
+            track_reservations(inserted)
+
+        logger.info(f"Booked {len(inserted)} of {len(items)} bulk reservations.")
+        return RerservationBulkResponse(
+            mode=bulk_data.mode, booked=len(inserted), results=results
+        )
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        logger.error(f"{constants.ERROR_MAKING_BULK_RESERVATION}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=constants.ERROR_MAKING_BULK_RESERVATION,
+        )
+
+
+def within_capacity(
+    inserted: List[Row], capacities: Dict[int, int]
+) -> Tuple[List[Row], List[Row]]:
+    """Split inserted rows into the ones fitting their room's capacity and the rest.
+
+    Only the rows the insert returned are charged, in insertion order, so an
+    item dropped by a conflict never takes the capacity of a later one.
+    """
+    left = dict(capacities)
+    kept, full = [], []
+    for row in sorted(inserted, key=itemgetter(0)):
+        if left[row[1]] > 0:
+            left[row[1]] -= 1
+            kept.append(row)
+        else:
+            full.append(row)
+    return kept, full
+
+
+async def delete_reservations(ids: List[int], db: DBSession = Depends(get_db)) -> None:
+    """Delete reservations inserted in the current transaction by id."""
+    table = ReservationModel.__table__
+    await resolve(db.execute(delete(table).where(table.c.id.in_(ids))))
+
+
+async def insert_reservations(
+    rows: List[Dict], db: DBSession = Depends(get_db)
+) -> List[Row]:
+    """Insert reservations in one statement, skipping overlapping ones.
+
+    ON CONFLICT DO NOTHING makes the reservation_room_period_excl constraint
+    drop rows overlapping an existing reservation or an earlier row instead
+    of failing the statement. Returns (id, room_id, start_time, end_time) of
+    the rows inserted.
+    """
+    return (
+        await resolve(
+            db.execute(
+                insert(ReservationModel)
+                .values(rows)
+                .on_conflict_do_nothing()
+                .returning(
+                    ReservationModel.id,
+                    ReservationModel.room_id,
+                    ReservationModel.start_time,
+                    ReservationModel.end_time,
+                )
+            )
+        )
+    ).all()
+
+
+async def insert_seat_reservations(
+    rows: List[Dict], db: DBSession = Depends(get_db)
+) -> List[Row]:
+    """Insert seat reservations, skipping the ones finding their room full.
+
+    A room's occupancy over a window is the most reservations overlapping at
+    once within it, see ``room_occupancy``, and a row is inserted while that
+    plus the peak of the rows inserted before it in the same call stays below
+    the room's capacity. Adding both peaks may overcount, never undercount.
+    The occupancies of all rows take one query. Bookings are serialized by
+    advisory locks on the hours of the room they touch, held until the
+    transaction ends, so overlapping windows wait on each other while
+    disjoint windows of the same room are booked concurrently. The room row
+    itself is only read. Returns (id, room_id, start_time, end_time) of the
+    rows inserted, like ``insert_reservations``.
+    """
+    await lock_seats(rows, db)
+
+    windows = values(
+        column("position", Integer),
+        column("room_id", Integer),
+        column("start_time", DateTime),
+        column("end_time", DateTime),
+        name="windows",
+    ).data(
+        [
+            (position, row["room_id"], row["start_time"], row["end_time"])
+            for position, row in enumerate(rows)
+        ]
+    )
+    free_seats = dict(
+        (
+            await resolve(
+                db.execute(
+                    select(
+                        windows.c.position,
+                        Room.capacity
+                        - room_occupancy(
+                            windows.c.start_time, windows.c.end_time, windows.c.room_id
+                        ),
+                    ).join(Room, Room.id == windows.c.room_id)
+                )
+            )
+        ).all()
+    )
+
+    accepted: List[Dict] = []
+    for position, row in enumerate(rows):
+        taken = peak_occupancy(
+            [
+                (other["start_time"], other["end_time"])
+                for other in accepted
+                if other["room_id"] == row["room_id"]
+            ],
+            row["start_time"],
+            row["end_time"],
+        )
+        if free_seats.get(position, 0) > taken:
+            accepted.append(row)
+    if not accepted:
+        return []
+
+    return (
+        await resolve(
+            db.execute(
+                insert(ReservationModel)
+                .values([{**row, "exclusive": False} for row in accepted])
+                .returning(
+                    ReservationModel.id,
+                    ReservationModel.room_id,
+                    ReservationModel.start_time,
+                    ReservationModel.end_time,
+                )
+            )
+        )
+    ).all()
+
+
+def peak_occupancy(
+    windows: List[Tuple[datetime, datetime]], start_time: datetime, end_time: datetime
+) -> int:
+    """Most of ``windows`` overlapping at once within ``[start_time, end_time)``."""
+    events = []
+    for reserved_from, reserved_until in windows:
+        if reserved_from < end_time and reserved_until > start_time:
+            events.append((max(reserved_from, start_time), 1))
+            events.append((reserved_until, -1))
+    peak = taken = 0
+    # Ends sort before starts at the same time, back to back windows don't overlap.
+    for _, change in sorted(events):
+        taken += change
+        peak = max(peak, taken)
+    return peak
+
+
+def seat_lock_keys(rows: List[Dict]) -> List[int]:
+    """Sorted advisory lock keys of every room hour the rows touch."""
+    keys = set()
+    for row in rows:
+        start_time = to_naive_utc(row["start_time"])
+        end_time = to_naive_utc(row["end_time"])
+        first = (start_time - datetime.min) // SEAT_LOCK_PERIOD
+        last = (end_time - timedelta.resolution - datetime.min) // SEAT_LOCK_PERIOD
+        keys.update(row["room_id"] << 32 | hour for hour in range(first, last + 1))
+    return sorted(keys)
+
+
+async def lock_seats(rows: List[Dict], db: DBSession = Depends(get_db)) -> None:
+    """Take the seat locks of ``rows`` in one statement, in key order."""
+    keys = values(column("key", BigInteger), name="seat_locks").data(
+        [(key,) for key in seat_lock_keys(rows)]
+    )
+    await resolve(db.execute(select(func.pg_advisory_xact_lock(keys.c.key))))
+
+
+def track_room_write(room_id: int) -> None:
+    """Bump the room's version and drop its cached capacity, written in room mode."""
+    versions.bump(room_id)
+    if settings.BOOKING_MODE == "room":
+        room_catalog.invalidate(room_id)
+
+
+async def notify_reservations(
+    inserted: List[Row], db: DBSession = Depends(get_db)
+) -> None:
+    await notify_writes(
+        [
+            (room_id, start_time, end_time)
+            for _, room_id, start_time, end_time in inserted
+        ],
+        db,
+    )
+
+
+def track_reservations(inserted: List[Row]) -> None:
+    for id, room_id, start_time, end_time in inserted:
+        availability_cache.invalidate(room_id, start_time, end_time)
+        track_room_write(room_id)
+        # Seat bookings overlap, the index only serves exclusive ones.
+        if settings.BOOKING_MODE == "room":
+            interval_index.add(room_id, start_time, end_time, id)
+
+
 async def cancel_reservation(
-    reservation_id: int, username: str, db: Session = Depends(get_db)
+    reservation_id: int, username: str, db: DBSession = Depends(get_db)
 ) -> Dict[str, str]:
     try:
-        reservation = db.get(ReservationModel, reservation_id)
+        reservation = await resolve(db.get(ReservationModel, reservation_id))
 
         if not reservation:
             return {"message": constants.RESERVATION_NOT_FOUND}
@@ -110,10 +852,53 @@ async def cancel_reservation(
                 detail=constants.NOT_AUTHORIZED_TO_CANCEL_RESERVATION,
             )
 
-        room = db.get(Room, reservation.room_id)
-        room.capacity += 1
-        db.delete(reservation)
-        db.commit()
+        # Retries roll back, which expires the reservation, and lazy loading
+        # its attributes again fails on an AsyncSession.
+        room_id, start_time, end_time = (
+            reservation.room_id,
+            reservation.start_time,
+            reservation.end_time,
+        )
+        written = [(room_id, start_time, end_time)]
+        if settings.BOOKING_MODE == "seat":
+            await resolve(db.delete(reservation))
+            await notify_writes(written, db)
+            await resolve(db.commit())
+        elif settings.BOOKING_LOCK_STRATEGY == "atomic":
+            await resolve(
+                db.execute(
+                    returning_notify(
+                        update(Room.__table__)
+                        .where(Room.id == room_id)
+                        .values(capacity=Room.capacity + 1, version=Room.version + 1),
+                        written,
+                    )
+                )
+            )
+            await resolve(db.delete(reservation))
+            await resolve(db.commit())
+        else:
+            attempts = lock_attempts()
+            for attempt in range(attempts):
+                if attempt:
+                    reservation = await resolve(
+                        db.get(ReservationModel, reservation_id)
+                    )
+                    if not reservation:
+                        return {"message": constants.RESERVATION_NOT_FOUND}
+                room = await lock_room(room_id, db)
+                room.capacity += 1
+                await resolve(db.delete(reservation))
+                try:
+                    await notify_writes(written, db)
+                    await resolve(db.commit())
+                    break
+                except StaleDataError:
+                    await resolve(db.rollback())
+                    check_lock_attempt(attempt, attempts)
+        availability_cache.invalidate(room_id, start_time, end_time)
+        interval_index.remove(room_id, reservation_id)
+        track_room_write(room_id)
 
         logger.info(constants.RESERVATION_CANCELLED_SUCCESSFULLY)
         return {"message": constants.RESERVATION_CANCELLED_SUCCESSFULLY}
@@ -129,20 +914,186 @@ async def cancel_reservation(
         )
 
 
-def room_already_reserved_query(
+async def lock_room(
+    room_id: int, db: DBSession = Depends(get_db)
+) -> Optional[Union[Room, CachedRoom]]:
+    """Load a room to update its capacity under BOOKING_LOCK_STRATEGY.
+
+    for_update locks the row, advisory takes a transaction advisory lock on
+    the room id first, optimistic counts on the version column checked when
+    the update is flushed. The row is always read again so a copy loaded
+    earlier in the session doesn't hide concurrent writes. In seat mode rooms
+    are only read, see ``read_room``.
+    """
+    strategy = lock_strategy()
+    if strategy is None:
+        return await read_room(room_id, db)
+    if strategy == "advisory":
+        await lock_advisory([room_id], db)
+    return await resolve(
+        db.get(
+            Room,
+            room_id,
+            populate_existing=True,
+            with_for_update=strategy == "for_update",
+        )
+    )
+
+
+async def lock_rooms(
+    room_ids: List[int], db: DBSession = Depends(get_db)
+) -> Dict[int, Union[Room, CachedRoom]]:
+    """``lock_room`` for many rooms, locked in id order to avoid deadlocks."""
+    strategy = lock_strategy()
+    if strategy is None and settings.ROOM_CATALOG_ENABLED:
+        return await room_catalog.get_many(room_ids, db)
+    if strategy == "advisory":
+        await lock_advisory(room_ids, db)
+    query = (
+        select(Room)
+        .where(Room.id.in_(set(room_ids)))
+        .order_by(Room.id)
+        .execution_options(populate_existing=True)
+    )
+    if strategy == "for_update":
+        query = query.with_for_update()
+    return {room.id: room for room in (await resolve(db.scalars(query))).all()}
+
+
+async def read_room(
+    room_id: int, db: DBSession = Depends(get_db)
+) -> Optional[Union[Room, CachedRoom]]:
+    """A room that is only read, from the room catalog when it is enabled."""
+    if settings.ROOM_CATALOG_ENABLED:
+        return await room_catalog.get(room_id, db)
+    return await resolve(db.get(Room, room_id, populate_existing=True))
+
+
+async def lock_advisory(room_ids: List[int], db: DBSession = Depends(get_db)) -> None:
+    for room_id in sorted(set(room_ids)):
+        await resolve(
+            db.execute(select(func.pg_advisory_xact_lock(ROOM_LOCK_NAMESPACE, room_id)))
+        )
+
+
+def lock_strategy() -> Optional[str]:
+    """BOOKING_LOCK_STRATEGY, None in seat mode where rooms are only read."""
+    if settings.BOOKING_MODE == "seat":
+        return None
+    return settings.BOOKING_LOCK_STRATEGY
+
+
+def lock_attempts() -> int:
+    if settings.BOOKING_LOCK_STRATEGY == "optimistic":
+        return settings.BOOKING_OPTIMISTIC_RETRIES + 1
+    return 1
+
+
+def check_lock_attempt(attempt: int, attempts: int) -> None:
+    """Raise a 409 once rooms changed under every attempt to update them."""
+    if attempt + 1 >= attempts:
+        logger.error(constants.ROOM_UPDATED_CONCURRENTLY)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=constants.ROOM_UPDATED_CONCURRENTLY,
+        )
+    logger.info("Room changed concurrently, retrying.")
+
+
+def is_overlap_violation(error: IntegrityError) -> bool:
+    return getattr(error.orig, "pgcode", None) == EXCLUSION_VIOLATION
+
+
+def room_already_reserved_clause(start_time, end_time, room_id) -> ColumnElement:
+    """Reservations of ``room_id`` overlapping ``[start_time, end_time)``.
+
+    Arguments can be values or columns, so the same predicate is used for a
+    single window and correlated against a set of windows.
+    """
+    return and_(
+        start_time < ReservationModel.end_time,
+        end_time > ReservationModel.start_time,
+        ReservationModel.room_id == room_id,
+    )
+
+
+def room_occupancy(start_time, end_time, room_id) -> ColumnElement:
+    """Most reservations of ``room_id`` overlapping at once within the window.
+
+    The count only rises when a reservation starts, so the peak is at the
+    window start or at the start of an overlapping reservation, where the
+    reservations running are counted.
+    """
+    overlapping = aliased(ReservationModel)
+    running = aliased(ReservationModel)
+    at = func.greatest(overlapping.start_time, start_time)
+    taken = (
+        select(func.count())
+        .where(
+            running.room_id == room_id,
+            running.start_time <= at,
+            running.end_time > at,
+        )
+        .correlate_except(running)
+        .scalar_subquery()
+    )
+    return (
+        select(func.coalesce(func.max(taken), 0))
+        .where(
+            overlapping.room_id == room_id,
+            overlapping.start_time < end_time,
+            overlapping.end_time > start_time,
+        )
+        .scalar_subquery()
+    )
+
+
+def room_unavailable_clause(start_time, end_time, room_id, capacity) -> ColumnElement:
+    """Whether ``room_id`` can't be booked in ``[start_time, end_time)``.
+
+    That's any overlapping reservation in room mode, and the reservations
+    running at once reaching ``capacity`` in seat mode.
+    """
+    if settings.BOOKING_MODE == "seat":
+        return room_occupancy(start_time, end_time, room_id) >= capacity
+    return exists().where(room_already_reserved_clause(start_time, end_time, room_id))
+
+
+async def room_already_reserved_query(
     start_time: datetime,
     end_time: datetime,
     room_id: int,
-    db: Session = Depends(get_db),
-):
-    return (
-        db.query(ReservationModel)
-        .filter(
-            and_(
-                start_time < ReservationModel.end_time,
-                end_time > ReservationModel.start_time,
-            ),
-            ReservationModel.room_id == room_id,
+    db: DBSession = Depends(get_db),
+) -> Optional[ReservationModel]:
+    return await resolve(
+        db.scalar(
+            select(ReservationModel)
+            .where(room_already_reserved_clause(start_time, end_time, room_id))
+            .limit(1)
+        )
+    )
+
+
+async def room_full_query(
+    start_time: datetime,
+    end_time: datetime,
+    room_id: int,
+    db: DBSession = Depends(get_db),
+) -> bool:
+    """Whether every seat of ``room_id`` is taken at once in the window."""
+    return bool(
+        await resolve(
+            db.scalar(
+                select(
+                    room_unavailable_clause(
+                        start_time,
+                        end_time,
+                        room_id,
+                        select(Room.capacity)
+                        .where(Room.id == room_id)
+                        .scalar_subquery(),
+                    )
+                )
+            )
         )
-        .first()
     )
@@ -1,23 +1,44 @@
+from bisect import bisect_right
+from datetime import date, datetime
+from operator import attrgetter
+from typing import List, Optional, Sequence, Tuple
+
+import orjson
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import DateTime, Integer, Row, Select, column, select, tuple_, values
 
+from app.config.settings import settings
 from app.core import constants
+from app.core.availability_cache import availability_cache
+from app.core.interval_index import interval_index, to_naive_utc
+from app.core.invalidation_bus import notify_writes
 from app.core.logger import logger
-from app.db.settings import get_db
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.room_catalog import CachedRoom, room_catalog
+from app.core.versions import versions
+from app.db.settings import DBSession, get_db, reads_replica, resolve
 from app.models.reservation import Reservation
 from app.models.room import Room as RoomModel
 from app.schemas.reservations import ReservationGetAllResponse
 from app.schemas.rooms import (
+    RoomBatchAvailabilityRequest,
+    RoomBatchAvailabilityResponse,
     RoomCheckAvailabilityRequest,
     RoomCreateRequest,
     RoomCreateResponse,
     RoomGetAllResponse,
+    RoomSearchResponse,
+)
+from app.services.reservation_service import (
+    reservation_window,
+    room_already_reserved_query,
+    room_full_query,
+    room_unavailable_clause,
 )
-from app.services.reservation_service import room_already_reserved_query
 
 
 async def create_room(
-    room_data: RoomCreateRequest, db: Session = Depends(get_db)
+    room_data: RoomCreateRequest, db: DBSession = Depends(get_db)
 ) -> RoomCreateResponse:
     try:
         if room_data.capacity < 1:
@@ -31,8 +52,17 @@ async def create_room(
         new_room = RoomModel(**room_data.model_dump())
 
         db.add(new_room)
-        db.commit()
-        db.refresh(new_room)
+        await resolve(db.flush())
+        await notify_writes([(new_room.id, None, None)], db)
+        await resolve(db.commit())
+        await resolve(db.refresh(new_room))
+        versions.bump()
+        if settings.ROOM_CATALOG_ENABLED:
+            room_catalog.add(
+                CachedRoom(
+                    new_room.id, new_room.name, new_room.capacity, new_room.location
+                )
+            )
 
         logger.info(f"{constants.ROOM_CREATED_SUCCESSFULLY}: {new_room.name}.")
 
@@ -47,11 +77,140 @@ async def create_room(
         )
 
 
+ROOM_COLUMNS = (RoomModel.id, RoomModel.name, RoomModel.capacity, RoomModel.location)
+RESERVATION_COLUMNS = (
+    Reservation.id,
+    Reservation.room_id,
+    Reservation.user_name,
+    Reservation.start_time,
+    Reservation.end_time,
+)
+
+
+def rooms_page_query(
+    limit: int, offset: int, cursor: Optional[str], *columns
+) -> Select:
+    """``limit + 1`` rooms ordered by id, the extra one tells a next page exists."""
+    query = select(*columns).order_by(RoomModel.id).limit(limit + 1)
+    if cursor is not None:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.where(RoomModel.id > last_id)
+    elif offset:
+        query = query.offset(offset)
+    return query
+
+
+def reservations_page_query(
+    room_id: int,
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    *columns,
+) -> Select:
+    """``limit + 1`` reservations of a room ordered by (start_time, id)."""
+    query = (
+        select(*columns)
+        .where(Reservation.room_id == room_id)
+        .order_by(Reservation.start_time, Reservation.id)
+        .limit(limit + 1)
+    )
+    if start_time is not None:
+        query = query.where(Reservation.end_time > start_time)
+    if end_time is not None:
+        query = query.where(Reservation.start_time < end_time)
+    if cursor is not None:
+        last_start_time, last_id = decode_cursor(cursor, datetime, int)
+        last_start_time = to_naive_utc(last_start_time)
+        query = query.where(
+            tuple_(Reservation.start_time, Reservation.id)
+            > tuple_(last_start_time, last_id)
+        )
+    elif offset:
+        query = query.offset(offset)
+    return query
+
+
+def catalog_page(
+    rooms: List[CachedRoom], limit: int, offset: int, cursor: Optional[str]
+) -> List[CachedRoom]:
+    """``rooms_page_query`` run on the rooms of the room catalog."""
+    if cursor is not None:
+        (last_id,) = decode_cursor(cursor, int)
+        offset = bisect_right(rooms, last_id, key=attrgetter("id"))
+    return rooms[offset : offset + limit + 1]
+
+
+def rooms_page(rows: Sequence, limit: int) -> Tuple[Sequence, Optional[str]]:
+    """Rows of the page and the cursor of the next one, if any."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].id)
+
+
+def reservations_page(rows: Sequence, limit: int) -> Tuple[Sequence, Optional[str]]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].start_time.isoformat(), rows[-1].id)
+
+
+def listing_columns(
+    fields: Optional[str], columns: Sequence, *keys
+) -> Tuple[List[str], List]:
+    """Names of the requested ``fields`` and the columns selected for them.
+
+    ``fields`` is a comma separated list of column names, all of ``columns``
+    by default. The ``keys`` the next cursor is built from are selected after
+    the requested columns when they aren't part of them.
+    """
+    if fields is None:
+        return [column.key for column in columns], list(columns)
+
+    by_name = {column.key: column for column in columns}
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",")))
+    if not all(name in by_name for name in names):
+        logger.error(f"{constants.INVALID_FIELDS}: {fields}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=constants.INVALID_FIELDS,
+        )
+    return names, [by_name[name] for name in names] + [
+        key for key in keys if key.key not in names
+    ]
+
+
+def page_json(
+    key: str, names: List[str], rows: Sequence[Row], next_cursor: Optional[str]
+) -> bytes:
+    """Response body of a listing page, encoded straight from the rows.
+
+    Only the first ``len(names)`` columns of the rows are listed, the ones
+    after them are only selected for the cursor.
+    """
+    return orjson.dumps(
+        {key: [dict(zip(names, row)) for row in rows], "next_cursor": next_cursor}
+    )
+
+
 async def get_rooms(
-    limit: int, offset: int, db: Session = Depends(get_db)
+    limit: int,
+    offset: int,
+    db: DBSession = Depends(get_db),
+    cursor: Optional[str] = None,
 ) -> RoomGetAllResponse:
+    """Page of rooms ordered by id.
+
+    ``cursor`` is the ``next_cursor`` of the previous page and seeks straight
+    to the rows after it. ``offset`` is only kept for older clients, deep
+    offsets read and skip every row before the page.
+    """
     try:
-        all_rooms: RoomModel = db.query(RoomModel).offset(offset).limit(limit).all()
+        query = rooms_page_query(limit, offset, cursor, RoomModel)
+        all_rooms = (await resolve(db.scalars(query))).all()
+        all_rooms, next_cursor = rooms_page(all_rooms, limit)
 
         rooms = []
         for room in all_rooms:
@@ -59,10 +218,57 @@ async def get_rooms(
 
         logger.info(
             f"Got {len(rooms)} rooms successfully with pagination:"
-            f"limit={limit}, offset={offset}."
+            f"limit={limit}, offset={offset}, cursor={cursor}."
+        )
+
+        return RoomGetAllResponse(rooms=rooms, next_cursor=next_cursor)
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        logger.error(f"{constants.ERROR_GETTING_ROOMS}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=constants.ERROR_GETTING_ROOMS,
         )
 
-        return RoomGetAllResponse(rooms=rooms)
+
+async def get_rooms_json(
+    limit: int,
+    offset: int,
+    db: DBSession = Depends(get_db),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+) -> bytes:
+    """Same page as ``get_rooms``, as the JSON body of a RoomGetAllResponse.
+
+    Only the listed columns are selected and the rows are encoded as they
+    come, without loading ORM objects or validating them into the response
+    model, which is what large pages spend most of their time on. ``fields``
+    narrows the rooms down to the comma separated keys it names. While the
+    room catalog holds every room, pages read on the primary come from it.
+    """
+    try:
+        names, columns = listing_columns(fields, ROOM_COLUMNS, RoomModel.id)
+        catalog = None
+        # Primary reads are served from the catalog, so it isn't filled from
+        # a lagging replica.
+        if settings.ROOM_CATALOG_ENABLED and not reads_replica(db):
+            catalog = await room_catalog.rooms(db)
+        if catalog is not None:
+            rooms, next_cursor = rooms_page(
+                catalog_page(catalog, limit, offset, cursor), limit
+            )
+            rows = [[getattr(room, name) for name in names] for room in rooms]
+        else:
+            query = rooms_page_query(limit, offset, cursor, *columns)
+            rows = (await resolve(db.execute(query))).all()
+            rows, next_cursor = rooms_page(rows, limit)
+
+        logger.info(
+            f"Got {len(rows)} rooms successfully with pagination:"
+            f"limit={limit}, offset={offset}, cursor={cursor}."
+        )
+        return page_json("rooms", names, rows, next_cursor)
     except Exception as e:
         if isinstance(e, HTTPException):
             raise e
@@ -74,22 +280,78 @@ async def get_rooms(
 
 
 async def get_reservations(
-    room_id: int, limit: int, offset: int, db: Session = Depends(get_db)
+    room_id: int,
+    limit: int,
+    offset: int,
+    db: DBSession = Depends(get_db),
+    cursor: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    day: Optional[date] = None,
 ) -> ReservationGetAllResponse:
+    """Page of a room's reservations ordered by (start_time, id).
+
+    Pages are read from ix_reservation_room_id_start_time_id, a ``cursor``
+    seeks past the last row of the previous page while ``offset`` is only
+    kept for older clients. Only reservations overlapping ``start_time`` to
+    ``end_time``, and ``day`` when given, are listed, filtered in the query.
+    """
     try:
-        all_reservations: RoomModel = (
-            db.query(Reservation)
-            .join(RoomModel, Reservation.room_id == room_id)
-            .offset(offset)
-            .limit(limit)
+        start_time, end_time = reservation_window(start_time, end_time, day)
+        query = reservations_page_query(
+            room_id, limit, offset, cursor, start_time, end_time, Reservation
         )
+        all_reservations = (await resolve(db.scalars(query))).all()
+        all_reservations, next_cursor = reservations_page(all_reservations, limit)
 
         reservations = []
         for reservation in all_reservations:
             reservations.append(reservation.__dict__)
 
         logger.info(f"Got all reservations for room {room_id} successfully.")
-        return ReservationGetAllResponse(reservations=reservations)
+        return ReservationGetAllResponse(
+            reservations=reservations, next_cursor=next_cursor
+        )
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        logger.error(
+            f"{constants.ERROR_GETTING_RESERVATIONS} for room {room_id}: {str(e)}"
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=constants.ERROR_GETTING_RESERVATIONS,
+        )
+
+
+async def get_reservations_json(
+    room_id: int,
+    limit: int,
+    offset: int,
+    db: DBSession = Depends(get_db),
+    cursor: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    day: Optional[date] = None,
+    fields: Optional[str] = None,
+) -> bytes:
+    """Same page as ``get_reservations``, as the JSON body of a
+    ReservationGetAllResponse encoded straight from the selected columns,
+    narrowed down to the comma separated keys of ``fields`` when given.
+    """
+    try:
+        start_time, end_time = reservation_window(start_time, end_time, day)
+        names, columns = listing_columns(
+            fields, RESERVATION_COLUMNS, Reservation.start_time, Reservation.id
+        )
+        query = reservations_page_query(
+            room_id, limit, offset, cursor, start_time, end_time, *columns
+        )
+        rows = (await resolve(db.execute(query))).all()
+        rows, next_cursor = reservations_page(rows, limit)
+
+        logger.info(f"Got all reservations for room {room_id} successfully.")
+        return page_json("reservations", names, rows, next_cursor)
     except Exception as e:
         if isinstance(e, HTTPException):
             raise e
@@ -103,15 +365,40 @@ async def get_reservations(
 
 
 async def check_availability(
-    params: RoomCheckAvailabilityRequest, db: Session = Depends(get_db)
+    params: RoomCheckAvailabilityRequest, db: DBSession = Depends(get_db)
 ) -> bool:
     try:
-        any_room: RoomModel = room_already_reserved_query(
-            params.start_time,
-            params.end_time,
-            params.id,
-            db,
-        )
+        # asyncpg only binds naive datetimes to TIMESTAMP columns.
+        start_time = to_naive_utc(params.start_time)
+        end_time = to_naive_utc(params.end_time)
+        any_room = None
+        if settings.AVAILABILITY_CACHE_ENABLED:
+            any_room = availability_cache.get(params.id, start_time, end_time)
+        if any_room is None:
+            writes = availability_cache.writes(params.id)
+            if settings.BOOKING_MODE == "seat":
+                any_room = await room_full_query(start_time, end_time, params.id, db)
+            elif settings.INTERVAL_INDEX_ENABLED and not reads_replica(db):
+                # A lagging replica would fill the index bookings trust.
+                any_room = await interval_index.overlaps(
+                    params.id, start_time, end_time, db
+                )
+            if any_room is None:
+                any_room = await room_already_reserved_query(
+                    start_time,
+                    end_time,
+                    params.id,
+                    db,
+                )
+            # Bookings trust the cache too, keep replica results out of it.
+            if settings.AVAILABILITY_CACHE_ENABLED and not reads_replica(db):
+                availability_cache.set(
+                    params.id,
+                    start_time,
+                    end_time,
+                    bool(any_room),
+                    writes,
+                )
 
         if any_room:
             logger.error(constants.ROOM_ALREADY_RESERVERD)
@@ -127,3 +414,120 @@ async def check_availability(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=constants.ERROR_CHECKING_ROOM,
         )
+
+
+async def check_availability_batch(
+    params: RoomBatchAvailabilityRequest, db: DBSession = Depends(get_db)
+) -> RoomBatchAvailabilityResponse:
+    try:
+        windows = params.windows()
+        if not windows:
+            return RoomBatchAvailabilityResponse(rooms={})
+
+        checks = values(
+            column("position", Integer),
+            column("room_id", Integer),
+            column("start_time", DateTime),
+            column("end_time", DateTime),
+            name="checks",
+        ).data(
+            [
+                (
+                    position,
+                    window.room_id,
+                    to_naive_utc(window.start_time),
+                    to_naive_utc(window.end_time),
+                )
+                for position, window in enumerate(windows)
+            ]
+        )
+        reserved = set(
+            (
+                await resolve(
+                    db.scalars(
+                        select(checks.c.position).where(
+                            room_unavailable_clause(
+                                checks.c.start_time,
+                                checks.c.end_time,
+                                checks.c.room_id,
+                                select(RoomModel.capacity)
+                                .where(RoomModel.id == checks.c.room_id)
+                                .scalar_subquery(),
+                            )
+                        )
+                    )
+                )
+            ).all()
+        )
+
+        rooms = {}
+        for position, window in enumerate(windows):
+            rooms.setdefault(window.room_id, []).append(position not in reserved)
+
+        logger.info(f"Checked availability of {len(windows)} room windows.")
+        return RoomBatchAvailabilityResponse(rooms=rooms)
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        logger.error(f"{constants.ERROR_CHECKING_ROOMS}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=constants.ERROR_CHECKING_ROOMS,
+        )
+
+
+async def search_free_rooms(
+    start_time: datetime,
+    end_time: datetime,
+    limit: int,
+    capacity: Optional[int] = None,
+    location: Optional[str] = None,
+    cursor: Optional[str] = None,
+    db: DBSession = Depends(get_db),
+) -> RoomSearchResponse:
+    try:
+        start_time, end_time = to_naive_utc(start_time), to_naive_utc(end_time)
+        if start_time >= end_time:
+            logger.error(constants.INVALID_DATETIME)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=constants.INVALID_DATETIME,
+            )
+
+        query = (
+            select(RoomModel)
+            .where(
+                ~room_unavailable_clause(
+                    start_time, end_time, RoomModel.id, RoomModel.capacity
+                )
+            )
+            .order_by(RoomModel.id)
+            .limit(limit + 1)
+        )
+        if capacity is not None:
+            query = query.where(RoomModel.capacity >= capacity)
+        if location is not None:
+            query = query.where(RoomModel.location == location)
+        if cursor is not None:
+            (last_id,) = decode_cursor(cursor, int)
+            query = query.where(RoomModel.id > last_id)
+
+        free_rooms = (await resolve(db.scalars(query))).all()
+
+        next_cursor = None
+        if len(free_rooms) > limit:
+            free_rooms = free_rooms[:limit]
+            next_cursor = encode_cursor(free_rooms[-1].id)
+
+        logger.info(f"Found {len(free_rooms)} free rooms.")
+        return RoomSearchResponse(
+            rooms=[room.__dict__ for room in free_rooms], next_cursor=next_cursor
+        )
+    except Exception as e:
+        if isinstance(e, HTTPException):
+            raise e
+        logger.error(f"{constants.ERROR_SEARCHING_ROOMS}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=constants.ERROR_SEARCHING_ROOMS,
+        )
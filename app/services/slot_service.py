@@ -0,0 +1,173 @@
+from contextlib import aclosing
+from datetime import datetime, timedelta, timezone
+from heapq import heappop, heappush
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import Row, Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import constants
+from app.core.interval_index import to_naive_utc
+from app.core.logger import logger
+from app.db.settings import DBSession, resolve
+from app.models.reservation import Reservation
+from app.models.room import Room as RoomModel
+from app.schemas.rooms import RoomSlot
+from app.services.reservation_service import room_already_reserved_clause
+
+SLOTS_BATCH_SIZE = 1_000
+
+
+class SlotSweep:
+    """Earliest slot of every gap of at least ``duration`` in a set of rooms.
+
+    Reservations of all the rooms must be added sorted by start time. A gap
+    is certain once a reservation starting ``duration`` after it was added,
+    since every reservation left starts even later, so slots are returned as
+    soon as they are found, ordered by start time and room.
+    """
+
+    def __init__(
+        self,
+        room_ids: Iterable[int],
+        start_time: datetime,
+        end_time: datetime,
+        duration: timedelta,
+    ):
+        self.end_time = end_time
+        self.duration = duration
+        self._free_from: Dict[int, datetime] = dict.fromkeys(room_ids, start_time)
+        # Rooms whose current gap wasn't returned yet. The heap keeps the
+        # outdated (free_from, room_id) entries of rooms that moved on.
+        self._pending = dict(self._free_from)
+        self._queue = sorted((start_time, room_id) for room_id in self._free_from)
+
+    def add(
+        self, room_id: int, reserved_from: datetime, reserved_until: datetime
+    ) -> List[RoomSlot]:
+        """Add a reservation, returning the slots certain before it."""
+        slots = self._pop(reserved_from - self.duration)
+        if reserved_until > self._free_from[room_id]:
+            self._free_from[room_id] = reserved_until
+            self._pending[room_id] = reserved_until
+            heappush(self._queue, (reserved_until, room_id))
+        return slots
+
+    def finish(self) -> List[RoomSlot]:
+        """Slots left once every reservation was added."""
+        return self._pop(self.end_time - self.duration)
+
+    def _pop(self, latest: datetime) -> List[RoomSlot]:
+        slots = []
+        while self._queue and self._queue[0][0] <= latest:
+            free_from, room_id = heappop(self._queue)
+            if self._pending.get(room_id) == free_from:
+                del self._pending[room_id]
+                slots.append(
+                    RoomSlot(
+                        room_id=room_id,
+                        start_time=free_from,
+                        end_time=free_from + self.duration,
+                    )
+                )
+        return slots
+
+
+def find_earliest_slots(
+    duration_minutes: int,
+    end_time: datetime,
+    limit: int,
+    session_factory: Callable[[], DBSession],
+    start_time: Optional[datetime] = None,
+    capacity: Optional[int] = None,
+    location: Optional[str] = None,
+) -> AsyncIterator[RoomSlot]:
+    """Earliest ``limit`` slots of ``duration_minutes`` in any matching room.
+
+    Raises on an invalid window, so it's called before the response starts,
+    and returns the slots as an async iterator yielding them as found.
+    """
+    now = to_naive_utc(datetime.now(timezone.utc))
+    start_time = max(to_naive_utc(start_time), now) if start_time else now
+    end_time = to_naive_utc(end_time)
+    if start_time >= end_time:
+        logger.error(constants.INVALID_DATETIME)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=constants.INVALID_DATETIME,
+        )
+
+    rooms_query = select(RoomModel.id)
+    reservations_query = (
+        select(Reservation.room_id, Reservation.start_time, Reservation.end_time)
+        .join(
+            RoomModel, room_already_reserved_clause(start_time, end_time, RoomModel.id)
+        )
+        .order_by(Reservation.start_time, Reservation.id)
+    )
+    if capacity is not None:
+        rooms_query = rooms_query.where(RoomModel.capacity >= capacity)
+        reservations_query = reservations_query.where(RoomModel.capacity >= capacity)
+    if location is not None:
+        rooms_query = rooms_query.where(RoomModel.location == location)
+        reservations_query = reservations_query.where(RoomModel.location == location)
+
+    return stream_slots(
+        rooms_query,
+        reservations_query.execution_options(yield_per=SLOTS_BATCH_SIZE),
+        limit,
+        session_factory,
+        lambda room_ids: SlotSweep(
+            room_ids, start_time, end_time, timedelta(minutes=duration_minutes)
+        ),
+    )
+
+
+async def partitions(db: DBSession, query: Select) -> AsyncIterator[Sequence[Row]]:
+    """Rows of ``query`` from a server-side cursor, a batch at a time."""
+    if isinstance(db, AsyncSession):
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            yield rows
+    else:
+        for rows in db.execute(query).partitions():
+            yield rows
+
+
+async def stream_slots(
+    rooms_query: Select,
+    reservations_query: Select,
+    limit: int,
+    session_factory: Callable[[], DBSession],
+    sweep_factory: Callable[[Sequence[int]], SlotSweep],
+) -> AsyncIterator[RoomSlot]:
+    """Yield slots while the reservations are swept a batch at a time.
+
+    Only the candidate room ids are read upfront. Reservations come from a
+    server-side cursor in start time order and fetching stops once ``limit``
+    slots were yielded. The session is opened here since the request's own is
+    closed before the body is sent, so an error midway aborts the response.
+    """
+    found = 0
+    db = session_factory()
+    try:
+        room_ids = (await resolve(db.scalars(rooms_query))).all()
+        sweep = sweep_factory(room_ids)
+        async with aclosing(partitions(db, reservations_query)) as batches:
+            async for rows in batches:
+                for room_id, reserved_from, reserved_until in rows:
+                    for slot in sweep.add(room_id, reserved_from, reserved_until):
+                        yield slot
+                        found += 1
+                        if found == limit:
+                            return
+        for slot in sweep.finish()[: limit - found]:
+            yield slot
+            found += 1
+    except Exception as e:
+        logger.error(f"{constants.ERROR_FINDING_SLOTS} after {found} slots: {str(e)}")
+        raise
+    finally:
+        logger.info(f"Found {found} slots.")
+        await resolve(db.close())
@@ -0,0 +1,136 @@
+"""Booking throughput on one contended room for each lock strategy.
+
+Run from the repository root against a migrated database you can write to:
+
+    python -m benchmarks.booking_contention --bookings 512 --clients 1 8 64
+
+Each run creates a room, lets the clients book distinct one hour slots in it
+through the same path POST /reservations/ takes for the strategy, and drops
+the room afterwards. Rooms only conflict on their capacity row, so the
+numbers isolate the cost of the lock strategy. ``lost`` counts capacity
+decrements missing for the reservations made, it should always be 0.
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from itertools import count
+from time import perf_counter
+from typing import Dict, List
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.config.settings import settings
+from app.core.logger import logger
+from app.models.reservation import Reservation
+from app.models.room import Room
+from app.schemas.reservations import RerservationCreateRequest
+from app.services.reservation_service import (
+    book_reservation,
+    is_reservation_valid,
+    make_reservation,
+)
+
+STRATEGIES = ["atomic", "for_update", "advisory", "optimistic"]
+CLIENTS = [1, 2, 4, 8, 16, 32, 64]
+
+
+async def book(reservation_data: RerservationCreateRequest, db) -> None:
+    if settings.BOOKING_LOCK_STRATEGY == "atomic":
+        await book_reservation(reservation_data, db)
+    elif await is_reservation_valid(reservation_data, db):
+        response = await make_reservation(reservation_data, db)
+        if isinstance(response, dict):
+            raise HTTPException(status_code=400, detail=response["error"])
+
+
+async def run(Session, strategy: str, clients: int, bookings: int) -> Dict:
+    settings.BOOKING_LOCK_STRATEGY = strategy
+    async with Session() as db:
+        room = Room(name="contention", capacity=bookings, location="benchmark")
+        db.add(room)
+        await db.commit()
+
+    first_slot = datetime.now(timezone.utc).replace(
+        minute=0, second=0, microsecond=0, tzinfo=None
+    ) + timedelta(days=1)
+    slots = count()
+    failures: Dict[str, int] = {}
+
+    async def client() -> None:
+        for slot in slots:
+            if slot >= bookings:
+                return
+            start_time = first_slot + timedelta(hours=slot)
+            reservation_data = RerservationCreateRequest(
+                room_id=room.id,
+                user_name="benchmark",
+                start_time=start_time,
+                end_time=start_time + timedelta(hours=1),
+            )
+            async with Session() as db:
+                try:
+                    await book(reservation_data, db)
+                except HTTPException as e:
+                    failures[e.detail] = failures.get(e.detail, 0) + 1
+
+    started = perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = perf_counter() - started
+
+    async with Session() as db:
+        booked = await db.scalar(
+            select(func.count()).where(Reservation.room_id == room.id)
+        )
+        capacity = await db.scalar(select(Room.capacity).where(Room.id == room.id))
+        await db.execute(delete(Room).where(Room.id == room.id))
+        await db.commit()
+
+    return {
+        "strategy": strategy,
+        "clients": clients,
+        "bookings_per_second": booked / elapsed,
+        "booked": booked,
+        "failed": failures,
+        "lost": booked - (bookings - capacity),
+    }
+
+
+async def main(url: str, strategies: List[str], clients: List[int], bookings: int):
+    # Measure the database path, not the in-process caches in front of it.
+    settings.INTERVAL_INDEX_ENABLED = False
+    settings.AVAILABILITY_CACHE_ENABLED = False
+    logger.setLevel(logging.CRITICAL)
+
+    engine = create_async_engine(url, pool_size=max(clients), max_overflow=0)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+
+    print(
+        f"{'strategy':<12}{'clients':>8}{'booked/s':>10}{'booked':>8}{'lost':>6}"
+        "  failed"
+    )
+    for strategy in strategies:
+        for concurrency in clients:
+            result = await run(Session, strategy, concurrency, bookings)
+            print(
+                f"{result['strategy']:<12}{result['clients']:>8}"
+                f"{result['bookings_per_second']:>10.1f}{result['booked']:>8}"
+                f"{result['lost']:>6}  {result['failed'] or '-'}"
+            )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=settings.ASYNC_DATABASE_URL)
+    parser.add_argument(
+        "--strategies", nargs="+", choices=STRATEGIES, default=STRATEGIES
+    )
+    parser.add_argument("--clients", nargs="+", type=int, default=CLIENTS)
+    parser.add_argument("--bookings", type=int, default=256)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.url, args.strategies, args.clients, args.bookings))
@@ -0,0 +1,166 @@
+"""Throughput and peak memory of the room and reservation listings per page size.
+
+Run from the repository root against a database you can create schemas in:
+
+    python -m benchmarks.listing_serialization --sizes 10 1000 100000
+
+The rooms and one room's reservations are created in a scratch schema,
+dropped afterwards. Every page is listed from the start to its response body
+through both paths: ``orm`` loads the rows as ORM objects into the response
+model and lets FastAPI validate and encode it against the route's
+response_model, as GET /rooms/ and GET /rooms/{room_id}/reservations used to,
+``core`` is what they do now, selecting the columns and encoding the rows
+straight to JSON. ``rows/s`` is rows listed per second, ``peak KiB`` the
+Python memory allocated at the peak of one listing.
+"""
+
+import argparse
+import asyncio
+import logging
+import tracemalloc
+from time import perf_counter
+from typing import Awaitable, Callable, List, Type
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import BaseModel
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.config.settings import settings
+from app.core.logger import logger
+from app.models import Base
+from app.models.reservation import Reservation
+from app.models.room import Room
+from app.schemas.reservations import ReservationGetAllResponse
+from app.schemas.rooms import RoomGetAllResponse
+from app.services.room_service import (
+    get_reservations,
+    get_reservations_json,
+    get_rooms,
+    get_rooms_json,
+)
+
+SCHEMA = "benchmark_listing_serialization"
+SIZES = [10, 1_000, 100_000]
+# Timed runs list about this many rows, at least 3 and at most 1000 runs.
+ROWS_PER_SIZE = 300_000
+
+
+async def seed(connection, rows: int) -> None:
+    """Add ``rows`` rooms and ``rows`` reservations in room 1."""
+    await connection.execute(
+        text(
+            "INSERT INTO room (name, capacity, location) "
+            "SELECT 'Room ' || n, 10, 'benchmark' FROM generate_series(1, :rows) n"
+        ),
+        {"rows": rows},
+    )
+    await connection.execute(
+        text(
+            "INSERT INTO reservation (user_name, start_time, end_time, room_id) "
+            "SELECT 'benchmark', slot, slot + interval '1 hour', 1 "
+            "FROM generate_series(0, :rows - 1) n, "
+            "LATERAL (SELECT timestamp '2030-01-01' + n * interval '2 hours' "
+            "AS slot) slots"
+        ),
+        {"rows": rows},
+    )
+    await connection.execute(text("ANALYZE room"))
+    await connection.execute(text("ANALYZE reservation"))
+
+
+def orm_path(
+    service: Callable[..., Awaitable[BaseModel]], model: Type[BaseModel]
+) -> Callable[..., Awaitable[bytes]]:
+    field = create_model_field("Response", model, mode="serialization")
+
+    async def body(*args) -> bytes:
+        content = await serialize_response(
+            field=field, response_content=await service(*args)
+        )
+        return JSONResponse(content).body
+
+    return body
+
+
+async def measure(Session, path, *args) -> List[float]:
+    """Seconds per listing and peak KiB allocated by one listing."""
+    size = args[-2]
+    repeat = min(1_000, max(3, ROWS_PER_SIZE // size))
+    async with Session() as db:
+        await path(*args, db)
+
+        started = perf_counter()
+        for _ in range(repeat):
+            await path(*args, db)
+        elapsed = (perf_counter() - started) / repeat
+
+        tracemalloc.start()
+        await path(*args, db)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return [elapsed, peak / 1024]
+
+
+async def main(url: str, sizes: List[int]):
+    # Measure the database path, not the in-process caches in front of it.
+    settings.ROOM_CATALOG_ENABLED = False
+    settings.INTERVAL_INDEX_ENABLED = False
+    settings.AVAILABILITY_CACHE_ENABLED = False
+    logger.setLevel(logging.CRITICAL)
+
+    engine = create_async_engine(
+        url, connect_args={"server_settings": {"search_path": f"{SCHEMA},public"}}
+    )
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as connection:
+        await connection.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+        await connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await connection.execute(text(f"CREATE SEQUENCE {SCHEMA}.room_id_seq"))
+        await connection.run_sync(
+            Base.metadata.create_all, tables=[Room.__table__, Reservation.__table__]
+        )
+        await seed(connection, max(sizes))
+
+    listings = {
+        "rooms": (
+            orm_path(get_rooms, RoomGetAllResponse),
+            get_rooms_json,
+            (),
+        ),
+        "reservations": (
+            orm_path(get_reservations, ReservationGetAllResponse),
+            get_reservations_json,
+            (1,),
+        ),
+    }
+
+    print(
+        f"{'listing':<14}{'page':>8}{'orm rows/s':>12}{'core rows/s':>13}"
+        f"{'orm peak KiB':>14}{'core peak KiB':>15}"
+    )
+    try:
+        for name, (orm, core, args) in listings.items():
+            for size in sorted(sizes):
+                orm_seconds, orm_peak = await measure(Session, orm, *args, size, 0)
+                core_seconds, core_peak = await measure(Session, core, *args, size, 0)
+                print(
+                    f"{name:<14}{size:>8}{size / orm_seconds:>12.0f}"
+                    f"{size / core_seconds:>13.0f}{orm_peak:>14.0f}{core_peak:>15.0f}"
+                )
+    finally:
+        async with engine.begin() as connection:
+            await connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=settings.ASYNC_DATABASE_URL)
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.url, args.sizes))
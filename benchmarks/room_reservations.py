@@ -0,0 +1,112 @@
+"""Latency of a room's reservation listing as the number of rooms grows.
+
+Run from the repository root against a database you can create schemas in:
+
+    python -m benchmarks.room_reservations --rooms 10 100 1000 10000
+
+The rooms and their reservations are created in a scratch schema, dropped
+afterwards. For every room count the first page of one room's reservations
+is listed, unfiltered and for a single date, through the same path
+GET /rooms/{room_id}/reservations takes. Both should stay flat: the queries
+only read the listed room's index entries, whatever the size of the tables.
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import date, datetime
+from time import perf_counter
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.config.settings import settings
+from app.core.logger import logger
+from app.models import Base
+from app.models.reservation import Reservation
+from app.models.room import Room
+from app.services.room_service import get_reservations
+
+SCHEMA = "benchmark_room_reservations"
+ROOMS = [10, 100, 1_000, 10_000]
+# Reservations are every other hour from FIRST_DAY on, DAY is in the middle.
+FIRST_DAY = datetime(2030, 1, 1)
+DAY = date(2030, 1, 3)
+
+
+async def seed(connection, rooms: int, per_room: int) -> None:
+    """Add rooms, each with ``per_room`` reservations, up to ``rooms``."""
+    await connection.execute(
+        text(
+            "INSERT INTO room (name, capacity, location) "
+            "SELECT 'Room ' || n, 10, 'benchmark' "
+            "FROM generate_series((SELECT count(*) FROM room) + 1, :rooms) n"
+        ),
+        {"rooms": rooms},
+    )
+    await connection.execute(
+        text(
+            "INSERT INTO reservation (user_name, start_time, end_time, room_id) "
+            "SELECT 'benchmark', slot, slot + interval '1 hour', room.id "
+            "FROM room, generate_series(0, :per_room - 1) n, "
+            "LATERAL (SELECT CAST(:first_day AS timestamp) + n * interval '2 hours' "
+            "AS slot) slots "
+            "WHERE NOT EXISTS "
+            "(SELECT FROM reservation WHERE reservation.room_id = room.id)"
+        ),
+        {"per_room": per_room, "first_day": FIRST_DAY},
+    )
+    await connection.execute(text("ANALYZE room"))
+    await connection.execute(text("ANALYZE reservation"))
+
+
+async def timed(Session, repeat: int, **filters) -> float:
+    """Milliseconds per listing of the first page of room 1."""
+    async with Session() as db:
+        await get_reservations(1, 50, 0, db, **filters)
+        started = perf_counter()
+        for _ in range(repeat):
+            await get_reservations(1, 50, 0, db, **filters)
+        return (perf_counter() - started) / repeat * 1000
+
+
+async def main(url: str, rooms: List[int], per_room: int, repeat: int):
+    logger.setLevel(logging.CRITICAL)
+
+    engine = create_async_engine(
+        url, connect_args={"server_settings": {"search_path": f"{SCHEMA},public"}}
+    )
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as connection:
+        await connection.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+        await connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await connection.execute(text(f"CREATE SEQUENCE {SCHEMA}.room_id_seq"))
+        await connection.run_sync(
+            Base.metadata.create_all, tables=[Room.__table__, Reservation.__table__]
+        )
+
+    print(f"{'rooms':>8}{'reservations':>14}{'page ms':>10}{'date ms':>10}")
+    try:
+        for count in sorted(rooms):
+            async with engine.begin() as connection:
+                await seed(connection, count, per_room)
+            page = await timed(Session, repeat)
+            by_date = await timed(Session, repeat, day=DAY)
+            print(f"{count:>8}{count * per_room:>14}{page:>10.3f}{by_date:>10.3f}")
+    finally:
+        async with engine.begin() as connection:
+            await connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=settings.ASYNC_DATABASE_URL)
+    parser.add_argument("--rooms", nargs="+", type=int, default=ROOMS)
+    parser.add_argument("--per-room", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.url, args.rooms, args.per_room, args.repeat))
@@ -1,15 +1,48 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from app.api.auth import auth_router
 from app.api.reservations import reservation_router
 from app.api.rooms import room_router
 from app.config.settings import settings
-from app.schemas.health_check import HealthCheck
+from app.core import constants
+from app.core.availability_cache import availability_cache
+from app.core.invalidation_bus import invalidation_bus
+from app.core.logger import logger
+from app.core.room_catalog import room_catalog
+from app.db.settings import AsyncSessionLocal, SessionLocal, pool_metrics, resolve
+from app.schemas.health_check import (
+    AvailabilityCacheStats,
+    HealthCheck,
+    PoolStatsResponse,
+    RoomCatalogStats,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.INVALIDATION_BUS_ENABLED:
+        # Listen before warming up, so no write lands unseen in between.
+        await invalidation_bus.start()
+    if settings.ROOM_CATALOG_ENABLED:
+        db = (AsyncSessionLocal if settings.DB_ASYNC else SessionLocal)()
+        try:
+            await room_catalog.warm_up(db)
+        except Exception as e:
+            # Rooms are read lazily then, the API can start without them.
+            logger.error(f"{constants.ERROR_WARMING_ROOM_CATALOG}: {str(e)}")
+        finally:
+            await resolve(db.close())
+    yield
+    await invalidation_bus.stop()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     debug=settings.DEBUG,
+    lifespan=lifespan,
 )
 
 app.get("/health", response_model=HealthCheck, tags=["status"])
@@ -23,6 +56,24 @@ async def health_check():
     )
 
 
+@app.get("/health/pool", response_model=PoolStatsResponse, tags=["status"])
+async def pool_stats():
+    return PoolStatsResponse(
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pools={name: metrics.snapshot() for name, metrics in pool_metrics.items()},
+    )
+
+
+@app.get("/health/cache", response_model=AvailabilityCacheStats, tags=["status"])
+async def cache_stats():
+    return AvailabilityCacheStats(**availability_cache.snapshot())
+
+
+@app.get("/health/rooms", response_model=RoomCatalogStats, tags=["status"])
+async def room_catalog_stats():
+    return RoomCatalogStats(**room_catalog.snapshot())
+
+
 app.include_router(auth_router, prefix="/auth", tags=["Auth"])
 app.include_router(room_router, prefix="/rooms", tags=["Rooms"])
 app.include_router(reservation_router, prefix="/reservations", tags=["Reservations"])
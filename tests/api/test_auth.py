@@ -21,7 +21,7 @@ def client():
 def test_given_user_data_when_register_user_then_return_access_token(
     client, mock_db, monkeypatch
 ):
-    def mock_register_user(user_data, db):
+    async def mock_register_user(user_data, db):
         return "mocked_token"
 
     monkeypatch.setattr("app.api.auth.register_user", mock_register_user)
@@ -43,7 +43,7 @@ def test_given_user_data_when_register_user_then_return_access_token(
 def test_given_user_data_when_register_user_then_raise_exception(
     client, mock_db, monkeypatch
 ):
-    def mock_register_user(user_data, db):
+    async def mock_register_user(user_data, db):
         raise Exception("Test error")
 
     monkeypatch.setattr("app.api.auth.register_user", mock_register_user)
@@ -61,7 +61,7 @@ def test_given_user_data_when_register_user_then_raise_exception(
 def test_given_user_data_when_login_user_then_return_access_token(
     client, mock_db, monkeypatch
 ):
-    def mock_login_user(user_data, db):
+    async def mock_login_user(user_data, db):
         return "mocked_token"
 
     monkeypatch.setattr("app.api.auth.login_user", mock_login_user)
@@ -84,7 +84,7 @@ def test_given_user_data_when_login_user_then_return_access_token(
 def test_given_user_data_when_login_user_then_raise_exception(
     client, mock_db, monkeypatch
 ):
-    def mock_login_user(user_data, db):
+    async def mock_login_user(user_data, db):
         raise Exception("Test error")
 
     monkeypatch.setattr("app.api.auth.login_user", mock_login_user)
@@ -0,0 +1,24 @@
+from fastapi.testclient import TestClient
+
+from main import app
+
+
+def test_given_pools_when_get_pool_stats_then_return_each_pool():
+    client = TestClient(app)
+
+    response = client.get("/health/pool")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data["pools"]) == {"sync", "async"}
+    assert data["pools"]["sync"]["pool_size"] == 5
+    assert "le_inf" in data["pools"]["async"]["wait_time"]["buckets"]
+
+
+def test_given_availability_cache_when_get_cache_stats_then_return_counters():
+    client = TestClient(app)
+
+    response = client.get("/health/cache")
+
+    assert response.status_code == 200
+    assert {"hits", "misses", "evictions", "invalidations"} <= set(response.json())
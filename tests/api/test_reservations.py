@@ -1,4 +1,4 @@
-from datetime import timedelta
+from datetime import datetime, timedelta
 from unittest.mock import MagicMock
 
 import pytest
@@ -6,7 +6,10 @@ from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
+from app.config.settings import settings
+from app.core.idempotency import idempotency_store
 from app.core.security import create_access_token
+from app.db.routing import LAST_WRITE_COOKIE, get_read_db, get_read_sessionmaker
 from app.db.settings import get_db
 from app.schemas.user import UserBase
 from main import app
@@ -15,7 +18,7 @@ from main import app
 @pytest.fixture
 def mock_db():
     db = MagicMock(spec=Session)
-    db.query().filter().first().username = "user_name"
+    db.scalar.return_value.username = "user_name"
     return db
 
 
@@ -47,16 +50,14 @@ def override_get_db(mock_db):
         yield mock_db
 
     app.dependency_overrides[get_db] = _get_db_override
+    app.dependency_overrides[get_read_db] = _get_db_override
 
 
 @pytest.mark.asyncio
 async def test_make_room_reservation(
     client, override_get_db, monkeypatch, auth_token, mock_get_current_user
 ):
-    def mock_is_reservation_valid(reservation_data, db):
-        return True
-
-    async def mock_make_reservation(reservation_data, db):
+    async def mock_book_reservation(reservation_data, db):
         return {
             "id": 1,
             "room_id": reservation_data.room_id,
@@ -67,11 +68,7 @@ async def test_make_room_reservation(
 
     headers = {"Authorization": f"Bearer {auth_token}"}
 
-    monkeypatch.setattr(
-        "app.api.reservations.is_reservation_valid", mock_is_reservation_valid
-    )
-
-    monkeypatch.setattr("app.api.reservations.make_reservation", mock_make_reservation)
+    monkeypatch.setattr("app.api.reservations.book_reservation", mock_book_reservation)
 
     reservation_data = {
         "room_id": 1,
@@ -89,6 +86,8 @@ async def test_make_room_reservation(
     assert data["user_name"] == "User 1"
     assert data["start_time"] == "2025-02-01T10:00:00"
     assert data["end_time"] == "2025-02-01T12:00:00"
+    # Reads of this client stay on the primary, whichever worker serves them.
+    assert LAST_WRITE_COOKIE in response.cookies
 
 
 @pytest.mark.asyncio
@@ -137,18 +136,180 @@ async def test_cancel_room_reservation_error(
 async def test_make_room_reservation_invalid(
     client, override_get_db, monkeypatch, auth_token, mock_get_current_user
 ):
-    def mock_is_reservation_valid(reservation_data, db):
+    async def mock_is_reservation_valid(reservation_data, db):
         return False
 
-    async def mock_make_reservation(reservation_data, db):
+    async def mock_make_recurring_reservation(reservation_data, db):
+        return {"reservations": [], "conflicts": []}
+
+    monkeypatch.setattr(
+        "app.api.reservations.is_reservation_valid", mock_is_reservation_valid
+    )
+    monkeypatch.setattr(
+        "app.api.reservations.make_recurring_reservation",
+        mock_make_recurring_reservation,
+    )
+
+    reservation_data = {
+        "room_id": 1,
+        "user_name": "User 1",
+        "start_time": "2025-02-01T10:00:00",
+        "end_time": "2025-02-01T12:00:00",
+        "recurrence": {"frequency": "daily", "count": 2},
+    }
+
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.post("/reservations/", json=reservation_data, headers=headers)
+
+    assert response.status_code == 400
+    data = response.json()
+    assert data["detail"] == "Not a valid reservation"
+
+
+@pytest.mark.asyncio
+async def test_make_room_reservation_with_recurrence_then_return_series(
+    client, override_get_db, monkeypatch, auth_token, mock_get_current_user
+):
+    async def mock_is_reservation_valid(reservation_data, db):
+        return True
+
+    async def mock_make_recurring_reservation(reservation_data, db):
+        (start_time, end_time), (conflict_start, conflict_end) = (
+            reservation_data.occurrences()
+        )
         return {
-            "id": 1,
-            "room_id": reservation_data.room_id,
-            "user_name": reservation_data.user_name,
-            "start_time": reservation_data.start_time,
-            "end_time": reservation_data.end_time,
+            "reservations": [
+                {
+                    "id": 1,
+                    "room_id": reservation_data.room_id,
+                    "user_name": reservation_data.user_name,
+                    "start_time": start_time,
+                    "end_time": end_time,
+                }
+            ],
+            "conflicts": [{"start_time": conflict_start, "end_time": conflict_end}],
         }
 
+    monkeypatch.setattr(
+        "app.api.reservations.is_reservation_valid", mock_is_reservation_valid
+    )
+    monkeypatch.setattr(
+        "app.api.reservations.make_recurring_reservation",
+        mock_make_recurring_reservation,
+    )
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    reservation_data = {
+        "room_id": 1,
+        "user_name": "User 1",
+        "start_time": "2025-02-03T10:00:00",
+        "end_time": "2025-02-03T12:00:00",
+        "recurrence": {"frequency": "weekly", "count": 2},
+    }
+
+    response = client.post("/reservations/", json=reservation_data, headers=headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["reservations"][0]["start_time"] == "2025-02-03T10:00:00"
+    assert data["conflicts"] == [
+        {"start_time": "2025-02-10T10:00:00", "end_time": "2025-02-10T12:00:00"}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_make_room_reservation_with_unbounded_recurrence_then_422(
+    client, override_get_db, auth_token, mock_get_current_user
+):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    reservation_data = {
+        "room_id": 1,
+        "user_name": "User 1",
+        "start_time": "2025-02-03T10:00:00",
+        "end_time": "2025-02-03T12:00:00",
+        "recurrence": {"frequency": "daily"},
+    }
+
+    response = client.post("/reservations/", json=reservation_data, headers=headers)
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_make_bulk_room_reservation_then_return_results(
+    client, override_get_db, monkeypatch, auth_token, mock_get_current_user
+):
+    async def mock_make_bulk_reservation(bulk_data, db):
+        assert bulk_data.mode == "best_effort"
+        return {
+            "mode": bulk_data.mode,
+            "booked": 0,
+            "results": [{"index": 0, "error": "Room already reserved for this date."}],
+        }
+
+    monkeypatch.setattr(
+        "app.api.reservations.make_bulk_reservation", mock_make_bulk_reservation
+    )
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    bulk_data = {
+        "mode": "best_effort",
+        "reservations": [
+            {
+                "room_id": 1,
+                "user_name": "User 1",
+                "start_time": "2025-02-01T10:00:00",
+                "end_time": "2025-02-01T12:00:00",
+            }
+        ],
+    }
+
+    response = client.post("/reservations/bulk", json=bulk_data, headers=headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["booked"] == 0
+    assert data["results"][0]["error"] == "Room already reserved for this date."
+
+
+@pytest.mark.asyncio
+async def test_make_room_reservation_when_room_is_reserved_then_400(
+    client, override_get_db, monkeypatch, auth_token, mock_get_current_user
+):
+    async def mock_book_reservation(reservation_data, db):
+        raise HTTPException(
+            status_code=400, detail="Room already reserved for this date."
+        )
+
+    monkeypatch.setattr("app.api.reservations.book_reservation", mock_book_reservation)
+
+    reservation_data = {
+        "room_id": 1,
+        "user_name": "User 1",
+        "start_time": "2025-02-01T10:00:00",
+        "end_time": "2025-02-01T12:00:00",
+    }
+
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.post("/reservations/", json=reservation_data, headers=headers)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Room already reserved for this date."
+
+
+@pytest.mark.asyncio
+async def test_make_room_reservation_when_lock_strategy_then_validate_and_make(
+    client, override_get_db, monkeypatch, auth_token, mock_get_current_user
+):
+    monkeypatch.setattr(settings, "BOOKING_LOCK_STRATEGY", "for_update")
+
+    async def mock_is_reservation_valid(reservation_data, db):
+        return True
+
+    async def mock_make_reservation(reservation_data, db):
+        return {"id": 1, **reservation_data.model_dump(exclude={"recurrence"})}
+
     monkeypatch.setattr(
         "app.api.reservations.is_reservation_valid", mock_is_reservation_valid
     )
@@ -164,6 +325,104 @@ async def test_make_room_reservation_invalid(
     headers = {"Authorization": f"Bearer {auth_token}"}
     response = client.post("/reservations/", json=reservation_data, headers=headers)
 
+    assert response.status_code == 200
+    assert response.json()["id"] == 1
+
+
+@pytest.mark.asyncio
+async def test_make_room_reservation_when_seat_mode_then_book_seat(
+    client, override_get_db, monkeypatch, auth_token, mock_get_current_user
+):
+    monkeypatch.setattr(settings, "BOOKING_MODE", "seat")
+
+    async def mock_book_seat(reservation_data, db):
+        return {"id": 1, **reservation_data.model_dump(exclude={"recurrence"})}
+
+    monkeypatch.setattr("app.api.reservations.book_seat", mock_book_seat)
+    monkeypatch.setattr("app.api.reservations.book_reservation", None)
+
+    reservation_data = {
+        "room_id": 1,
+        "user_name": "User 1",
+        "start_time": "2025-02-01T10:00:00",
+        "end_time": "2025-02-01T12:00:00",
+    }
+
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.post("/reservations/", json=reservation_data, headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["id"] == 1
+
+
+@pytest.mark.asyncio
+async def test_make_room_reservation_when_idempotency_key_is_repeated_then_replay(
+    client, override_get_db, monkeypatch, auth_token, mock_get_current_user
+):
+    bookings = []
+
+    async def mock_book_reservation(reservation_data, db):
+        bookings.append(reservation_data)
+        return {"id": len(bookings), **reservation_data.model_dump()}
+
+    monkeypatch.setattr("app.api.reservations.book_reservation", mock_book_reservation)
+
+    reservation_data = {
+        "room_id": 1,
+        "user_name": "User 1",
+        "start_time": "2025-02-01T10:00:00",
+        "end_time": "2025-02-01T12:00:00",
+    }
+
+    headers = {
+        "Authorization": f"Bearer {auth_token}",
+        "Idempotency-Key": "3f1c9e4a-booking",
+    }
+    responses = [
+        client.post("/reservations/", json=reservation_data, headers=headers)
+        for _ in range(2)
+    ]
+    idempotency_store.clear()
+
+    assert [response.status_code for response in responses] == [200, 200]
+    assert responses[0].json() == responses[1].json()
+    assert len(bookings) == 1
+
+
+@pytest.mark.asyncio
+async def test_export_room_reservations_when_csv_then_stream_attachment(
+    client, monkeypatch, auth_token, mock_get_current_user
+):
+    export_db = MagicMock(spec=Session)
+    export_db.execute.return_value.partitions.return_value = iter(
+        [[(1, 2, "User 1", datetime(2030, 1, 1, 9, 0), datetime(2030, 1, 1, 10, 0))]]
+    )
+    app.dependency_overrides[get_read_sessionmaker] = lambda: lambda: export_db
+
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.get(
+        "/reservations/export?format=csv&room_id=2&date=2030-01-01", headers=headers
+    )
+    del app.dependency_overrides[get_read_sessionmaker]
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "reservations.csv" in response.headers["content-disposition"]
+    assert response.text.splitlines() == [
+        "id,room_id,user_name,start_time,end_time",
+        "1,2,User 1,2030-01-01T09:00:00,2030-01-01T10:00:00",
+    ]
+    export_db.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_export_room_reservations_when_window_is_empty_then_400(
+    client, auth_token, mock_get_current_user
+):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.get(
+        "/reservations/export?from=2030-01-02T00:00:00&to=2030-01-01T00:00:00",
+        headers=headers,
+    )
+
     assert response.status_code == 400
-    data = response.json()
-    assert data["detail"] == "Not a valid reservation"
@@ -1,12 +1,18 @@
-from datetime import timedelta
+import json
+from datetime import date, datetime, timedelta
 from unittest.mock import MagicMock
 
+import orjson
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
 from app.core.security import create_access_token
+from app.core.versions import versions
+from app.db.routing import get_read_db
 from app.db.settings import get_db
+from app.schemas.rooms import RoomSlot
 from app.schemas.user import UserBase
 from main import app
 
@@ -14,7 +20,7 @@ from main import app
 @pytest.fixture
 def mock_db():
     db = MagicMock(spec=Session)
-    db.query().filter().first().username = "user_name"
+    db.scalar.return_value.username = "user_name"
     return db
 
 
@@ -41,6 +47,7 @@ def override_get_db(mock_db):
         yield mock_db
 
     app.dependency_overrides[get_db] = _get_db_override
+    app.dependency_overrides[get_read_db] = _get_db_override
 
 
 @pytest.fixture
@@ -94,10 +101,10 @@ async def test_given_room_data_when_create_room_then_raise_exception(
 async def test_given_db_error_when_get_rooms_then_return_internal_server_error(
     client, override_get_db, monkeypatch, auth_token, mock_get_current_user
 ):
-    async def mock_get_rooms(limit, offset, db):
+    async def mock_get_rooms(limit, offset, db, cursor=None, fields=None):
         raise Exception("Database Error")
 
-    monkeypatch.setattr("app.api.rooms.get_rooms", mock_get_rooms)
+    monkeypatch.setattr("app.api.rooms.get_rooms_json", mock_get_rooms)
     headers = {"Authorization": f"Bearer {auth_token}"}
 
     response = client.get("/rooms/?limit=1&offset=0", headers=headers)
@@ -111,10 +118,10 @@ async def test_given_db_error_when_get_rooms_then_return_internal_server_error(
 async def test_given_db_error_when_get_room_reservations_then_return_internal_error(
     client, override_get_db, monkeypatch, auth_token, mock_get_current_user
 ):
-    async def mock_get_reservations(limit, offset, room_id, db):
+    async def mock_get_reservations(limit, offset, room_id, db, **filters):
         raise Exception("Database Error")
 
-    monkeypatch.setattr("app.api.rooms.get_reservations", mock_get_reservations)
+    monkeypatch.setattr("app.api.rooms.get_reservations_json", mock_get_reservations)
     headers = {"Authorization": f"Bearer {auth_token}"}
 
     response = client.get("/rooms/1/reservations?limit=1&offset=0", headers=headers)
@@ -148,14 +155,16 @@ async def test_given_db_error_when_check_room_availability_then_return_internal_
 async def test_given_valid_request_when_get_rooms_then_return_rooms_list(
     client, override_get_db, monkeypatch, auth_token, mock_get_current_user
 ):
-    async def mock_get_rooms(limit, offset, db):
-        return {
-            "rooms": [
-                {"id": 1, "name": "Room 1", "capacity": 10, "location": "Andar 1"}
-            ]
-        }
-
-    monkeypatch.setattr("app.api.rooms.get_rooms", mock_get_rooms)
+    async def mock_get_rooms(limit, offset, db, cursor=None, fields=None):
+        return orjson.dumps(
+            {
+                "rooms": [
+                    {"id": 1, "name": "Room 1", "capacity": 10, "location": "Andar 1"}
+                ]
+            }
+        )
+
+    monkeypatch.setattr("app.api.rooms.get_rooms_json", mock_get_rooms)
     headers = {"Authorization": f"Bearer {auth_token}"}
     response = client.get("/rooms/?limit=1&offset=0", headers=headers)
 
@@ -170,21 +179,23 @@ async def test_given_valid_request_when_get_rooms_then_return_rooms_list(
 async def test_given_valid_request_when_get_room_reservations_then_return_reservations(
     client, override_get_db, monkeypatch, auth_token, mock_get_current_user
 ):
-    async def mock_get_reservations(limit, offset, room_id, db):
+    async def mock_get_reservations(limit, offset, room_id, db, **filters):
         print(f"Mock called with room_id={room_id}, limit={limit}, offset={offset}")
-        return {
-            "reservations": [
-                {
-                    "id": 1,
-                    "room_id": room_id,
-                    "user_name": "User 1",
-                    "start_time": "2025-02-01T00:00:00",
-                    "end_time": "2025-02-01T01:00:00",
-                }
-            ]
-        }
-
-    monkeypatch.setattr("app.api.rooms.get_reservations", mock_get_reservations)
+        return orjson.dumps(
+            {
+                "reservations": [
+                    {
+                        "id": 1,
+                        "room_id": room_id,
+                        "user_name": "User 1",
+                        "start_time": "2025-02-01T00:00:00",
+                        "end_time": "2025-02-01T01:00:00",
+                    }
+                ]
+            }
+        )
+
+    monkeypatch.setattr("app.api.rooms.get_reservations_json", mock_get_reservations)
 
     headers = {"Authorization": f"Bearer {auth_token}"}
     response = client.get("/rooms/1/reservations?limit=1&offset=0", headers=headers)
@@ -214,3 +225,355 @@ async def test_given_valid_request_when_check_room_availabilit_then_return_avail
     assert response.status_code == 200
     data = response.json()
     assert data["message"] == "Room is available"
+
+
+@pytest.mark.asyncio
+async def test_given_room_windows_when_check_rooms_availability_then_return_map(
+    client, override_get_db, monkeypatch, auth_token, mock_get_current_user
+):
+    async def mock_check_availability_batch(params, db):
+        return {"rooms": {window.room_id: [True] for window in params.windows()}}
+
+    monkeypatch.setattr(
+        "app.api.rooms.check_availability_batch", mock_check_availability_batch
+    )
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    body = {
+        "room_ids": [1, 2],
+        "start_time": "2025-02-01T10:00:00",
+        "end_time": "2025-02-01T12:00:00",
+    }
+
+    response = client.post("/rooms/availability", json=body, headers=headers)
+
+    assert response.status_code == 200
+    assert response.json() == {"rooms": {"1": [True], "2": [True]}}
+
+
+@pytest.mark.asyncio
+async def test_given_room_ids_without_window_when_check_rooms_availability_then_422(
+    client, override_get_db, auth_token, mock_get_current_user
+):
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = client.post(
+        "/rooms/availability", json={"room_ids": [1, 2]}, headers=headers
+    )
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_given_time_window_when_search_rooms_then_return_free_rooms(
+    client, override_get_db, monkeypatch, auth_token, mock_get_current_user
+):
+    async def mock_search_free_rooms(**kwargs):
+        assert kwargs["capacity"] == 5
+        assert kwargs["location"] == "Andar 1"
+        return {
+            "rooms": [
+                {"id": 1, "name": "Room 1", "capacity": 10, "location": "Andar 1"}
+            ],
+            "next_cursor": "WzFd",
+        }
+
+    monkeypatch.setattr("app.api.rooms.search_free_rooms", mock_search_free_rooms)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = client.get(
+        "/rooms/search?start_time=2025-02-01T10:00:00&end_time=2025-02-01T12:00:00"
+        "&capacity=5&location=Andar 1",
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["rooms"][0]["id"] == 1
+    assert data["next_cursor"] == "WzFd"
+
+
+@pytest.mark.asyncio
+async def test_given_room_ids_when_get_freebusy_then_return_bitmaps(
+    client, override_get_db, monkeypatch, auth_token, mock_get_current_user
+):
+    async def mock_get_freebusy(**kwargs):
+        assert kwargs["room_ids"] == [1, 2]
+        assert kwargs["granularity_minutes"] == 30
+        return {
+            "start_time": "2025-02-01T10:00:00",
+            "granularity_minutes": 30,
+            "slots": 4,
+            "busy": {1: "1100", 2: "0110"},
+            "all_free": "0001",
+            "any_free": "1011",
+        }
+
+    monkeypatch.setattr("app.api.rooms.get_freebusy", mock_get_freebusy)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = client.get(
+        "/rooms/freebusy?room_ids=1&room_ids=2&start_time=2025-02-01T10:00:00"
+        "&end_time=2025-02-01T12:00:00&granularity_minutes=30",
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["busy"] == {"1": "1100", "2": "0110"}
+    assert data["all_free"] == "0001"
+
+
+@pytest.mark.asyncio
+async def test_given_horizon_when_get_earliest_slots_then_stream_ndjson(
+    client, override_get_db, monkeypatch, auth_token, mock_get_current_user
+):
+    async def stream_slots():
+        yield RoomSlot(
+            room_id=2, start_time="2030-01-01T09:00:00", end_time="2030-01-01T09:30:00"
+        )
+        yield RoomSlot(
+            room_id=1, start_time="2030-01-01T10:00:00", end_time="2030-01-01T10:30:00"
+        )
+
+    def mock_find_earliest_slots(**kwargs):
+        assert kwargs["duration_minutes"] == 30
+        assert callable(kwargs["session_factory"])
+        return stream_slots()
+
+    monkeypatch.setattr("app.api.rooms.find_earliest_slots", mock_find_earliest_slots)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = client.get(
+        "/rooms/slots?duration_minutes=30&end_time=2030-01-02T00:00:00",
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["room_id"] for line in lines] == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_given_date_range_when_get_room_reservations_then_forward_filters(
+    client, override_get_db, monkeypatch, auth_token, mock_get_current_user
+):
+    calls = []
+
+    async def mock_get_reservations(limit, offset, room_id, db, **filters):
+        calls.append(filters)
+        return orjson.dumps({"reservations": []})
+
+    monkeypatch.setattr("app.api.rooms.get_reservations_json", mock_get_reservations)
+
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.get(
+        "/rooms/1/reservations?from=2025-02-01T10:00:00&to=2025-02-01T12:00:00"
+        "&date=2025-02-01",
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    assert calls[0]["start_time"] == datetime(2025, 2, 1, 10, 0)
+    assert calls[0]["end_time"] == datetime(2025, 2, 1, 12, 0)
+    assert calls[0]["day"] == date(2025, 2, 1)
+
+
+@pytest.mark.asyncio
+async def test_given_fields_when_get_rooms_then_forward_them(
+    client, override_get_db, monkeypatch, auth_token, mock_get_current_user
+):
+    calls = []
+
+    async def mock_get_rooms(limit, offset, db, cursor=None, fields=None):
+        calls.append(fields)
+        return orjson.dumps({"rooms": [{"id": 1, "name": "Room 1"}]})
+
+    monkeypatch.setattr("app.api.rooms.get_rooms_json", mock_get_rooms)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    response = client.get("/rooms/?fields=id,name", headers=headers)
+
+    assert response.status_code == 200
+    assert calls == ["id,name"]
+    assert response.json()["rooms"] == [{"id": 1, "name": "Room 1"}]
+
+
+@pytest.mark.asyncio
+async def test_given_current_etag_when_get_room_reservations_then_return_304(
+    client, override_get_db, monkeypatch, auth_token, mock_get_current_user
+):
+    calls = []
+
+    async def mock_get_reservations(limit, offset, room_id, db, **filters):
+        calls.append(room_id)
+        return orjson.dumps({"reservations": []})
+
+    monkeypatch.setattr("app.api.rooms.get_reservations_json", mock_get_reservations)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = client.get("/rooms/1/reservations", headers=headers)
+    etag = response.headers["ETag"]
+    not_modified = client.get(
+        "/rooms/1/reservations", headers={**headers, "If-None-Match": etag}
+    )
+
+    assert response.status_code == 200
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+    assert not_modified.content == b""
+    assert calls == [1]
+
+
+@pytest.mark.asyncio
+async def test_given_reservation_made_when_get_rooms_with_old_etag_then_return_200(
+    client, override_get_db, monkeypatch, auth_token, mock_get_current_user
+):
+    async def mock_get_rooms(limit, offset, db, cursor=None, fields=None):
+        return orjson.dumps({"rooms": []})
+
+    monkeypatch.setattr("app.api.rooms.get_rooms_json", mock_get_rooms)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    etag = client.get("/rooms/", headers=headers).headers["ETag"]
+    versions.bump(1)
+    response = client.get("/rooms/", headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_given_current_etag_when_check_room_availability_then_return_304(
+    client, override_get_db, monkeypatch, auth_token, mock_get_current_user
+):
+    calls = []
+
+    async def mock_check_availability(params, db):
+        calls.append(params)
+        return True
+
+    monkeypatch.setattr("app.api.rooms.check_availability", mock_check_availability)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    url = (
+        "/rooms/2/availability?start_time=2030-02-01T10:00:00&"
+        "end_time=2030-02-01T12:00:00"
+    )
+
+    response = client.get(url, headers=headers)
+    not_modified = client.get(
+        url, headers={**headers, "If-None-Match": response.headers["ETag"]}
+    )
+    versions.bump(2)
+    modified = client.get(
+        url, headers={**headers, "If-None-Match": response.headers["ETag"]}
+    )
+
+    assert response.json() == {"message": "Room is available"}
+    assert not_modified.status_code == 304
+    assert modified.status_code == 200
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_given_replica_read_when_get_room_reservations_then_send_no_etag(
+    client, override_get_db, mock_db, monkeypatch, auth_token, mock_get_current_user
+):
+    calls = []
+
+    async def mock_get_reservations(limit, offset, room_id, db, **filters):
+        calls.append(room_id)
+        return orjson.dumps({"reservations": []})
+
+    monkeypatch.setattr("app.api.rooms.get_reservations_json", mock_get_reservations)
+    mock_db.info = {"replica": True}
+    headers = {"Authorization": f"Bearer {auth_token}", "If-None-Match": "*"}
+
+    response = client.get("/rooms/1/reservations", headers=headers)
+
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+    assert calls == [1]
+
+
+@pytest.mark.asyncio
+async def test_given_db_error_when_check_rooms_availability_then_return_internal_error(
+    client, override_get_db, monkeypatch, auth_token, mock_get_current_user
+):
+    async def mock_check_availability_batch(params, db):
+        raise Exception("Database Error")
+
+    monkeypatch.setattr(
+        "app.api.rooms.check_availability_batch", mock_check_availability_batch
+    )
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    body = {
+        "room_ids": [1, 2],
+        "start_time": "2025-02-01T10:00:00",
+        "end_time": "2025-02-01T12:00:00",
+    }
+
+    response = client.post("/rooms/availability", json=body, headers=headers)
+
+    assert response.status_code == 500
+    data = response.json()
+    assert data["detail"] == "Internal Server Error"
+
+
+@pytest.mark.asyncio
+async def test_given_db_error_when_search_rooms_then_return_internal_error(
+    client, override_get_db, monkeypatch, auth_token, mock_get_current_user
+):
+    async def mock_search_free_rooms(**kwargs):
+        raise Exception("Database Error")
+
+    monkeypatch.setattr("app.api.rooms.search_free_rooms", mock_search_free_rooms)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = client.get(
+        "/rooms/search?start_time=2025-02-01T10:00:00&end_time=2025-02-01T12:00:00",
+        headers=headers,
+    )
+
+    assert response.status_code == 500
+    data = response.json()
+    assert data["detail"] == "Internal Server Error"
+
+
+@pytest.mark.asyncio
+async def test_given_db_error_when_get_freebusy_then_return_internal_error(
+    client, override_get_db, monkeypatch, auth_token, mock_get_current_user
+):
+    async def mock_get_freebusy(**kwargs):
+        raise Exception("Database Error")
+
+    monkeypatch.setattr("app.api.rooms.get_freebusy", mock_get_freebusy)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = client.get(
+        "/rooms/freebusy?room_ids=1&start_time=2025-02-01T10:00:00"
+        "&end_time=2025-02-01T12:00:00",
+        headers=headers,
+    )
+
+    assert response.status_code == 500
+    data = response.json()
+    assert data["detail"] == "Internal Server Error"
+
+
+@pytest.mark.asyncio
+async def test_given_invalid_window_when_get_earliest_slots_then_return_bad_request(
+    client, override_get_db, monkeypatch, auth_token, mock_get_current_user
+):
+    def mock_find_earliest_slots(**kwargs):
+        raise HTTPException(status_code=400, detail="Invalid datetime.")
+
+    monkeypatch.setattr("app.api.rooms.find_earliest_slots", mock_find_earliest_slots)
+    headers = {"Authorization": f"Bearer {auth_token}"}
+
+    response = client.get(
+        "/rooms/slots?duration_minutes=30&end_time=2020-01-02T00:00:00",
+        headers=headers,
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid datetime."}
@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from app.core.availability_cache import AvailabilityCache
+
+
+def at(hour: int, minute: int = 0) -> datetime:
+    return datetime(2030, 1, 1, hour, minute)
+
+
+def make_cache(**kwargs) -> AvailabilityCache:
+    options = {"slot_minutes": 15, "max_entries": 100, "ttl_seconds": 60}
+    return AvailabilityCache(**{**options, **kwargs})
+
+
+def test_given_cached_window_when_get_then_count_hits_and_misses():
+    cache = make_cache()
+
+    assert cache.get(1, at(9), at(10)) is None
+    cache.set(1, at(9), at(10), True, cache.writes(1))
+
+    assert cache.get(1, at(9), at(10)) is True
+    assert cache.get(2, at(9), at(10)) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_given_aware_window_when_get_then_match_naive_utc_key():
+    cache = make_cache()
+    cache.set(1, at(9), at(10), False, 0)
+
+    aware_start = at(9).replace(tzinfo=timezone.utc)
+    aware_end = at(10).replace(tzinfo=timezone.utc)
+
+    assert cache.get(1, aware_start, aware_end) is False
+
+
+def test_given_window_off_the_grid_when_set_then_do_not_cache():
+    cache = make_cache()
+
+    cache.set(1, at(9, 5), at(10), False, 0)
+
+    assert len(cache) == 0
+    assert cache.get(1, at(9, 5), at(10)) is None
+
+
+def test_given_write_when_invalidate_then_drop_only_overlapping_windows():
+    cache = make_cache()
+    cache.set(1, at(9), at(10), False, 0)
+    cache.set(1, at(10), at(11), False, 0)
+    cache.set(2, at(9), at(10), False, 0)
+
+    cache.invalidate(1, at(9, 30), at(10))
+
+    assert cache.get(1, at(9), at(10)) is None
+    assert cache.get(1, at(10), at(11)) is False
+    assert cache.get(2, at(9), at(10)) is False
+    assert cache.invalidations == 1
+
+
+def test_given_write_while_checking_when_set_then_do_not_cache():
+    cache = make_cache()
+    writes = cache.writes(1)
+
+    cache.invalidate(1, at(9), at(10))
+    cache.set(1, at(9), at(10), False, writes)
+
+    assert len(cache) == 0
+
+
+def test_given_expired_entry_when_get_then_miss():
+    cache = make_cache(ttl_seconds=10)
+
+    with patch("app.core.availability_cache.monotonic", return_value=100):
+        cache.set(1, at(9), at(10), False, 0)
+    with patch("app.core.availability_cache.monotonic", return_value=111):
+        assert cache.get(1, at(9), at(10)) is None
+
+
+def test_given_max_entries_when_set_then_evict_least_recently_used():
+    cache = make_cache(max_entries=2)
+    cache.set(1, at(9), at(10), False, 0)
+    cache.set(2, at(9), at(10), False, 0)
+    cache.get(1, at(9), at(10))
+
+    cache.set(3, at(9), at(10), False, 0)
+
+    assert cache.get(2, at(9), at(10)) is None
+    assert cache.get(1, at(9), at(10)) is False
+    assert cache.snapshot()["evictions"] == 1
@@ -0,0 +1,162 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from app.core.idempotency import IdempotencyStore
+
+
+class Payload(BaseModel):
+    room_id: int
+
+
+def make_store(**kwargs) -> IdempotencyStore:
+    options = {"max_entries": 100, "ttl_seconds": 60}
+    return IdempotencyStore(**{**options, **kwargs})
+
+
+def counting_call(calls, result="booked"):
+    async def call():
+        calls.append(result)
+        return result
+
+    return call
+
+
+@pytest.mark.asyncio
+async def test_given_no_key_when_run_twice_then_call_twice():
+    store, calls = make_store(), []
+
+    await store.run("POST /", "user", None, Payload(room_id=1), counting_call(calls))
+    await store.run("POST /", "user", None, Payload(room_id=1), counting_call(calls))
+
+    assert len(calls) == 2
+    assert len(store) == 0
+
+
+@pytest.mark.asyncio
+async def test_given_duplicate_key_when_run_then_replay_first_result():
+    store, calls = make_store(), []
+
+    first = await store.run(
+        "POST /", "user", "key", Payload(room_id=1), counting_call(calls, "first")
+    )
+    replayed = await store.run(
+        "POST /", "user", "key", Payload(room_id=1), counting_call(calls, "second")
+    )
+
+    assert first == replayed == "first"
+    assert calls == ["first"]
+    assert store.replays == 1
+
+
+@pytest.mark.asyncio
+async def test_given_same_key_of_another_user_when_run_then_call_again():
+    store, calls = make_store(), []
+
+    await store.run("POST /", "user1", "key", Payload(room_id=1), counting_call(calls))
+    await store.run("POST /", "user2", "key", Payload(room_id=1), counting_call(calls))
+
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_given_key_reused_with_another_payload_when_run_then_raise_422():
+    store, calls = make_store(), []
+    await store.run("POST /", "user", "key", Payload(room_id=1), counting_call(calls))
+
+    with pytest.raises(HTTPException) as exc_info:
+        await store.run(
+            "POST /", "user", "key", Payload(room_id=2), counting_call(calls)
+        )
+
+    assert exc_info.value.status_code == 422
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_given_concurrent_duplicates_when_run_then_call_once():
+    store, calls = make_store(), []
+    release = asyncio.Event()
+
+    async def call():
+        calls.append("booked")
+        await release.wait()
+        return "booked"
+
+    runs = [
+        asyncio.create_task(
+            store.run("POST /", "user", "key", Payload(room_id=1), call)
+        )
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*runs) == ["booked"] * 3
+    assert calls == ["booked"]
+
+
+@pytest.mark.asyncio
+async def test_given_client_error_when_run_again_then_replay_error():
+    store, calls = make_store(), []
+
+    async def call():
+        calls.append("failed")
+        raise HTTPException(status_code=400, detail="Room capacity is already full.")
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc_info:
+            await store.run("POST /", "user", "key", Payload(room_id=1), call)
+        assert exc_info.value.status_code == 400
+
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_given_server_error_when_run_again_then_call_again():
+    store, calls = make_store(), []
+
+    async def call():
+        calls.append("failed")
+        raise HTTPException(status_code=500, detail="Error making reservation")
+
+    with pytest.raises(HTTPException):
+        await store.run("POST /", "user", "key", Payload(room_id=1), call)
+
+    assert len(store) == 0
+    assert await store.run(
+        "POST /", "user", "key", Payload(room_id=1), counting_call(calls)
+    )
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_given_expired_key_when_run_then_call_again():
+    store, calls = make_store(ttl_seconds=10), []
+
+    with patch("app.core.idempotency.monotonic", return_value=100):
+        await store.run(
+            "POST /", "user", "key", Payload(room_id=1), counting_call(calls)
+        )
+    with patch("app.core.idempotency.monotonic", return_value=111):
+        await store.run(
+            "POST /", "user", "key", Payload(room_id=1), counting_call(calls)
+        )
+
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_given_full_store_when_run_then_evict_least_recently_used():
+    store, calls = make_store(max_entries=2), []
+
+    for key in ["a", "b", "c"]:
+        await store.run("POST /", "user", key, Payload(room_id=1), counting_call(calls))
+
+    assert len(store) == 2
+    assert store.evictions == 1
+    await store.run("POST /", "user", "a", Payload(room_id=1), counting_call(calls))
+    assert len(calls) == 4
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.interval_index import IntervalIndex, to_naive_utc
+
+NOW = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+def at(hours: int) -> datetime:
+    return NOW + timedelta(days=1, hours=hours)
+
+
+def mock_db(*rows):
+    db = MagicMock()
+    db.execute.return_value.all.return_value = list(rows)
+    return db
+
+
+@pytest.mark.parametrize(
+    "start, end, expected",
+    [
+        (at(9), at(10), False),
+        (at(9), at(11), True),
+        (at(11), at(12), True),
+        (at(12), at(13), False),
+        (at(8), at(15), True),
+        (at(14), at(15), False),
+    ],
+)
+@pytest.mark.asyncio
+async def test_given_room_reservations_when_overlaps_then_check_intervals(
+    start, end, expected
+):
+    index = IntervalIndex(max_intervals=100, ttl_seconds=60)
+    db = mock_db((at(10), at(12), 1), (at(13), at(14), 2))
+
+    assert await index.overlaps(1, start, end, db) is expected
+    db.execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_given_loaded_room_when_overlaps_then_skip_database():
+    index = IntervalIndex(max_intervals=100, ttl_seconds=60)
+    db = mock_db((at(10), at(12), 1))
+
+    await index.overlaps(1, at(9), at(10), db)
+    await index.overlaps(1, at(10), at(11), db)
+
+    db.execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_given_window_before_load_time_when_overlaps_then_return_none():
+    index = IntervalIndex(max_intervals=100, ttl_seconds=60)
+
+    assert await index.overlaps(1, NOW - timedelta(days=1), at(1), mock_db()) is None
+
+
+@pytest.mark.asyncio
+async def test_given_expired_room_when_overlaps_then_reload_from_database():
+    index = IntervalIndex(max_intervals=100, ttl_seconds=0)
+    db = mock_db()
+
+    await index.overlaps(1, at(10), at(11), db)
+    db.execute.return_value.all.return_value = [(at(10), at(12), 1)]
+
+    assert await index.overlaps(1, at(10), at(11), db) is True
+    assert db.execute.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_given_cold_or_expired_room_when_loaded_overlaps_then_return_none():
+    index = IntervalIndex(max_intervals=100, ttl_seconds=60)
+    db = mock_db((at(10), at(12), 1))
+
+    assert index.loaded_overlaps(1, at(10), at(11)) is None
+    await index.overlaps(1, at(9), at(10), db)
+    assert index.loaded_overlaps(1, at(10), at(11)) is True
+    index.ttl_seconds = 0
+    assert index.loaded_overlaps(1, at(10), at(11)) is None
+    db.execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_given_writes_when_add_and_remove_then_update_loaded_room():
+    index = IntervalIndex(max_intervals=100, ttl_seconds=60)
+    db = mock_db()
+    await index.overlaps(1, at(10), at(11), db)
+
+    index.add(1, at(10), at(12), 1)
+    assert await index.overlaps(1, at(11), at(13), db) is True
+    assert len(index) == 1
+
+    index.remove(1, 1)
+    assert await index.overlaps(1, at(11), at(13), db) is False
+    assert len(index) == 0
+    db.execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_given_write_while_loading_when_verify_then_do_not_store_snapshot():
+    index = IntervalIndex(max_intervals=100, ttl_seconds=60)
+    db = mock_db()
+
+    def execute(statement):
+        index.add(1, at(10), at(12), 1)
+        return MagicMock(all=MagicMock(return_value=[]))
+
+    db.execute.side_effect = execute
+    await index.verify(1, db)
+
+    assert 1 not in index._rooms
+
+
+@pytest.mark.asyncio
+async def test_given_memory_budget_when_loading_rooms_then_evict_least_recent():
+    index = IntervalIndex(max_intervals=2, ttl_seconds=60)
+
+    await index.overlaps(1, at(0), at(1), mock_db((at(10), at(12), 1)))
+    await index.overlaps(2, at(0), at(1), mock_db((at(10), at(12), 2)))
+    await index.overlaps(1, at(0), at(1), mock_db())
+    await index.overlaps(3, at(0), at(1), mock_db((at(10), at(12), 3)))
+
+    assert list(index._rooms) == [1, 3]
+    assert len(index) == 2
+
+
+def test_to_naive_utc_converts_aware_datetimes():
+    aware = datetime(2025, 2, 1, 10, 0, tzinfo=timezone(timedelta(hours=-3)))
+
+    assert to_naive_utc(aware) == datetime(2025, 2, 1, 13, 0)
+    assert to_naive_utc(datetime(2025, 2, 1, 10, 0)) == datetime(2025, 2, 1, 10, 0)
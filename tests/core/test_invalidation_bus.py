@@ -0,0 +1,269 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core.invalidation_bus import WRITES_PER_EVENT, InvalidationBus
+
+
+@pytest.fixture
+def bus():
+    return InvalidationBus(
+        dsn="postgresql://", channel="test", reconnect_seconds=1, ping_seconds=1
+    )
+
+
+@pytest.fixture
+def caches():
+    with patch("app.core.invalidation_bus.availability_cache") as availability, patch(
+        "app.core.invalidation_bus.interval_index"
+    ) as index, patch("app.core.invalidation_bus.room_catalog") as catalog, patch(
+        "app.core.invalidation_bus.versions"
+    ) as versions:
+        yield availability, index, catalog, versions
+
+
+def event(origin: str, *writes) -> str:
+    return json.dumps({"origin": origin, "writes": list(writes)})
+
+
+def test_given_writes_in_a_room_when_payloads_then_send_one_range_per_room(bus):
+    payloads = bus.payloads(
+        [
+            (1, datetime(2030, 2, 1, 10), datetime(2030, 2, 1, 11)),
+            (2, None, None),
+            (
+                1,
+                datetime(2030, 2, 1, 15, tzinfo=timezone(timedelta(hours=3))),
+                datetime(2030, 2, 1, 16, tzinfo=timezone(timedelta(hours=3))),
+            ),
+        ]
+    )
+
+    assert [json.loads(payload) for payload in payloads] == [
+        {
+            "origin": bus.origin,
+            "writes": [
+                [1, "2030-02-01T10:00:00", "2030-02-01T13:00:00"],
+                [2, None, None],
+            ],
+        }
+    ]
+
+
+def test_given_many_rooms_when_payloads_then_fit_them_in_notify_payloads(bus):
+    start = datetime(2030, 2, 1, 10)
+    writes = [(id, start, start + timedelta(hours=1)) for id in range(250)]
+
+    payloads = bus.payloads(writes)
+
+    assert len(payloads) == 3
+    assert [len(json.loads(p)["writes"]) for p in payloads] == [
+        WRITES_PER_EVENT,
+        WRITES_PER_EVENT,
+        50,
+    ]
+    assert max(len(payload.encode()) for payload in payloads) < 8000
+
+
+def test_given_reservation_written_elsewhere_when_apply_then_drop_it(bus, caches):
+    availability, index, catalog, versions = caches
+
+    bus.apply(event("other", [1, "2030-02-01T10:00:00", "2030-02-01T11:00:00"]))
+
+    availability.invalidate.assert_called_once_with(
+        1, datetime(2030, 2, 1, 10), datetime(2030, 2, 1, 11)
+    )
+    index.invalidate.assert_called_once_with(1)
+    catalog.invalidate.assert_called_once_with(1)
+    versions.bump.assert_called_once_with(1)
+    assert bus.events == 1
+
+
+def test_given_room_created_elsewhere_when_apply_then_read_it(bus, caches):
+    availability, index, catalog, versions = caches
+
+    bus.apply(event("other", [3, None, None]))
+
+    catalog.invalidate.assert_called_once_with(3)
+    versions.bump.assert_called_once_with()
+    availability.invalidate.assert_not_called()
+
+
+def test_given_own_event_when_apply_then_skip_it(bus, caches):
+    availability, _, _, versions = caches
+
+    bus.apply(event(bus.origin, [1, "2030-02-01T10:00:00", "2030-02-01T11:00:00"]))
+
+    availability.invalidate.assert_not_called()
+    versions.bump.assert_not_called()
+    assert bus.events == 0
+
+
+def test_given_broken_event_when_notified_then_flush_every_cache(bus, caches):
+    availability, index, catalog, versions = caches
+
+    bus._on_notification(None, 1, "test", "not json")
+
+    availability.clear.assert_called_once()
+    index.clear.assert_called_once()
+    catalog.clear.assert_called_once()
+    versions.flush.assert_called_once()
+    assert bus.flushes == 1
+
+
+def test_given_writes_when_notify_columns_then_send_each_payload(bus):
+    writes = [(id, None, None) for id in range(150)]
+
+    columns = bus.notify_columns(writes)
+
+    assert [column.name for column in columns] == ["notify_0", "notify_1"]
+    assert [column.element.clauses.clauses[1].value for column in columns] == (
+        bus.payloads(writes)
+    )
+
+
+@pytest.mark.asyncio
+async def test_given_writes_when_notify_then_send_them_in_one_statement(bus):
+    mock_db = MagicMock()
+
+    await bus.notify([(1, None, None), (2, None, None)], mock_db)
+    await bus.notify([], mock_db)
+
+    mock_db.execute.assert_called_once()
+    assert str(mock_db.execute.call_args.args[0]).count("pg_notify(") == 1
+
+
+class FakeConnection:
+    """The part of an asyncpg connection the bus uses."""
+
+    def __init__(self, ping_error: Optional[Exception] = None):
+        self.ping_error = ping_error
+        self.listeners = {}
+        self.on_terminate = None
+        self.pings = 0
+        self.terminated = False
+
+    def add_termination_listener(self, callback):
+        self.on_terminate = callback
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    async def fetchval(self, query):
+        self.pings += 1
+        if self.ping_error:
+            raise self.ping_error
+        return 1
+
+    def terminate(self):
+        self.terminated = True
+
+
+@pytest.fixture
+def fast_bus():
+    return InvalidationBus(
+        dsn="postgresql://", channel="test", reconnect_seconds=0, ping_seconds=0.01
+    )
+
+
+@pytest.fixture
+def connect():
+    with patch(
+        "app.core.invalidation_bus.asyncpg.connect", new_callable=AsyncMock
+    ) as connect:
+        yield connect
+
+
+async def wait_until(condition):
+    for _ in range(100):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    pytest.fail("condition not met")
+
+
+@pytest.mark.asyncio
+async def test_given_bus_when_start_then_listen_until_stopped(
+    fast_bus, caches, connect
+):
+    connection = FakeConnection()
+    connect.return_value = connection
+
+    await fast_bus.start()
+    await wait_until(lambda: connection.pings)
+    connection.listeners["test"](connection, 1, "test", event("other", [3, None, None]))
+    await fast_bus.stop()
+    await fast_bus.stop()
+
+    connect.assert_awaited_once_with("postgresql://")
+    assert fast_bus.events == 1
+    assert fast_bus.flushes == 1
+    assert connection.terminated
+
+
+@pytest.mark.asyncio
+async def test_given_connect_fails_when_start_then_retry_and_flush_once_listening(
+    fast_bus, caches, connect
+):
+    connection = FakeConnection()
+    connect.side_effect = [OSError("refused"), connection]
+
+    await fast_bus.start()
+    await fast_bus.stop()
+
+    assert connect.await_count == 2
+    assert fast_bus.flushes == 1
+
+
+@pytest.mark.asyncio
+async def test_given_connection_lost_when_listening_then_reconnect_and_flush(
+    fast_bus, caches, connect
+):
+    lost, connection = FakeConnection(), FakeConnection()
+    connect.side_effect = [lost, connection]
+
+    await fast_bus.start()
+    lost.on_terminate(lost)
+    await wait_until(lambda: connection.listeners)
+    await fast_bus.stop()
+
+    assert lost.terminated
+    assert fast_bus.flushes == 2
+    availability, _, _, versions = caches
+    assert availability.clear.call_count == 2
+    assert versions.flush.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_given_ping_fails_when_listening_then_reconnect_and_flush(
+    fast_bus, caches, connect
+):
+    broken = FakeConnection(ping_error=OSError("broken pipe"))
+    connection = FakeConnection()
+    connect.side_effect = [broken, connection]
+
+    await fast_bus.start()
+    await wait_until(lambda: connection.listeners)
+    await fast_bus.stop()
+
+    assert broken.pings == 1
+    assert broken.terminated
+    assert fast_bus.flushes == 2
+
+
+@pytest.mark.asyncio
+async def test_given_database_down_when_start_then_keep_retrying_in_background(
+    fast_bus, caches, connect
+):
+    connect.side_effect = OSError("refused")
+
+    await fast_bus.start(timeout=0.05)
+    retries = connect.await_count
+    await wait_until(lambda: connect.await_count > retries)
+    await fast_bus.stop()
+
+    assert fast_bus.flushes == 0
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import decode_cursor, encode_cursor
+
+
+def test_given_values_when_encode_cursor_then_decode_them_back():
+    cursor = encode_cursor("2025-02-01T10:00:00", 7)
+
+    assert decode_cursor(cursor, datetime, int) == [datetime(2025, 2, 1, 10, 0), 7]
+
+
+@pytest.mark.parametrize(
+    "cursor, types",
+    [
+        ("not-a-cursor", (int,)),
+        (encode_cursor(1, 2), (int,)),
+        ("e30=", (int,)),
+        (encode_cursor("x"), (int,)),
+        (encode_cursor(True), (int,)),
+        (encode_cursor(1.5), (int,)),
+        (encode_cursor("not a date", 7), (datetime, int)),
+        (encode_cursor(7, 7), (datetime, int)),
+        (encode_cursor("2025-02-01T10:00:00", "7"), (datetime, int)),
+    ],
+)
+def test_given_invalid_cursor_when_decode_cursor_then_raise_bad_request(cursor, types):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor, *types)
+
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "Invalid pagination cursor"
@@ -0,0 +1,142 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.room_catalog import CachedRoom, RoomCatalog
+
+
+def room(id: int, capacity: int = 10) -> CachedRoom:
+    return CachedRoom(id, f"Room {id}", capacity, "Andar 1")
+
+
+def mock_db(*rows):
+    db = MagicMock()
+    db.execute.return_value.all.return_value = list(rows)
+    return db
+
+
+@pytest.mark.asyncio
+async def test_given_room_read_once_when_get_then_serve_it_from_the_catalog():
+    catalog = RoomCatalog(max_entries=10, ttl_seconds=60)
+    db = mock_db(room(1))
+
+    assert await catalog.get(1, db) == room(1)
+    assert await catalog.get(1, db) == room(1)
+
+    db.execute.assert_called_once()
+    assert (catalog.hits, catalog.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_given_unknown_room_when_get_then_return_none_and_read_it_again():
+    catalog = RoomCatalog(max_entries=10, ttl_seconds=60)
+    db = mock_db()
+
+    assert await catalog.get(1, db) is None
+    assert await catalog.get(1, db) is None
+    assert db.execute.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_given_some_rooms_cached_when_get_many_then_read_the_rest_at_once():
+    catalog = RoomCatalog(max_entries=10, ttl_seconds=60)
+    await catalog.get(1, mock_db(room(1)))
+    db = mock_db(room(2), room(3))
+
+    rooms = await catalog.get_many([3, 1, 2, 1], db)
+
+    assert rooms == {1: room(1), 2: room(2), 3: room(3)}
+    db.execute.assert_called_once()
+    assert "room.id IN" in str(db.execute.call_args.args[0])
+
+
+@pytest.mark.asyncio
+async def test_given_warm_catalog_when_rooms_then_list_them_without_the_database():
+    catalog = RoomCatalog(max_entries=10, ttl_seconds=60)
+    await catalog.warm_up(mock_db(room(1), room(2)))
+    catalog.add(room(3))
+    db = mock_db()
+
+    assert await catalog.rooms(db) == [room(1), room(2), room(3)]
+    db.execute.assert_not_called()
+    assert catalog.snapshot()["complete"] is True
+
+
+@pytest.mark.asyncio
+async def test_given_capacity_write_when_rooms_then_read_only_that_room_again():
+    catalog = RoomCatalog(max_entries=10, ttl_seconds=60)
+    await catalog.warm_up(mock_db(room(1), room(2)))
+
+    catalog.invalidate(2)
+    db = mock_db(room(2, capacity=9))
+
+    assert await catalog.rooms(db) == [room(1), room(2, capacity=9)]
+    assert "room.id IN" in str(db.execute.call_args.args[0])
+    assert catalog.invalidations == 1
+
+
+@pytest.mark.asyncio
+async def test_given_write_while_loading_when_warm_up_then_do_not_cache_the_room():
+    catalog = RoomCatalog(max_entries=10, ttl_seconds=60)
+    db = MagicMock()
+
+    def execute(query):
+        catalog.invalidate(2)
+        return MagicMock(all=MagicMock(return_value=[room(1), room(2)]))
+
+    db.execute.side_effect = execute
+    await catalog.warm_up(db)
+
+    assert len(catalog) == 1
+    assert catalog.snapshot()["complete"] is False
+    db.execute.side_effect = None
+    db.execute.return_value.all.return_value = [room(2, capacity=9)]
+    assert await catalog.rooms(db) == [room(1), room(2, capacity=9)]
+
+
+@pytest.mark.asyncio
+async def test_given_more_rooms_than_max_entries_when_rooms_then_return_none():
+    catalog = RoomCatalog(max_entries=2, ttl_seconds=60)
+    db = mock_db(room(1), room(2), room(3))
+
+    assert await catalog.rooms(db) is None
+    assert await catalog.rooms(db) is None
+
+    db.execute.assert_called_once()
+    assert len(catalog) == 2
+
+
+@pytest.mark.asyncio
+async def test_given_full_catalog_when_add_then_evict_least_recently_used():
+    catalog = RoomCatalog(max_entries=2, ttl_seconds=60)
+    await catalog.warm_up(mock_db(room(1), room(2)))
+    await catalog.get(1, mock_db())
+
+    catalog.add(room(3))
+
+    assert await catalog.get_many([1, 3], mock_db()) == {1: room(1), 3: room(3)}
+    assert catalog.evictions == 1
+    assert await catalog.rooms(mock_db()) is None
+
+
+@pytest.mark.asyncio
+async def test_given_ttl_elapsed_when_get_then_read_the_room_again():
+    catalog = RoomCatalog(max_entries=10, ttl_seconds=60)
+    with patch("app.core.room_catalog.monotonic", return_value=1_000):
+        await catalog.get(1, mock_db(room(1)))
+
+    db = mock_db(room(1, capacity=5))
+    with patch("app.core.room_catalog.monotonic", return_value=1_061):
+        assert await catalog.get(1, db) == room(1, capacity=5)
+    db.execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_given_room_created_elsewhere_when_invalidate_then_list_it_too():
+    catalog = RoomCatalog(max_entries=10, ttl_seconds=60)
+    await catalog.warm_up(mock_db(room(1), room(2)))
+
+    catalog.invalidate(3)
+
+    assert catalog.snapshot()["complete"] is False
+    assert await catalog.rooms(mock_db(room(3))) == [room(1), room(2), room(3)]
@@ -0,0 +1,52 @@
+from unittest.mock import patch
+
+from app.core.versions import VersionCounters, etag_matches
+
+
+def test_given_room_write_when_bump_then_change_room_and_catalog_etags():
+    versions = VersionCounters(ttl_seconds=60)
+    catalog, room, other_room = (
+        versions.catalog_etag(),
+        versions.room_etag(1),
+        versions.room_etag(2),
+    )
+
+    versions.bump(1)
+
+    assert versions.catalog_etag() != catalog
+    assert versions.room_etag(1) != room
+    assert versions.room_etag(2) == other_room
+
+
+def test_given_catalog_write_when_bump_then_keep_room_etags():
+    versions = VersionCounters(ttl_seconds=60)
+    catalog, room = versions.catalog_etag(), versions.room_etag(1)
+
+    versions.bump()
+
+    assert versions.catalog_etag() != catalog
+    assert versions.room_etag(1) == room
+
+
+def test_given_another_process_when_etag_then_never_match():
+    assert VersionCounters(60).room_etag(1) != VersionCounters(60).room_etag(1)
+
+
+def test_given_ttl_elapsed_when_etag_then_roll_over():
+    versions = VersionCounters(ttl_seconds=60)
+
+    with patch("app.core.versions.monotonic", return_value=1_000):
+        etag = versions.room_etag(1)
+        assert versions.room_etag(1) == etag
+    with patch("app.core.versions.monotonic", return_value=1_080):
+        assert versions.room_etag(1) != etag
+
+
+def test_given_if_none_match_when_etag_matches_then_compare_every_listed_tag():
+    etag = '"abc-1-room-1-0"'
+
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
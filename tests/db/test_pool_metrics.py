@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import create_engine
+
+from app.db.pool_metrics import PoolMetrics, TimedQueuePool
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://", poolclass=TimedQueuePool, pool_size=1, max_overflow=1
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_given_checked_out_connections_when_snapshot_then_report_pool_usage(engine):
+    metrics = PoolMetrics(engine.pool)
+
+    first = engine.connect()
+    second = engine.connect()
+    snapshot = metrics.snapshot()
+
+    assert snapshot["pool_size"] == 1
+    assert snapshot["checked_out"] == 2
+    assert snapshot["overflow"] == 1
+    assert snapshot["connects"] == 2
+    assert snapshot["checkouts"] == 2
+
+    first.close()
+    second.close()
+    snapshot = metrics.snapshot()
+
+    assert snapshot["checked_out"] == 0
+    assert snapshot["idle"] == 1
+    assert snapshot["checkins"] == 2
+
+
+def test_given_wait_times_when_snapshot_then_return_cumulative_histogram(engine):
+    metrics = PoolMetrics(engine.pool)
+
+    metrics.observe_wait(0.0005)
+    metrics.observe_wait(0.02)
+    metrics.observe_wait(10)
+    wait_time = metrics.snapshot()["wait_time"]
+
+    assert wait_time["count"] == 3
+    assert wait_time["buckets"]["le_1ms"] == 1
+    assert wait_time["buckets"]["le_25ms"] == 2
+    assert wait_time["buckets"]["le_5000ms"] == 2
+    assert wait_time["buckets"]["le_inf"] == 3
+    assert wait_time["sum_ms"] == pytest.approx(10020.5)
+
+
+def test_given_timed_pool_when_checkout_then_observe_wait_time(engine):
+    metrics = PoolMetrics(engine.pool)
+
+    with engine.connect():
+        pass
+
+    assert metrics.snapshot()["wait_time"]["count"] == 1
@@ -0,0 +1,131 @@
+from datetime import date, datetime
+from os import getenv
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.models import Base
+from app.models.reservation import Reservation
+from app.models.room import Room
+from app.services.reservation_service import room_already_reserved_query
+from app.services.room_service import get_reservations
+
+TEST_DATABASE_URL = getenv("TEST_DATABASE_URL")
+SCHEMA = "reservation_indexes_check"
+ROOMS = 1_000
+RESERVATIONS_PER_ROOM = 1_000
+
+pytestmark = pytest.mark.skipif(
+    not TEST_DATABASE_URL,
+    reason="TEST_DATABASE_URL must point to a PostgreSQL database",
+)
+
+
+@pytest.fixture(scope="module")
+def connection():
+    engine = create_engine(TEST_DATABASE_URL)
+    with engine.connect() as connection:
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        connection.execute(text(f"SET search_path TO {SCHEMA}, public"))
+        connection.execute(text("CREATE SEQUENCE room_id_seq"))
+        Base.metadata.create_all(
+            connection, tables=[Room.__table__, Reservation.__table__]
+        )
+        connection.execute(
+            text(
+                "INSERT INTO room (name, capacity, location) "
+                "SELECT 'Room ' || n, 10, 'Andar 1' FROM generate_series(1, :rooms) n"
+            ),
+            {"rooms": ROOMS},
+        )
+        connection.execute(
+            text(
+                "INSERT INTO reservation (user_name, start_time, end_time, room_id) "
+                "SELECT 'user', slot, slot + interval '1 hour', room.id "
+                "FROM room, generate_series(1, :per_room) n, "
+                "LATERAL (SELECT timestamp '2020-01-01' + n * interval '2 hours' "
+                "AS slot) slots"
+            ),
+            {"per_room": RESERVATIONS_PER_ROOM},
+        )
+        connection.execute(text("ANALYZE room"))
+        connection.execute(text("ANALYZE reservation"))
+        connection.commit()
+
+        yield connection
+
+        connection.rollback()
+        connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+        connection.commit()
+    engine.dispose()
+
+
+def explain(connection, statement):
+    compiled = statement.compile(
+        dialect=connection.dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get("Plans", []))
+        yield node
+
+
+@pytest.mark.asyncio
+async def test_given_million_reservations_when_overlap_query_then_use_index(
+    connection,
+):
+    db = MagicMock()
+    await room_already_reserved_query(
+        datetime(2020, 3, 1, 10, 30), datetime(2020, 3, 1, 11, 30), 500, db
+    )
+    statement = db.scalar.call_args.args[0]
+
+    nodes = list(explain(connection, statement))
+
+    assert not any(node["Node Type"] == "Seq Scan" for node in nodes)
+    assert any(
+        node.get("Index Name") == "ix_reservation_room_id_end_time" for node in nodes
+    )
+
+
+@pytest.mark.asyncio
+async def test_given_million_reservations_when_room_listing_then_use_index(
+    connection,
+):
+    db = MagicMock()
+    db.scalars.return_value.all.return_value = []
+    await get_reservations(500, 10, 0, db)
+    statement = db.scalars.call_args.args[0]
+
+    nodes = list(explain(connection, statement))
+
+    assert not any(node["Node Type"] in ("Seq Scan", "Sort") for node in nodes)
+    assert not any(node.get("Relation Name") == "room" for node in nodes)
+    assert any(
+        node.get("Index Name") == "ix_reservation_room_id_start_time_id"
+        for node in nodes
+    )
+
+
+@pytest.mark.asyncio
+async def test_given_million_reservations_when_room_listing_by_date_then_use_index(
+    connection,
+):
+    db = MagicMock()
+    db.scalars.return_value.all.return_value = []
+    await get_reservations(500, 10, 0, db, day=date(2020, 3, 1))
+    statement = db.scalars.call_args.args[0]
+
+    nodes = list(explain(connection, statement))
+
+    assert not any(node["Node Type"] == "Seq Scan" for node in nodes)
+    assert all(
+        node.get("Index Name", "").startswith("ix_reservation_room_id_")
+        for node in nodes
+        if node.get("Relation Name") == "reservation"
+    )
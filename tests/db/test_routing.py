@@ -0,0 +1,159 @@
+from datetime import timedelta
+from time import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import Response
+
+from app.core.security import create_access_token
+from app.db import routing
+from app.db.routing import (
+    LAST_WRITE_COOKIE,
+    RecentWrites,
+    get_current_read_user,
+    get_read_db,
+    get_read_sessionmaker,
+    track_write,
+    wrote_recently,
+)
+from app.db.settings import next_read_sessionmaker
+from app.schemas.user import UserBase
+
+
+@pytest.fixture
+def token():
+    return create_access_token({"sub": "test_user"}, timedelta(hours=1))
+
+
+def test_given_recent_write_when_is_recent_then_return_true():
+    recent_writes = RecentWrites(window_seconds=60)
+
+    recent_writes.mark("test_user")
+
+    assert recent_writes.is_recent("test_user")
+    assert not recent_writes.is_recent("other_user")
+
+
+def test_given_expired_write_when_is_recent_then_return_false():
+    recent_writes = RecentWrites(window_seconds=0)
+
+    recent_writes.mark("test_user")
+
+    assert not recent_writes.is_recent("test_user")
+
+
+def test_given_full_store_when_mark_then_drop_expired_users():
+    recent_writes = RecentWrites(window_seconds=0, max_users=2)
+
+    recent_writes.mark("user_1")
+    recent_writes.mark("user_2")
+    recent_writes.mark("user_3")
+
+    assert list(recent_writes._writes) == ["user_3"]
+
+
+def test_given_no_replicas_when_next_read_sessionmaker_then_return_primary():
+    assert next_read_sessionmaker() is not None
+
+
+@pytest.mark.asyncio
+async def test_given_user_without_writes_when_get_read_db_then_use_replica(
+    monkeypatch, token
+):
+    replica_db = MagicMock()
+    replica_db.close = AsyncMock()
+    monkeypatch.setattr(routing, "recent_writes", RecentWrites(window_seconds=60))
+    monkeypatch.setattr(routing, "next_read_sessionmaker", lambda: lambda: replica_db)
+
+    dependency = get_read_db(token)
+    assert await dependency.__anext__() is replica_db
+    await dependency.aclose()
+
+    replica_db.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_given_user_with_recent_write_when_get_read_db_then_use_primary(
+    monkeypatch, token
+):
+    primary_db = MagicMock()
+    recent_writes = RecentWrites(window_seconds=60)
+    recent_writes.mark("test_user")
+    monkeypatch.setattr(routing, "recent_writes", recent_writes)
+    monkeypatch.setattr(routing, "AsyncSessionLocal", lambda: primary_db)
+    monkeypatch.setattr(routing, "SessionLocal", lambda: primary_db)
+    monkeypatch.setattr(routing, "next_read_sessionmaker", MagicMock())
+
+    dependency = get_read_db(token)
+    assert await dependency.__anext__() is primary_db
+    await dependency.aclose()
+
+    routing.next_read_sessionmaker.assert_not_called()
+    primary_db.close.assert_called_once()
+
+
+def test_given_user_with_recent_write_when_get_read_sessionmaker_then_use_primary(
+    monkeypatch, token
+):
+    recent_writes = RecentWrites(window_seconds=60)
+    recent_writes.mark("test_user")
+    monkeypatch.setattr(routing, "recent_writes", recent_writes)
+    monkeypatch.setattr(routing, "next_read_sessionmaker", MagicMock())
+
+    session_factory = get_read_sessionmaker(token)
+
+    assert session_factory in (routing.AsyncSessionLocal, routing.SessionLocal)
+    routing.next_read_sessionmaker.assert_not_called()
+
+
+def test_given_write_when_track_write_then_set_last_write_cookie(monkeypatch):
+    monkeypatch.setattr(routing, "recent_writes", RecentWrites(window_seconds=60))
+    response = Response()
+
+    track_write(response, "test_user")
+
+    assert response.headers["set-cookie"].startswith(f"{LAST_WRITE_COOKIE}=")
+    assert routing.recent_writes.is_recent("test_user")
+
+
+@pytest.mark.parametrize(
+    "last_write_at, expected",
+    [
+        (None, False),
+        ("not a time", False),
+        (-1, True),
+        (-3_600, False),
+        (3_600, False),
+    ],
+)
+def test_given_last_write_cookie_when_wrote_recently_then_check_window(
+    last_write_at, expected
+):
+    # Offsets from now, timestamps taken at collection could leave the window.
+    if isinstance(last_write_at, int):
+        last_write_at = str(time() + last_write_at)
+
+    assert wrote_recently(last_write_at) is expected
+
+
+def test_given_write_on_another_worker_when_get_read_sessionmaker_then_use_primary(
+    monkeypatch, token
+):
+    monkeypatch.setattr(routing, "recent_writes", RecentWrites(window_seconds=60))
+    monkeypatch.setattr(routing, "next_read_sessionmaker", MagicMock())
+
+    session_factory = get_read_sessionmaker(token, last_write_at=str(time()))
+
+    assert session_factory in (routing.AsyncSessionLocal, routing.SessionLocal)
+    routing.next_read_sessionmaker.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_given_read_db_when_get_current_read_user_then_read_user_from_it(token):
+    read_db = MagicMock()
+    read_db.scalar.return_value.username = "test_user"
+
+    user = await get_current_read_user(token, read_db)
+
+    assert user == UserBase(username="test_user")
+    read_db.scalar.assert_called_once()
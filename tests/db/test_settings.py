@@ -0,0 +1,83 @@
+from itertools import cycle
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.db import settings as db_settings
+from app.db.settings import (
+    SessionLocal,
+    get_async_db,
+    get_sync_db,
+    next_read_sessionmaker,
+    reads_replica,
+    replica_sessionmaker,
+    resolve,
+)
+
+
+@pytest.mark.asyncio
+async def test_resolve_returns_sync_results_as_is():
+    mock_db = MagicMock(spec=Session)
+    mock_db.scalar.return_value = 1
+
+    assert await resolve(mock_db.scalar("stmt")) == 1
+
+
+@pytest.mark.asyncio
+async def test_resolve_awaits_async_session_results():
+    mock_db = MagicMock(spec=AsyncSession)
+    mock_db.scalar = AsyncMock(return_value=1)
+
+    assert await resolve(mock_db.scalar("stmt")) == 1
+
+
+def test_get_sync_db_closes_session(monkeypatch):
+    mock_db = MagicMock(spec=Session)
+    monkeypatch.setattr("app.db.settings.SessionLocal", lambda: mock_db)
+
+    dependency = get_sync_db()
+    assert next(dependency) is mock_db
+    dependency.close()
+
+    mock_db.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_async_db_closes_session(monkeypatch):
+    mock_db = MagicMock(spec=AsyncSession)
+    mock_db.__aenter__ = AsyncMock(return_value=mock_db)
+    mock_db.__aexit__ = AsyncMock(return_value=None)
+    monkeypatch.setattr("app.db.settings.AsyncSessionLocal", lambda: mock_db)
+
+    dependency = get_async_db()
+    assert await dependency.__anext__() is mock_db
+    await dependency.aclose()
+
+    mock_db.__aexit__.assert_awaited_once()
+
+
+@pytest.mark.parametrize("db_async", [True, False])
+def test_given_replica_url_when_replica_sessionmaker_then_bind_a_pooled_engine(
+    monkeypatch, db_async
+):
+    monkeypatch.setattr(settings, "DB_ASYNC", db_async)
+
+    session_factory, pool = replica_sessionmaker("postgresql://u:p@replica:5432/db")
+
+    session = session_factory()
+    assert isinstance(session, AsyncSession if db_async else Session)
+    assert session.bind.url.host == "replica"
+    assert pool.size() == settings.DB_POOL_SIZE
+    assert reads_replica(session)
+    assert not reads_replica(SessionLocal())
+
+
+def test_given_replicas_when_next_read_sessionmaker_then_round_robin(monkeypatch):
+    replicas = [MagicMock(), MagicMock()]
+    monkeypatch.setattr(db_settings, "replica_sessions", replicas)
+    monkeypatch.setattr(db_settings, "_replica_cycle", cycle(replicas))
+
+    assert [next_read_sessionmaker() for _ in range(3)] == [*replicas, replicas[0]]
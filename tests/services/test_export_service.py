@@ -0,0 +1,109 @@
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.schemas.reservations import ReservationExportFormat
+from app.services.export_service import (
+    EXPORT_BATCH_SIZE,
+    export_query,
+    export_reservations,
+    to_csv,
+    to_ndjson,
+)
+
+ROWS = [
+    (1, 2, "test1", datetime(2030, 1, 1, 9, 0), datetime(2030, 1, 1, 10, 0)),
+    (3, 2, "test, 2", datetime(2030, 1, 1, 11, 0), datetime(2030, 1, 1, 12, 0)),
+]
+
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+def test_given_rows_when_to_ndjson_then_encode_one_object_per_line():
+    lines = to_ndjson(ROWS).splitlines()
+
+    assert len(lines) == 2
+    assert lines[0] == (
+        '{"id": 1, "room_id": 2, "user_name": "test1", '
+        '"start_time": "2030-01-01T09:00:00", "end_time": "2030-01-01T10:00:00"}'
+    )
+
+
+def test_given_rows_when_to_csv_then_quote_values_with_separators():
+    assert to_csv(ROWS) == (
+        "1,2,test1,2030-01-01T09:00:00,2030-01-01T10:00:00\r\n"
+        '3,2,"test, 2",2030-01-01T11:00:00,2030-01-01T12:00:00\r\n'
+    )
+
+
+def test_given_filters_when_export_query_then_filter_and_stream_in_batches():
+    query = export_query(room_id=2, user_name="test1", day=date(2030, 1, 1))
+
+    sql = str(query)
+    assert "reservation.room_id =" in sql
+    assert "reservation.user_name =" in sql
+    assert "reservation.end_time >" in sql
+    assert "reservation.start_time <" in sql
+    assert query.get_execution_options()["yield_per"] == EXPORT_BATCH_SIZE
+    assert datetime(2030, 1, 2) in query.compile().params.values()
+
+
+def test_given_empty_window_when_export_query_then_raise_400():
+    with pytest.raises(HTTPException) as exc_info:
+        export_query(start_time=datetime(2030, 1, 2), end_time=datetime(2030, 1, 1))
+
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_given_sync_session_when_export_csv_then_stream_header_and_batches():
+    db = MagicMock(spec=Session)
+    db.execute.return_value.partitions.return_value = iter([ROWS[:1], ROWS[1:]])
+
+    chunks = await collect(
+        export_reservations(export_query(), ReservationExportFormat.CSV, lambda: db)
+    )
+
+    assert chunks[0] == "id,room_id,user_name,start_time,end_time\r\n"
+    assert chunks[1:] == [to_csv(ROWS[:1]), to_csv(ROWS[1:])]
+    db.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_given_async_session_when_export_ndjson_then_stream_from_cursor():
+    async def partitions():
+        yield ROWS
+
+    db = MagicMock(spec=AsyncSession)
+    db.stream = AsyncMock()
+    db.stream.return_value.partitions = partitions
+    db.close = AsyncMock()
+
+    chunks = await collect(
+        export_reservations(export_query(), ReservationExportFormat.NDJSON, lambda: db)
+    )
+
+    assert chunks == [to_ndjson(ROWS)]
+    db.stream.assert_awaited_once()
+    db.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_given_db_error_when_export_then_close_session_and_raise():
+    db = MagicMock(spec=Session)
+    db.execute.side_effect = Exception("Database error")
+
+    with pytest.raises(Exception):
+        await collect(
+            export_reservations(
+                export_query(), ReservationExportFormat.NDJSON, lambda: db
+            )
+        )
+
+    db.close.assert_called_once()
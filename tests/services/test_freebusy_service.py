@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.freebusy_service import busy_bitmap, get_freebusy, to_bits
+
+START = datetime(2030, 1, 1, 9, 0)
+QUARTER = timedelta(minutes=15)
+
+
+def test_given_reservations_when_busy_bitmap_then_mark_overlapping_slots():
+    reservations = [
+        (1, datetime(2030, 1, 1, 9, 10), datetime(2030, 1, 1, 10, 0)),
+        (2, datetime(2030, 1, 1, 8, 0), datetime(2030, 1, 1, 9, 30)),
+        (2, datetime(2030, 1, 1, 10, 45), datetime(2030, 1, 1, 12, 0)),
+    ]
+
+    busy = busy_bitmap([1, 2, 3], reservations, START, 8, QUARTER)
+
+    assert [to_bits(row) for row in busy] == ["11110000", "11000001", "00000000"]
+
+
+def test_given_no_reservations_when_busy_bitmap_then_all_free():
+    busy = busy_bitmap([1, 2], [], START, 4, QUARTER)
+
+    assert busy.shape == (2, 4)
+    assert not busy.any()
+
+
+@pytest.mark.asyncio
+async def test_given_rooms_when_get_freebusy_then_return_bitmaps():
+    mock_db = MagicMock()
+    mock_db.execute.return_value.all.return_value = [
+        (1, datetime(2030, 1, 1, 9, 0), datetime(2030, 1, 1, 9, 30)),
+        (2, datetime(2030, 1, 1, 9, 15), datetime(2030, 1, 1, 9, 45)),
+    ]
+
+    response = await get_freebusy(
+        room_ids=[1, 2, 1],
+        start_time=START,
+        end_time=datetime(2030, 1, 1, 10, 0),
+        granularity_minutes=15,
+        db=mock_db,
+    )
+
+    assert response.slots == 4
+    assert response.busy == {1: "1100", 2: "0110"}
+    assert response.all_free == "0001"
+    assert response.any_free == "1011"
+
+
+@pytest.mark.asyncio
+async def test_given_uneven_window_when_get_freebusy_then_round_slots_up():
+    mock_db = MagicMock()
+    mock_db.execute.return_value.all.return_value = []
+
+    response = await get_freebusy(
+        room_ids=[1],
+        start_time=START,
+        end_time=datetime(2030, 1, 1, 9, 40),
+        granularity_minutes=15,
+        db=mock_db,
+    )
+
+    assert response.slots == 3
+    assert response.busy == {1: "000"}
+
+
+@pytest.mark.asyncio
+async def test_given_too_many_slots_when_get_freebusy_then_raise_bad_request():
+    mock_db = MagicMock()
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_freebusy(
+            room_ids=[1],
+            start_time=START,
+            end_time=START + timedelta(days=365),
+            granularity_minutes=1,
+            db=mock_db,
+        )
+
+    assert exc_info.value.status_code == 400
+    mock_db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_given_db_error_when_get_freebusy_then_raise_internal_error():
+    mock_db = MagicMock()
+    mock_db.execute.side_effect = Exception("Database error")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_freebusy(
+            room_ids=[1],
+            start_time=START,
+            end_time=START + timedelta(hours=1),
+            granularity_minutes=15,
+            db=mock_db,
+        )
+
+    assert exc_info.value.status_code == 500
@@ -1,19 +1,57 @@
-from datetime import datetime
-from unittest.mock import MagicMock, patch
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, call, patch
 
 import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 
+from app.config.settings import settings
+from app.core.availability_cache import AvailabilityCache
+from app.core.room_catalog import CachedRoom, RoomCatalog
 from app.models.reservation import Reservation
 from app.models.room import Room
-from app.schemas.reservations import RerservationCreateRequest
+from app.schemas.reservations import (
+    RerservationBulkRequest,
+    RerservationCreateRequest,
+)
 from app.services.reservation_service import (
+    book_reservation,
+    book_seat,
     cancel_reservation,
+    insert_seat_reservations,
     is_reservation_valid,
+    lock_room,
+    make_bulk_reservation,
+    make_recurring_reservation,
     make_reservation,
+    peak_occupancy,
     room_already_reserved_query,
+    seat_lock_keys,
 )
 
 
+@pytest.fixture(autouse=True)
+def disable_interval_index(monkeypatch):
+    monkeypatch.setattr(settings, "INTERVAL_INDEX_ENABLED", False)
+
+
+@pytest.fixture(autouse=True)
+def disable_availability_cache(monkeypatch):
+    monkeypatch.setattr(settings, "AVAILABILITY_CACHE_ENABLED", False)
+
+
+@pytest.fixture(autouse=True)
+def disable_room_catalog(monkeypatch):
+    monkeypatch.setattr(settings, "ROOM_CATALOG_ENABLED", False)
+
+
+@pytest.fixture(autouse=True)
+def disable_invalidation_bus(monkeypatch):
+    monkeypatch.setattr(settings, "INVALIDATION_BUS_ENABLED", False)
+
+
 @pytest.fixture
 def mock_current_time():
     with patch("app.services.reservation_service.datetime") as mock_datetime:
@@ -95,7 +133,8 @@ async def test_cancel_reservation_when_not_found_then_return_message():
         (datetime(2025, 2, 1, 10, 0), datetime(2025, 2, 1, 12, 0), False, None),
     ],
 )
-def test_is_reservation_valid_time_when_start_time_is_after_end_time_then_raise_error(
+@pytest.mark.asyncio
+async def test_is_reservation_valid_time_when_start_is_after_end_then_raise_error(
     mock_current_time, start_time, end_time, should_raise, expected_detail
 ):
     reservation_data = RerservationCreateRequest(
@@ -106,17 +145,17 @@ def test_is_reservation_valid_time_when_start_time_is_after_end_time_then_raise_
     )
 
     mock_db = MagicMock()
-    mock_db.query().filter().first.return_value = False
+    mock_db.scalar.return_value = False
     if should_raise:
         with pytest.raises(Exception) as exc_info:
-            is_reservation_valid(reservation_data, mock_db)
+            await is_reservation_valid(reservation_data, mock_db)
         assert exc_info.value.status_code == 400
         assert (
             exc_info.value.detail
             == "datetime not valid, start_time should be lower than end_time."
         )
     else:
-        result = is_reservation_valid(reservation_data, mock_db)
+        result = await is_reservation_valid(reservation_data, mock_db)
         assert result is True
 
 
@@ -128,7 +167,8 @@ def test_is_reservation_valid_time_when_start_time_is_after_end_time_then_raise_
         (True, 5, False, None),
     ],
 )
-def test_is_reservation_valid_room_when_room_does_not_exist_or_is_full_then_raise(
+@pytest.mark.asyncio
+async def test_is_reservation_valid_room_when_room_does_not_exist_or_is_full_then_raise(
     mock_current_time, room_exists, room_capacity, should_raise, expected_detail
 ):
     reservation_data = RerservationCreateRequest(
@@ -141,26 +181,46 @@ def test_is_reservation_valid_room_when_room_does_not_exist_or_is_full_then_rais
     mock_db = MagicMock()
     mock_room = Room(id=1, capacity=room_capacity) if room_exists else None
     mock_db.get.return_value = mock_room
-    mock_db.query().filter().first.return_value = False
+    mock_db.scalar.return_value = False
 
     if should_raise:
         with pytest.raises(Exception) as exc_info:
-            is_reservation_valid(reservation_data, mock_db)
+            await is_reservation_valid(reservation_data, mock_db)
         assert exc_info.value.detail == expected_detail
     else:
-        result = is_reservation_valid(reservation_data, mock_db)
+        result = await is_reservation_valid(reservation_data, mock_db)
         assert result is True
 
 
+@pytest.mark.asyncio
+async def test_is_reservation_valid_does_not_query_overlapping_reservations(
+    mock_current_time,
+):
+    reservation_data = RerservationCreateRequest(
+        room_id=1,
+        user_name="test1",
+        start_time=datetime(2025, 2, 1, 10, 0),
+        end_time=datetime(2025, 2, 1, 12, 0),
+    )
+
+    mock_db = MagicMock()
+
+    result = await is_reservation_valid(reservation_data, mock_db)
+
+    assert result is True
+    mock_db.scalar.assert_not_called()
+
+
 @pytest.mark.parametrize(
-    "already_reserved, should_raise, expected_detail",
+    "pgcode, status_code, expected_detail",
     [
-        (True, True, "Room already reserved for this date."),
-        (False, False, None),
+        ("23P01", 400, "Room already reserved for this date."),
+        ("23503", 500, "Error making reservation"),
     ],
 )
-def test_is_reservation_valid_already_reserved_when_room_is_alread_reserved_then_raise(
-    mock_current_time, already_reserved, should_raise, expected_detail
+@pytest.mark.asyncio
+async def test_make_reservation_when_insert_violates_constraint_then_raise(
+    pgcode, status_code, expected_detail
 ):
     reservation_data = RerservationCreateRequest(
         room_id=1,
@@ -170,15 +230,17 @@ def test_is_reservation_valid_already_reserved_when_room_is_alread_reserved_then
     )
 
     mock_db = MagicMock()
-    mock_db.query().filter().first.return_value = already_reserved
+    mock_db.get.return_value = Room(id=1, capacity=5)
+    orig = Exception("constraint violation")
+    orig.pgcode = pgcode
+    mock_db.commit.side_effect = IntegrityError("INSERT", {}, orig)
 
-    if should_raise:
-        with pytest.raises(Exception) as exc_info:
-            is_reservation_valid(reservation_data, mock_db)
-        assert exc_info.value.detail == expected_detail
-    else:
-        result = is_reservation_valid(reservation_data, mock_db)
-        assert result is True
+    with pytest.raises(HTTPException) as exc_info:
+        await make_reservation(reservation_data, mock_db)
+
+    assert exc_info.value.status_code == status_code
+    assert exc_info.value.detail == expected_detail
+    mock_db.rollback.assert_called_once()
 
 
 @pytest.mark.parametrize(
@@ -192,7 +254,8 @@ def test_is_reservation_valid_already_reserved_when_room_is_alread_reserved_then
         ),
     ],
 )
-def test_is_reservation_valid_start_time_when_start_time_is_before_now_then_raise(
+@pytest.mark.asyncio
+async def test_is_reservation_valid_start_time_when_start_time_is_before_now_then_raise(
     mock_current_time, start_time, should_raise, expected_detail
 ):
     reservation_data = RerservationCreateRequest(
@@ -203,14 +266,14 @@ def test_is_reservation_valid_start_time_when_start_time_is_before_now_then_rais
     )
 
     mock_db = MagicMock()
-    mock_db.query().filter().first.return_value = False
+    mock_db.scalar.return_value = False
 
     if should_raise:
         with pytest.raises(Exception) as exc_info:
-            is_reservation_valid(reservation_data, mock_db)
+            await is_reservation_valid(reservation_data, mock_db)
         assert exc_info.value.detail == expected_detail
     else:
-        result = is_reservation_valid(reservation_data, mock_db)
+        result = await is_reservation_valid(reservation_data, mock_db)
         assert result is True
 
 
@@ -241,7 +304,6 @@ async def test_make_reservation_when_success_then_return_reservation_details():
 
         mock_db.add = MagicMock()
         mock_db.commit = MagicMock()
-        mock_db.refresh = MagicMock()
 
         response = await make_reservation(reservation_data, mock_db)
 
@@ -250,7 +312,7 @@ async def test_make_reservation_when_success_then_return_reservation_details():
         assert mock_room.capacity == 4
         mock_db.add.assert_called_once_with(mock_reservation)
         mock_db.commit.assert_called_once()
-        mock_db.refresh.assert_called_once()
+        mock_db.refresh.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -260,8 +322,900 @@ async def test_room_already_reserved_query_when_room_is_reserved_then_return_it(
 
     mock_db = MagicMock()
     mock_reserved = Reservation(room_id=1, start_time=start_time, end_time=end_time)
-    mock_db.query().filter().first.return_value = mock_reserved
+    mock_db.scalar.return_value = mock_reserved
 
-    result = room_already_reserved_query(start_time, end_time, 1, mock_db)
+    result = await room_already_reserved_query(start_time, end_time, 1, mock_db)
 
     assert result == mock_reserved
+
+
+@pytest.mark.asyncio
+async def test_make_reservation_when_async_session_then_await_db_calls():
+    reservation_data = RerservationCreateRequest(
+        room_id=1,
+        user_name="test1",
+        start_time=datetime(2025, 2, 1, 10, 0),
+        end_time=datetime(2025, 2, 1, 12, 0),
+    )
+
+    mock_db = MagicMock()
+    mock_room = Room(id=1, capacity=5)
+    mock_db.get = AsyncMock(return_value=mock_room)
+    mock_db.commit = AsyncMock()
+
+    with patch(
+        "app.services.reservation_service.ReservationModel"
+    ) as mock_reservation_model:
+        mock_reservation = MagicMock()
+        mock_reservation.__dict__.update(id=1, **reservation_data.model_dump())
+        mock_reservation_model.return_value = mock_reservation
+
+        response = await make_reservation(reservation_data, mock_db)
+
+    assert response.id == 1
+    assert mock_room.capacity == 4
+    mock_db.get.assert_awaited_once()
+    mock_db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_is_reservation_valid_when_interval_index_has_overlap_then_raise(
+    mock_current_time, monkeypatch
+):
+    monkeypatch.setattr(settings, "INTERVAL_INDEX_ENABLED", True)
+    mock_index = MagicMock()
+    mock_index.overlaps = AsyncMock(return_value=True)
+    monkeypatch.setattr("app.services.reservation_service.interval_index", mock_index)
+    reservation_data = RerservationCreateRequest(
+        room_id=1,
+        user_name="test1",
+        start_time=datetime(2025, 2, 1, 10, 0),
+        end_time=datetime(2025, 2, 1, 12, 0),
+    )
+
+    with pytest.raises(HTTPException) as exc_info:
+        await is_reservation_valid(reservation_data, MagicMock())
+
+    assert exc_info.value.detail == "Room already reserved for this date."
+
+
+@pytest.mark.asyncio
+async def test_make_reservation_when_cached_window_then_invalidate_it(monkeypatch):
+    cache = AvailabilityCache(slot_minutes=5, max_entries=100, ttl_seconds=60)
+    monkeypatch.setattr("app.services.reservation_service.availability_cache", cache)
+    reservation_data = RerservationCreateRequest(
+        room_id=1,
+        user_name="test1",
+        start_time=datetime(2025, 2, 1, 10, 0),
+        end_time=datetime(2025, 2, 1, 12, 0),
+    )
+    cache.set(1, datetime(2025, 2, 1, 11, 0), datetime(2025, 2, 1, 13, 0), False, 0)
+    cache.set(1, datetime(2025, 2, 1, 12, 0), datetime(2025, 2, 1, 13, 0), False, 0)
+
+    mock_db = MagicMock()
+    mock_db.get.return_value = Room(id=1, capacity=5)
+    with patch(
+        "app.services.reservation_service.ReservationModel"
+    ) as mock_reservation_model:
+        mock_reservation = MagicMock()
+        mock_reservation.__dict__.update(id=1, **reservation_data.model_dump())
+        mock_reservation_model.return_value = mock_reservation
+
+        await make_reservation(reservation_data, mock_db)
+
+    assert len(cache) == 1
+    assert (
+        cache.get(1, datetime(2025, 2, 1, 12, 0), datetime(2025, 2, 1, 13, 0)) is False
+    )
+
+
+@pytest.mark.asyncio
+async def test_is_reservation_valid_when_cached_as_reserved_then_raise(
+    mock_current_time, monkeypatch
+):
+    monkeypatch.setattr(settings, "AVAILABILITY_CACHE_ENABLED", True)
+    cache = AvailabilityCache(slot_minutes=5, max_entries=100, ttl_seconds=60)
+    monkeypatch.setattr("app.services.reservation_service.availability_cache", cache)
+    reservation_data = RerservationCreateRequest(
+        room_id=1,
+        user_name="test1",
+        start_time=datetime(2025, 2, 1, 10, 0),
+        end_time=datetime(2025, 2, 1, 12, 0),
+    )
+    cache.set(1, reservation_data.start_time, reservation_data.end_time, True, 0)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await is_reservation_valid(reservation_data, MagicMock())
+
+    assert exc_info.value.detail == "Room already reserved for this date."
+
+
+@pytest.mark.parametrize(
+    "recurrence, expected_days",
+    [
+        ({"frequency": "daily", "interval": 2, "count": 3}, [5, 7, 9]),
+        (
+            {"frequency": "weekly", "weekdays": [0, 2], "until": "2025-02-17"},
+            [5, 10, 12, 17],
+        ),
+        ({"frequency": "weekly", "interval": 2, "count": 3}, [5, 19, 5]),
+        ({"frequency": "weekdays", "interval": 2, "count": 3}, [5, 7, 11]),
+    ],
+)
+def test_occurrences_when_recurrence_then_expand_series(recurrence, expected_days):
+    reservation_data = RerservationCreateRequest(
+        room_id=1,
+        user_name="test1",
+        start_time=datetime(2025, 2, 5, 10, 0),
+        end_time=datetime(2025, 2, 5, 11, 0),
+        recurrence=recurrence,
+    )
+
+    occurrences = reservation_data.occurrences()
+
+    assert [start.day for start, _ in occurrences] == expected_days
+    assert all(end - start == timedelta(hours=1) for start, end in occurrences)
+
+
+def test_occurrences_when_recurrence_is_too_long_then_raise_validation_error():
+    with pytest.raises(ValidationError):
+        RerservationCreateRequest(
+            room_id=1,
+            user_name="test1",
+            start_time=datetime(2025, 2, 5, 10, 0),
+            end_time=datetime(2025, 2, 5, 11, 0),
+            recurrence={"frequency": "daily", "until": "2030-01-01"},
+        )
+
+
+@pytest.mark.asyncio
+async def test_make_recurring_reservation_when_conflicts_then_book_the_rest():
+    reservation_data = RerservationCreateRequest(
+        room_id=1,
+        user_name="test1",
+        start_time=datetime(2025, 2, 5, 10, 0),
+        end_time=datetime(2025, 2, 5, 11, 0),
+        recurrence={"frequency": "weekly", "count": 3},
+    )
+    mock_db = MagicMock()
+    mock_room = Room(id=1, capacity=5)
+    mock_db.get.return_value = mock_room
+    mock_db.execute.return_value.all.return_value = [
+        (7, 1, datetime(2025, 2, 19, 10, 0), datetime(2025, 2, 19, 11, 0)),
+        (6, 1, datetime(2025, 2, 5, 10, 0), datetime(2025, 2, 5, 11, 0)),
+    ]
+
+    response = await make_recurring_reservation(reservation_data, mock_db)
+
+    assert [reservation.id for reservation in response.reservations] == [6, 7]
+    assert [conflict.start_time.day for conflict in response.conflicts] == [12]
+    assert mock_room.capacity == 3
+    mock_db.execute.assert_called_once()
+    mock_db.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_make_recurring_reservation_when_capacity_is_short_then_raise():
+    reservation_data = RerservationCreateRequest(
+        room_id=1,
+        user_name="test1",
+        start_time=datetime(2025, 2, 5, 10, 0),
+        end_time=datetime(2025, 2, 5, 11, 0),
+        recurrence={"frequency": "daily", "count": 3},
+    )
+    mock_db = MagicMock()
+    mock_db.get.return_value = Room(id=1, capacity=2)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await make_recurring_reservation(reservation_data, mock_db)
+
+    assert exc_info.value.status_code == 400
+    mock_db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_make_recurring_reservation_when_db_error_then_raise_internal_error():
+    reservation_data = RerservationCreateRequest(
+        room_id=1,
+        user_name="test1",
+        start_time=datetime(2025, 2, 5, 10, 0),
+        end_time=datetime(2025, 2, 5, 11, 0),
+        recurrence={"frequency": "daily", "count": 3},
+    )
+    mock_db = MagicMock()
+    mock_db.get.return_value = Room(id=1, capacity=5)
+    mock_db.execute.side_effect = Exception("Database error")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await make_recurring_reservation(reservation_data, mock_db)
+
+    assert exc_info.value.status_code == 500
+
+
+def bulk_item(room_id: int, day: int, hour: int) -> dict:
+    return {
+        "room_id": room_id,
+        "user_name": "test1",
+        "start_time": datetime(2030, 2, day, hour, 0),
+        "end_time": datetime(2030, 2, day, hour + 1, 0),
+    }
+
+
+@pytest.mark.asyncio
+async def test_make_bulk_reservation_when_best_effort_then_book_valid_items():
+    bulk_data = RerservationBulkRequest(
+        reservations=[
+            bulk_item(1, 1, 10),
+            bulk_item(1, 1, 10),
+            bulk_item(2, 1, 10),
+            bulk_item(1, 1, 12),
+        ],
+        mode="best_effort",
+    )
+    mock_db = MagicMock()
+    mock_room = Room(id=1, capacity=5)
+    mock_db.scalars.return_value.all.return_value = [mock_room]
+    mock_db.execute.return_value.all.return_value = [
+        (10, 1, datetime(2030, 2, 1, 10, 0), datetime(2030, 2, 1, 11, 0)),
+    ]
+
+    response = await make_bulk_reservation(bulk_data, mock_db)
+
+    assert response.booked == 1
+    assert response.results[0].reservation.id == 10
+    assert [result.error for result in response.results[1:]] == [
+        "Room already reserved for this date.",
+        "Room does not exists.",
+        "Room already reserved for this date.",
+    ]
+    assert mock_room.capacity == 4
+    mock_db.execute.assert_called_once()
+    mock_db.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_make_bulk_reservation_when_best_effort_conflict_then_leave_capacity():
+    bulk_data = RerservationBulkRequest(
+        reservations=[bulk_item(1, 1, 10), bulk_item(1, 2, 10)],
+        mode="best_effort",
+    )
+    mock_db = MagicMock()
+    mock_room = Room(id=1, capacity=1)
+    mock_db.scalars.return_value.all.return_value = [mock_room]
+    mock_db.execute.return_value.all.return_value = [
+        (11, 1, datetime(2030, 2, 2, 10, 0), datetime(2030, 2, 2, 11, 0)),
+    ]
+
+    response = await make_bulk_reservation(bulk_data, mock_db)
+
+    assert response.booked == 1
+    assert response.results[0].error == "Room already reserved for this date."
+    assert response.results[1].reservation.id == 11
+    assert mock_room.capacity == 0
+    mock_db.execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_make_bulk_reservation_when_best_effort_over_capacity_then_delete_rest():
+    bulk_data = RerservationBulkRequest(
+        reservations=[bulk_item(1, 1, 10), bulk_item(1, 2, 10)],
+        mode="best_effort",
+    )
+    mock_db = MagicMock()
+    mock_room = Room(id=1, capacity=1)
+    mock_db.scalars.return_value.all.return_value = [mock_room]
+    mock_db.execute.return_value.all.return_value = [
+        (10, 1, datetime(2030, 2, 1, 10, 0), datetime(2030, 2, 1, 11, 0)),
+        (11, 1, datetime(2030, 2, 2, 10, 0), datetime(2030, 2, 2, 11, 0)),
+    ]
+
+    response = await make_bulk_reservation(bulk_data, mock_db)
+
+    assert response.booked == 1
+    assert response.results[0].reservation.id == 10
+    assert response.results[1].error == "Room capacity is already full."
+    assert mock_room.capacity == 0
+    assert mock_db.execute.call_count == 2
+    assert mock_db.execute.call_args.args[0].compile().params == {"id_1": [11]}
+
+
+@pytest.mark.asyncio
+async def test_make_bulk_reservation_when_atomic_and_conflict_then_rollback():
+    bulk_data = RerservationBulkRequest(
+        reservations=[bulk_item(1, 1, 10), bulk_item(1, 2, 10)]
+    )
+    mock_db = MagicMock()
+    mock_room = Room(id=1, capacity=5)
+    mock_db.scalars.return_value.all.return_value = [mock_room]
+    mock_db.execute.return_value.all.return_value = [
+        (10, 1, datetime(2030, 2, 1, 10, 0), datetime(2030, 2, 1, 11, 0)),
+    ]
+
+    response = await make_bulk_reservation(bulk_data, mock_db)
+
+    assert response.booked == 0
+    assert [result.error for result in response.results] == [
+        "Not booked, another reservation of the request failed.",
+        "Room already reserved for this date.",
+    ]
+    assert mock_room.capacity == 5
+    mock_db.rollback.assert_called_once()
+    mock_db.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_make_bulk_reservation_when_atomic_and_room_full_then_skip_insert():
+    bulk_data = RerservationBulkRequest(
+        reservations=[bulk_item(1, 1, 10), bulk_item(1, 2, 10)]
+    )
+    mock_db = MagicMock()
+    mock_db.scalars.return_value.all.return_value = [Room(id=1, capacity=1)]
+
+    response = await make_bulk_reservation(bulk_data, mock_db)
+
+    assert response.booked == 0
+    assert response.results[1].error == "Room capacity is already full."
+    mock_db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_make_bulk_reservation_when_db_error_then_raise_internal_error():
+    bulk_data = RerservationBulkRequest(reservations=[bulk_item(1, 1, 10)])
+    mock_db = MagicMock()
+    mock_db.scalars.side_effect = Exception("Database error")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await make_bulk_reservation(bulk_data, mock_db)
+
+    assert exc_info.value.status_code == 500
+
+
+def booking_request() -> RerservationCreateRequest:
+    return RerservationCreateRequest(
+        room_id=1,
+        user_name="test1",
+        start_time=datetime(2030, 2, 1, 10, 0),
+        end_time=datetime(2030, 2, 1, 12, 0),
+    )
+
+
+@pytest.mark.asyncio
+async def test_book_reservation_when_booked_then_use_a_single_statement():
+    mock_db = MagicMock()
+    mock_db.execute.return_value.first.return_value = MagicMock(
+        id=5,
+        _mapping={
+            "id": 5,
+            "room_id": 1,
+            "user_name": "test1",
+            "start_time": datetime(2030, 2, 1, 10, 0),
+            "end_time": datetime(2030, 2, 1, 12, 0),
+        },
+    )
+
+    response = await book_reservation(booking_request(), mock_db)
+
+    assert response.id == 5
+    mock_db.execute.assert_called_once()
+    mock_db.get.assert_not_called()
+    mock_db.scalar.assert_not_called()
+    mock_db.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_book_reservation_when_room_not_in_interval_index_then_skip_loading(
+    monkeypatch,
+):
+    monkeypatch.setattr(settings, "INTERVAL_INDEX_ENABLED", True)
+    mock_index = MagicMock()
+    mock_index.loaded_overlaps.return_value = None
+    monkeypatch.setattr("app.services.reservation_service.interval_index", mock_index)
+    mock_db = MagicMock()
+    mock_db.execute.return_value.first.return_value = MagicMock(
+        id=5,
+        _mapping={
+            "id": 5,
+            "room_id": 1,
+            "user_name": "test1",
+            "start_time": datetime(2030, 2, 1, 10, 0),
+            "end_time": datetime(2030, 2, 1, 12, 0),
+        },
+    )
+
+    response = await book_reservation(booking_request(), mock_db)
+
+    assert response.id == 5
+    mock_index.overlaps.assert_not_called()
+    mock_db.execute.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "capacity, detail",
+    [
+        (None, "Room does not exists."),
+        (0, "Room capacity is already full."),
+        (3, "Room already reserved for this date."),
+    ],
+)
+@pytest.mark.asyncio
+async def test_book_reservation_when_nothing_booked_then_raise_reason(capacity, detail):
+    mock_db = MagicMock()
+    mock_db.execute.return_value.first.return_value = None
+    mock_db.scalar.return_value = capacity
+
+    with pytest.raises(HTTPException) as exc_info:
+        await book_reservation(booking_request(), mock_db)
+
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == detail
+    mock_db.rollback.assert_called_once()
+    mock_db.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_book_reservation_when_insert_violates_constraint_then_raise():
+    mock_db = MagicMock()
+    mock_db.execute.side_effect = IntegrityError(
+        "INSERT", {}, MagicMock(pgcode="23P01")
+    )
+
+    with pytest.raises(HTTPException) as exc_info:
+        await book_reservation(booking_request(), mock_db)
+
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "Room already reserved for this date."
+    mock_db.rollback.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_book_reservation_when_start_is_in_the_past_then_skip_database():
+    mock_db = MagicMock()
+    reservation_data = booking_request()
+    reservation_data.start_time = datetime(2020, 2, 1, 10, 0)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await book_reservation(reservation_data, mock_db)
+
+    assert exc_info.value.status_code == 400
+    mock_db.execute.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "strategy, executes, with_for_update",
+    [
+        ("atomic", 0, False),
+        ("for_update", 0, True),
+        ("advisory", 1, False),
+        ("optimistic", 0, False),
+    ],
+)
+@pytest.mark.asyncio
+async def test_lock_room_when_strategy_then_lock_and_reload_room(
+    monkeypatch, strategy, executes, with_for_update
+):
+    monkeypatch.setattr(settings, "BOOKING_LOCK_STRATEGY", strategy)
+    mock_db = MagicMock()
+
+    await lock_room(1, mock_db)
+
+    assert mock_db.execute.call_count == executes
+    mock_db.get.assert_called_once_with(
+        Room, 1, populate_existing=True, with_for_update=with_for_update
+    )
+
+
+@pytest.mark.asyncio
+async def test_make_reservation_when_optimistic_and_stale_then_retry(monkeypatch):
+    monkeypatch.setattr(settings, "BOOKING_LOCK_STRATEGY", "optimistic")
+    mock_db = MagicMock()
+    mock_room = Room(id=1, capacity=5)
+    mock_db.get.return_value = mock_room
+    mock_db.commit.side_effect = [StaleDataError(), None]
+
+    with patch(
+        "app.services.reservation_service.ReservationModel"
+    ) as mock_reservation_model:
+        mock_reservation = MagicMock()
+        mock_reservation.__dict__.update(id=1, **booking_request().model_dump())
+        mock_reservation_model.return_value = mock_reservation
+
+        response = await make_reservation(booking_request(), mock_db)
+
+    assert response.id == 1
+    assert mock_db.commit.call_count == 2
+    mock_db.rollback.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_make_reservation_when_optimistic_retries_run_out_then_raise_409(
+    monkeypatch,
+):
+    monkeypatch.setattr(settings, "BOOKING_LOCK_STRATEGY", "optimistic")
+    monkeypatch.setattr(settings, "BOOKING_OPTIMISTIC_RETRIES", 2)
+    mock_db = MagicMock()
+    mock_db.get.return_value = Room(id=1, capacity=5)
+    mock_db.commit.side_effect = StaleDataError()
+
+    with pytest.raises(HTTPException) as exc_info:
+        await make_reservation(booking_request(), mock_db)
+
+    assert exc_info.value.status_code == 409
+    assert mock_db.commit.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_cancel_reservation_when_atomic_then_increment_capacity_in_sql():
+    mock_db = MagicMock()
+    mock_reservation = Reservation(
+        id=1,
+        room_id=1,
+        user_name="test1",
+        start_time=datetime(2030, 2, 1, 10, 0),
+        end_time=datetime(2030, 2, 1, 12, 0),
+    )
+    mock_db.get.return_value = mock_reservation
+
+    response = await cancel_reservation(1, "test1", mock_db)
+
+    assert response == {"message": "Reservation cancelled successfully."}
+    mock_db.get.assert_called_once_with(Reservation, 1)
+    mock_db.execute.assert_called_once()
+    mock_db.delete.assert_called_once_with(mock_reservation)
+
+
+@pytest.mark.asyncio
+async def test_cancel_reservation_when_for_update_then_lock_room(monkeypatch):
+    monkeypatch.setattr(settings, "BOOKING_LOCK_STRATEGY", "for_update")
+    mock_db = MagicMock()
+    mock_room = Room(id=1, capacity=5)
+    mock_reservation = Reservation(
+        id=1,
+        room_id=1,
+        user_name="test1",
+        start_time=datetime(2030, 2, 1, 10, 0),
+        end_time=datetime(2030, 2, 1, 12, 0),
+    )
+    mock_db.get.side_effect = [mock_reservation, mock_room]
+
+    await cancel_reservation(1, "test1", mock_db)
+
+    assert mock_room.capacity == 6
+    mock_db.get.assert_called_with(
+        Room, 1, populate_existing=True, with_for_update=True
+    )
+
+
+@pytest.mark.asyncio
+async def test_cancel_reservation_when_optimistic_conflict_then_read_it_again(
+    monkeypatch,
+):
+    monkeypatch.setattr(settings, "BOOKING_LOCK_STRATEGY", "optimistic")
+    mock_db = MagicMock()
+    reservations = [
+        Reservation(
+            id=1,
+            room_id=1,
+            user_name="test1",
+            start_time=datetime(2030, 2, 1, 10, 0),
+            end_time=datetime(2030, 2, 1, 12, 0),
+        )
+        for _ in range(2)
+    ]
+    mock_db.get.side_effect = [
+        reservations[0],
+        Room(id=1, capacity=5),
+        reservations[1],
+        Room(id=1, capacity=5),
+    ]
+    mock_db.commit.side_effect = [StaleDataError(), None]
+    # Like an expired instance, the first copy can't be read after a rollback.
+    mock_db.rollback.side_effect = lambda: reservations[0].__dict__.clear()
+
+    response = await cancel_reservation(1, "test1", mock_db)
+
+    assert response == {"message": "Reservation cancelled successfully."}
+    assert mock_db.get.call_args_list[2] == call(Reservation, 1)
+    assert mock_db.get.call_args_list[3].args == (Room, 1)
+    assert mock_db.delete.call_args_list == [
+        call(reservations[0]),
+        call(reservations[1]),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_cancel_reservation_when_cancelled_during_retry_then_return_not_found(
+    monkeypatch,
+):
+    monkeypatch.setattr(settings, "BOOKING_LOCK_STRATEGY", "optimistic")
+    mock_db = MagicMock()
+    mock_db.get.side_effect = [
+        Reservation(
+            id=1,
+            room_id=1,
+            user_name="test1",
+            start_time=datetime(2030, 2, 1, 10, 0),
+            end_time=datetime(2030, 2, 1, 12, 0),
+        ),
+        Room(id=1, capacity=5),
+        None,
+    ]
+    mock_db.commit.side_effect = StaleDataError()
+
+    response = await cancel_reservation(1, "test1", mock_db)
+
+    assert response == {"message": "Reservation not found"}
+    mock_db.commit.assert_called_once()
+
+
+@pytest.fixture
+def seat_mode(monkeypatch):
+    monkeypatch.setattr(settings, "BOOKING_MODE", "seat")
+
+
+@pytest.mark.asyncio
+async def test_book_seat_when_seat_is_free_then_insert_without_updating_room(
+    seat_mode,
+):
+    mock_db = MagicMock()
+    counted, inserted = MagicMock(), MagicMock()
+    counted.all.return_value = [(0, 2)]
+    inserted.all.return_value = [
+        (7, 1, datetime(2030, 2, 1, 10, 0), datetime(2030, 2, 1, 12, 0))
+    ]
+    mock_db.execute.side_effect = [MagicMock(), counted, inserted]
+
+    response = await book_seat(booking_request(), mock_db)
+
+    assert response.id == 7
+    assert mock_db.execute.call_count == 3
+    mock_db.get.assert_not_called()
+    mock_db.commit.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "room, detail",
+    [
+        (None, "Room does not exists."),
+        (Room(id=1, capacity=2), "Room capacity is already full."),
+    ],
+)
+@pytest.mark.asyncio
+async def test_book_seat_when_nothing_booked_then_raise_reason(seat_mode, room, detail):
+    mock_db = MagicMock()
+    mock_db.execute.return_value.all.return_value = []
+    mock_db.get.return_value = room
+
+    with pytest.raises(HTTPException) as exc_info:
+        await book_seat(booking_request(), mock_db)
+
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == detail
+    assert mock_db.execute.call_count == 2
+    mock_db.rollback.assert_called_once()
+    mock_db.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_insert_seat_reservations_when_rows_overlap_then_count_earlier_rows():
+    mock_db = MagicMock()
+    mock_db.execute.return_value.all.side_effect = [[(0, 1), (1, 1), (2, 1)], []]
+    rows = [
+        {
+            "room_id": 1,
+            "user_name": user_name,
+            "start_time": datetime(2030, 2, 1, hour, 0),
+            "end_time": datetime(2030, 2, 1, hour + 2, 0),
+        }
+        for user_name, hour in [("first", 10), ("second", 11), ("third", 12)]
+    ]
+
+    await insert_seat_reservations(rows, mock_db)
+
+    params = mock_db.execute.call_args.args[0].compile().params
+    user_names = [value for key, value in params.items() if "user_name" in key]
+    assert user_names == ["first", "third"]
+    assert all(value is False for key, value in params.items() if "exclusive" in key)
+
+
+@pytest.mark.parametrize(
+    "start_hour, end_hour, expected_peak",
+    [(9.5, 11.5, 1), (9, 11.5, 1), (10, 11, 0), (9, 12, 2)],
+)
+def test_peak_occupancy_when_windows_overlap_then_count_them_at_once(
+    start_hour, end_hour, expected_peak
+):
+    def at(hour: float) -> datetime:
+        return datetime(2030, 2, 1) + timedelta(hours=hour)
+
+    windows = [(at(9), at(10)), (at(11), at(12)), (at(12), at(14)), (at(11.5), at(13))]
+
+    peak = peak_occupancy(windows, at(start_hour), at(end_hour))
+
+    assert peak == expected_peak
+
+
+def test_seat_lock_keys_when_rows_span_hours_then_lock_each_room_hour_once():
+    rows = [
+        {
+            "room_id": room_id,
+            "start_time": datetime(1, 1, 1, start_hour, 30),
+            "end_time": datetime(1, 1, 1, end_hour, 0),
+        }
+        for room_id, start_hour, end_hour in [(2, 1, 3), (1, 2, 3), (2, 2, 4)]
+    ]
+
+    keys = seat_lock_keys(rows)
+
+    assert keys == [1 << 32 | 2, 2 << 32 | 1, 2 << 32 | 2, 2 << 32 | 3]
+
+
+@pytest.mark.asyncio
+async def test_cancel_reservation_when_seat_mode_then_leave_capacity(seat_mode):
+    mock_db = MagicMock()
+    mock_reservation = Reservation(
+        id=1,
+        room_id=1,
+        user_name="test1",
+        start_time=datetime(2030, 2, 1, 10, 0),
+        end_time=datetime(2030, 2, 1, 12, 0),
+    )
+    mock_db.get.return_value = mock_reservation
+
+    await cancel_reservation(1, "test1", mock_db)
+
+    mock_db.execute.assert_not_called()
+    mock_db.delete.assert_called_once_with(mock_reservation)
+    mock_db.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_cancel_reservation_when_committed_then_bump_room_version():
+    mock_db = MagicMock()
+    mock_db.get.return_value = Reservation(
+        id=1,
+        room_id=4,
+        user_name="test1",
+        start_time=datetime(2030, 2, 1, 10, 0),
+        end_time=datetime(2030, 2, 1, 12, 0),
+    )
+
+    with patch("app.services.reservation_service.versions") as mock_versions:
+        await cancel_reservation(1, "test1", mock_db)
+
+    mock_versions.bump.assert_called_once_with(4)
+
+
+@pytest.mark.asyncio
+async def test_book_seat_when_room_is_cached_then_read_full_reason_from_catalog(
+    seat_mode, monkeypatch
+):
+    monkeypatch.setattr(settings, "ROOM_CATALOG_ENABLED", True)
+    catalog = RoomCatalog(max_entries=10, ttl_seconds=60)
+    catalog.add(CachedRoom(1, "Room 1", 2, "Andar 1"))
+    monkeypatch.setattr("app.services.reservation_service.room_catalog", catalog)
+    mock_db = MagicMock()
+    mock_db.execute.return_value.all.return_value = []
+
+    with pytest.raises(HTTPException) as exc_info:
+        await book_seat(booking_request(), mock_db)
+
+    assert exc_info.value.detail == "Room capacity is already full."
+    assert mock_db.execute.call_count == 2
+    mock_db.get.assert_not_called()
+    assert catalog.hits == 1
+
+
+@pytest.mark.parametrize("mode, cached", [("room", False), ("seat", True)])
+@pytest.mark.asyncio
+async def test_cancel_reservation_when_capacity_written_then_drop_cached_room(
+    monkeypatch, mode, cached
+):
+    monkeypatch.setattr(settings, "BOOKING_MODE", mode)
+    catalog = RoomCatalog(max_entries=10, ttl_seconds=60)
+    catalog.add(CachedRoom(1, "Room 1", 2, "Andar 1"))
+    monkeypatch.setattr("app.services.reservation_service.room_catalog", catalog)
+    mock_db = MagicMock()
+    mock_db.get.return_value = Reservation(
+        id=1,
+        room_id=1,
+        user_name="test1",
+        start_time=datetime(2030, 2, 1, 10, 0),
+        end_time=datetime(2030, 2, 1, 12, 0),
+    )
+
+    await cancel_reservation(1, "test1", mock_db)
+
+    assert (len(catalog) == 1) is cached
+
+
+@pytest.mark.asyncio
+async def test_book_reservation_when_bus_enabled_then_notify_from_the_insert(
+    monkeypatch,
+):
+    monkeypatch.setattr(settings, "INVALIDATION_BUS_ENABLED", True)
+    mock_db = MagicMock()
+    mock_db.execute.return_value.first.return_value = MagicMock(
+        id=5,
+        _mapping={
+            "id": 5,
+            "room_id": 1,
+            "user_name": "test1",
+            "start_time": datetime(2030, 2, 1, 10, 0),
+            "end_time": datetime(2030, 2, 1, 12, 0),
+        },
+    )
+
+    await book_reservation(booking_request(), mock_db)
+
+    assert [call[0] for call in mock_db.mock_calls if "." not in call[0]] == [
+        "execute",
+        "commit",
+    ]
+    statement = str(mock_db.execute.call_args.args[0])
+    assert "INSERT INTO reservation" in statement
+    assert "pg_notify" in statement.split("RETURNING")[-1]
+
+
+@pytest.mark.asyncio
+async def test_cancel_reservation_when_atomic_and_bus_enabled_then_notify_from_update(
+    monkeypatch,
+):
+    monkeypatch.setattr(settings, "INVALIDATION_BUS_ENABLED", True)
+    mock_db = MagicMock()
+    mock_db.get.return_value = Reservation(
+        id=1,
+        room_id=1,
+        user_name="test1",
+        start_time=datetime(2030, 2, 1, 10, 0),
+        end_time=datetime(2030, 2, 1, 12, 0),
+    )
+
+    await cancel_reservation(1, "test1", mock_db)
+
+    mock_db.execute.assert_called_once()
+    statement = str(mock_db.execute.call_args.args[0])
+    assert statement.startswith("UPDATE room")
+    assert "pg_notify" in statement.split("RETURNING")[-1]
+
+
+@pytest.mark.asyncio
+async def test_cancel_reservation_when_bus_enabled_then_notify_the_freed_window(
+    monkeypatch,
+):
+    monkeypatch.setattr(settings, "BOOKING_MODE", "seat")
+    monkeypatch.setattr(settings, "INVALIDATION_BUS_ENABLED", True)
+    mock_db = MagicMock()
+    mock_db.get.return_value = Reservation(
+        id=1,
+        room_id=1,
+        user_name="test1",
+        start_time=datetime(2030, 2, 1, 10, 0),
+        end_time=datetime(2030, 2, 1, 12, 0),
+    )
+
+    with patch("app.core.invalidation_bus.invalidation_bus.notify") as mock_notify:
+        await cancel_reservation(1, "test1", mock_db)
+
+    mock_notify.assert_awaited_once_with(
+        [(1, datetime(2030, 2, 1, 10, 0), datetime(2030, 2, 1, 12, 0))], mock_db
+    )
+
+
+@pytest.mark.asyncio
+async def test_make_reservation_when_aware_times_then_store_them_as_naive_utc():
+    reservation_data = RerservationCreateRequest(
+        room_id=1,
+        user_name="test1",
+        start_time=datetime(2030, 2, 1, 10, 0, tzinfo=timezone(timedelta(hours=-3))),
+        end_time=datetime(2030, 2, 1, 12, 0, tzinfo=timezone(timedelta(hours=-3))),
+    )
+    mock_db = MagicMock()
+    mock_db.get.return_value = Room(id=1, capacity=5)
+    mock_db.commit.side_effect = lambda: setattr(mock_db.add.call_args.args[0], "id", 1)
+
+    response = await make_reservation(reservation_data, mock_db)
+
+    reservation = mock_db.add.call_args.args[0]
+    assert reservation.start_time == datetime(2030, 2, 1, 13, 0)
+    assert reservation.end_time == datetime(2030, 2, 1, 15, 0)
+    assert response.start_time == datetime(2030, 2, 1, 13, 0)
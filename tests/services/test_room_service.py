@@ -1,26 +1,63 @@
-from datetime import datetime
-from unittest.mock import MagicMock, patch
+from collections import namedtuple
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import orjson
 import pytest
 from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
 
+from app.config.settings import settings
+from app.core.availability_cache import AvailabilityCache
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.room_catalog import CachedRoom, RoomCatalog
 from app.models.reservation import Reservation
 from app.models.room import Room
 from app.schemas.reservations import ReservationGetAllResponse
 from app.schemas.rooms import (
+    RoomBatchAvailabilityRequest,
     RoomCheckAvailabilityRequest,
     RoomCreateRequest,
     RoomGetAllResponse,
 )
 from app.services.room_service import (
     check_availability,
+    check_availability_batch,
     create_room,
     get_reservations,
+    get_reservations_json,
     get_rooms,
+    get_rooms_json,
+    search_free_rooms,
 )
 
+RoomRow = namedtuple("RoomRow", "id name capacity location")
+ReservationRow = namedtuple(
+    "ReservationRow", "id room_id user_name start_time end_time"
+)
+
+
+@pytest.fixture(autouse=True)
+def disable_interval_index(monkeypatch):
+    monkeypatch.setattr(settings, "INTERVAL_INDEX_ENABLED", False)
+
 
 @pytest.fixture(autouse=True)
+def disable_availability_cache(monkeypatch):
+    monkeypatch.setattr(settings, "AVAILABILITY_CACHE_ENABLED", False)
+
+
+@pytest.fixture(autouse=True)
+def disable_room_catalog(monkeypatch):
+    monkeypatch.setattr(settings, "ROOM_CATALOG_ENABLED", False)
+
+
+@pytest.fixture(autouse=True)
+def disable_invalidation_bus(monkeypatch):
+    monkeypatch.setattr(settings, "INVALIDATION_BUS_ENABLED", False)
+
+
+@pytest.fixture
 def mock_room_model():
     mock = MagicMock()
     mock.return_value.__dict__ = {
@@ -34,7 +71,7 @@ def mock_room_model():
 
 
 @pytest.mark.asyncio
-async def test_create_room_successfully_creates_room():
+async def test_create_room_successfully_creates_room(mock_room_model):
     mock_db = MagicMock()
     room_data = RoomCreateRequest(name="Room 1", capacity=10, location="Andar 1")
 
@@ -52,7 +89,9 @@ async def test_create_room_successfully_creates_room():
 
 
 @pytest.mark.asyncio
-async def test_create_room_with_invalid_capacity_raises_exception():
+async def test_create_room_with_invalid_capacity_raises_exception(
+    mock_room_model,
+):
     mock_db = MagicMock()
     room_data = RoomCreateRequest(name="Room 1", capacity=0, location="Andar 1")
 
@@ -72,7 +111,7 @@ async def test_get_rooms_successfully_returns_rooms():
         Room(id=2, name="Room 2", capacity=15, location="Andar 2"),
     ]
 
-    mock_db.query().offset().limit().all.return_value = mock_rooms
+    mock_db.scalars().all.return_value = mock_rooms
 
     limit = 2
     offset = 0
@@ -84,13 +123,13 @@ async def test_get_rooms_successfully_returns_rooms():
     assert response.rooms[0].name == "Room 1"
     assert response.rooms[1].name == "Room 2"
 
-    mock_db.query().offset().limit().all.assert_called_once()
+    mock_db.scalars().all.assert_called_once()
 
 
 @pytest.mark.asyncio
 async def test_get_rooms_with_exception_handling():
     mock_db = MagicMock()
-    mock_db.query().offset().limit().all.side_effect = Exception("Database error")
+    mock_db.scalars().all.side_effect = Exception("Database error")
 
     limit = 2
     offset = 0
@@ -99,7 +138,7 @@ async def test_get_rooms_with_exception_handling():
 
     assert exc_info.value.status_code == 500
     assert exc_info.value.detail == "Error getting rooms"
-    mock_db.query().offset().limit().all.assert_called_once()
+    mock_db.scalars().all.assert_called_once()
 
 
 @pytest.mark.asyncio
@@ -123,7 +162,7 @@ async def test_get_reservations_successfully_returns_reservations():
         ),
     ]
 
-    mock_db.query().join().offset().limit.return_value = mock_reservations
+    mock_db.scalars().all.return_value = mock_reservations
 
     room_id = 1
     limit = 2
@@ -135,13 +174,13 @@ async def test_get_reservations_successfully_returns_reservations():
     assert response.reservations[0].user_name == "name 1"
     assert response.reservations[1].user_name == "name 2"
 
-    mock_db.query().join().offset().limit.assert_called_once()
+    mock_db.scalars().all.assert_called_once()
 
 
 @pytest.mark.asyncio
 async def test_get_reservations_with_exception_handling():
     mock_db = MagicMock()
-    mock_db.query().join().offset().limit.side_effect = Exception("Database error")
+    mock_db.scalars().all.side_effect = Exception("Database error")
 
     room_id = 1
     limit = 2
@@ -151,7 +190,7 @@ async def test_get_reservations_with_exception_handling():
 
     assert exc_info.value.status_code == 500
     assert exc_info.value.detail == "Error getting reservations"
-    mock_db.query().join().offset().limit.assert_called_once()
+    mock_db.scalars().all.assert_called_once()
 
 
 @pytest.mark.parametrize(
@@ -185,23 +224,21 @@ async def test_check_availability_successful_availability_check(
 ):
     mock_db = MagicMock()
 
-    mock_db.query.return_value.filter.return_value.first.return_value = (
-        mock_reservations[0] if mock_reservations else None
-    )
+    mock_db.scalar.return_value = mock_reservations[0] if mock_reservations else None
 
     response = await check_availability(params, mock_db)
 
     assert response is expected_result
 
     if expected_result is False:
-        mock_db.query.return_value.filter.return_value.first.assert_called_once()
+        mock_db.scalar.assert_called_once()
 
 
 @pytest.mark.asyncio
 async def test_check_availability_when_room_is_already_reserved():
     mock_db = MagicMock()
 
-    mock_db.query().filter().first.return_value = Room(
+    mock_db.scalar.return_value = Room(
         id=1, name="Room 1", capacity=10, location="Andar 1"
     )
 
@@ -214,13 +251,13 @@ async def test_check_availability_when_room_is_already_reserved():
     result = await check_availability(params, mock_db)
 
     assert result is False
-    mock_db.query().filter().first.assert_called_once()
+    mock_db.scalar.assert_called_once()
 
 
 @pytest.mark.asyncio
 async def test_check_availability_when_room_is_not_reserved():
     mock_db = MagicMock()
-    mock_db.query().filter().first.return_value = None
+    mock_db.scalar.return_value = None
 
     params = RoomCheckAvailabilityRequest(
         id=1,
@@ -231,4 +268,657 @@ async def test_check_availability_when_room_is_not_reserved():
     result = await check_availability(params, mock_db)
 
     assert result is True
-    mock_db.query().filter().first.assert_called_once()
+    mock_db.scalar.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_check_availability_when_interval_index_enabled_then_skip_query(
+    monkeypatch,
+):
+    monkeypatch.setattr(settings, "INTERVAL_INDEX_ENABLED", True)
+    mock_index = MagicMock()
+    mock_index.overlaps = AsyncMock(return_value=True)
+    monkeypatch.setattr("app.services.room_service.interval_index", mock_index)
+    mock_db = MagicMock()
+
+    params = RoomCheckAvailabilityRequest(
+        id=1,
+        start_time=datetime(2025, 2, 1, 10, 0),
+        end_time=datetime(2025, 2, 1, 12, 0),
+    )
+
+    result = await check_availability(params, mock_db)
+
+    assert result is False
+    mock_db.scalar.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_check_availability_when_cache_enabled_then_query_once(monkeypatch):
+    monkeypatch.setattr(settings, "AVAILABILITY_CACHE_ENABLED", True)
+    cache = AvailabilityCache(slot_minutes=5, max_entries=100, ttl_seconds=60)
+    monkeypatch.setattr("app.services.room_service.availability_cache", cache)
+    mock_db = MagicMock()
+    mock_db.scalar.return_value = None
+
+    params = RoomCheckAvailabilityRequest(
+        id=1,
+        start_time=datetime(2025, 2, 1, 10, 0),
+        end_time=datetime(2025, 2, 1, 12, 0),
+    )
+
+    assert await check_availability(params, mock_db) is True
+    assert await check_availability(params, mock_db) is True
+
+    mock_db.scalar.assert_called_once()
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_check_availability_batch_returns_availability_per_room():
+    mock_db = MagicMock()
+    mock_db.scalars.return_value.all.return_value = [0]
+
+    params = RoomBatchAvailabilityRequest(
+        checks=[
+            {
+                "room_id": 1,
+                "start_time": datetime(2025, 2, 1, 10, 0),
+                "end_time": datetime(2025, 2, 1, 12, 0),
+            }
+        ],
+        room_ids=[1, 2],
+        start_time=datetime(2025, 2, 1, 13, 0),
+        end_time=datetime(2025, 2, 1, 15, 0),
+    )
+
+    response = await check_availability_batch(params, mock_db)
+
+    assert response.rooms == {1: [False, True], 2: [True]}
+    mock_db.scalars.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_check_availability_batch_without_windows_skips_query():
+    mock_db = MagicMock()
+
+    response = await check_availability_batch(RoomBatchAvailabilityRequest(), mock_db)
+
+    assert response.rooms == {}
+    mock_db.scalars.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_check_availability_batch_with_exception_handling():
+    mock_db = MagicMock()
+    mock_db.scalars.side_effect = Exception("Database error")
+
+    params = RoomBatchAvailabilityRequest(
+        room_ids=[1],
+        start_time=datetime(2025, 2, 1, 13, 0),
+        end_time=datetime(2025, 2, 1, 15, 0),
+    )
+
+    with pytest.raises(HTTPException) as exc_info:
+        await check_availability_batch(params, mock_db)
+
+    assert exc_info.value.status_code == 500
+    assert exc_info.value.detail == "Error checking rooms availability"
+
+
+@pytest.mark.asyncio
+async def test_search_free_rooms_returns_page_and_next_cursor():
+    mock_db = MagicMock()
+    mock_db.scalars.return_value.all.return_value = [
+        Room(id=1, name="Room 1", capacity=10, location="Andar 1"),
+        Room(id=2, name="Room 2", capacity=15, location="Andar 1"),
+    ]
+
+    response = await search_free_rooms(
+        start_time=datetime(2025, 2, 1, 10, 0),
+        end_time=datetime(2025, 2, 1, 12, 0),
+        limit=1,
+        capacity=5,
+        location="Andar 1",
+        db=mock_db,
+    )
+
+    assert [room.id for room in response.rooms] == [1]
+    assert decode_cursor(response.next_cursor, int) == [1]
+    statement = str(mock_db.scalars.call_args.args[0])
+    assert "NOT (EXISTS" in statement
+    assert "room.capacity >=" in statement
+    assert "room.location =" in statement
+
+
+@pytest.mark.asyncio
+async def test_search_free_rooms_with_cursor_returns_last_page():
+    mock_db = MagicMock()
+    mock_db.scalars.return_value.all.return_value = [
+        Room(id=2, name="Room 2", capacity=15, location="Andar 1"),
+    ]
+
+    response = await search_free_rooms(
+        start_time=datetime(2025, 2, 1, 10, 0),
+        end_time=datetime(2025, 2, 1, 12, 0),
+        limit=1,
+        cursor=encode_cursor(1),
+        db=mock_db,
+    )
+
+    assert [room.id for room in response.rooms] == [2]
+    assert response.next_cursor is None
+    assert "room.id >" in str(mock_db.scalars.call_args.args[0])
+
+
+@pytest.mark.asyncio
+async def test_search_free_rooms_with_invalid_window_raises_bad_request():
+    with pytest.raises(HTTPException) as exc_info:
+        await search_free_rooms(
+            start_time=datetime(2025, 2, 1, 12, 0),
+            end_time=datetime(2025, 2, 1, 10, 0),
+            limit=1,
+            db=MagicMock(),
+        )
+
+    assert exc_info.value.status_code == 400
+    assert (
+        exc_info.value.detail
+        == "datetime not valid, start_time should be lower than end_time."
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_free_rooms_with_exception_handling():
+    mock_db = MagicMock()
+    mock_db.scalars.side_effect = Exception("Database error")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await search_free_rooms(
+            start_time=datetime(2025, 2, 1, 10, 0),
+            end_time=datetime(2025, 2, 1, 12, 0),
+            limit=1,
+            db=mock_db,
+        )
+
+    assert exc_info.value.status_code == 500
+    assert exc_info.value.detail == "Error searching free rooms"
+
+
+@pytest.mark.parametrize("full, expected_result", [(True, False), (False, True)])
+@pytest.mark.asyncio
+async def test_check_availability_when_seat_mode_then_compare_occupancy(
+    monkeypatch, full, expected_result
+):
+    monkeypatch.setattr(settings, "BOOKING_MODE", "seat")
+    monkeypatch.setattr(settings, "INTERVAL_INDEX_ENABLED", True)
+    mock_db = MagicMock()
+    mock_db.scalar.return_value = full
+
+    params = RoomCheckAvailabilityRequest(
+        id=1,
+        start_time=datetime(2025, 2, 1, 10, 0),
+        end_time=datetime(2025, 2, 1, 12, 0),
+    )
+
+    with patch("app.services.room_service.interval_index") as mock_index:
+        result = await check_availability(params, mock_db)
+
+    assert result is expected_result
+    mock_db.scalar.assert_called_once()
+    mock_index.overlaps.assert_not_called()
+    query = str(mock_db.scalar.call_args.args[0])
+    assert "count(*)" in query
+    assert "max(" in query
+
+
+@pytest.mark.asyncio
+async def test_check_availability_when_replica_session_then_skip_interval_index(
+    monkeypatch,
+):
+    monkeypatch.setattr(settings, "INTERVAL_INDEX_ENABLED", True)
+    mock_db = MagicMock()
+    mock_db.info = {"replica": True}
+    mock_db.scalar.return_value = None
+    params = RoomCheckAvailabilityRequest(
+        id=1,
+        start_time=datetime(2030, 2, 1, 10, 0),
+        end_time=datetime(2030, 2, 1, 12, 0),
+    )
+
+    with patch("app.services.room_service.interval_index") as mock_index:
+        assert await check_availability(params, mock_db) is True
+
+    mock_index.overlaps.assert_not_called()
+    mock_db.scalar.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_check_availability_when_replica_session_then_do_not_cache_result(
+    monkeypatch,
+):
+    monkeypatch.setattr(settings, "AVAILABILITY_CACHE_ENABLED", True)
+    cache = AvailabilityCache(max_entries=10, ttl_seconds=60, slot_minutes=5)
+    monkeypatch.setattr("app.services.room_service.availability_cache", cache)
+    mock_db = MagicMock()
+    mock_db.info = {"replica": True}
+    mock_db.scalar.return_value = 1
+    params = RoomCheckAvailabilityRequest(
+        id=1,
+        start_time=datetime(2030, 2, 1, 10, 0),
+        end_time=datetime(2030, 2, 1, 12, 0),
+    )
+
+    assert await check_availability(params, mock_db) is False
+
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_get_rooms_when_more_rows_than_limit_then_return_next_cursor():
+    mock_db = MagicMock()
+    mock_db.scalars.return_value.all.return_value = [
+        Room(id=id, name=f"Room {id}", capacity=10, location="Andar 1")
+        for id in [3, 4, 5]
+    ]
+
+    response = await get_rooms(2, 0, mock_db)
+
+    assert [room.id for room in response.rooms] == [3, 4]
+    assert decode_cursor(response.next_cursor, int) == [4]
+    query = str(mock_db.scalars.call_args.args[0])
+    assert "ORDER BY room.id" in query
+    assert "OFFSET" not in query
+
+
+@pytest.mark.asyncio
+async def test_get_rooms_when_cursor_then_seek_past_it():
+    mock_db = MagicMock()
+    mock_db.scalars.return_value.all.return_value = []
+
+    response = await get_rooms(2, 40, mock_db, cursor=encode_cursor(4))
+
+    assert response.next_cursor is None
+    query = mock_db.scalars.call_args.args[0]
+    assert "room.id >" in str(query)
+    assert "OFFSET" not in str(query)
+    assert 4 in query.compile().params.values()
+
+
+@pytest.mark.asyncio
+async def test_get_reservations_when_more_rows_than_limit_then_return_next_cursor():
+    mock_db = MagicMock()
+    mock_db.scalars.return_value.all.return_value = [
+        Reservation(
+            id=id,
+            room_id=1,
+            user_name="name",
+            start_time=datetime(2025, 2, 1, 10, 0),
+            end_time=datetime(2025, 2, 1, 11, 0),
+        )
+        for id in [7, 8]
+    ]
+
+    response = await get_reservations(1, 1, 0, mock_db)
+
+    assert [reservation.id for reservation in response.reservations] == [7]
+    assert decode_cursor(response.next_cursor, datetime, int) == [
+        datetime(2025, 2, 1, 10, 0),
+        7,
+    ]
+    query = str(mock_db.scalars.call_args.args[0])
+    assert "JOIN" not in query
+    assert "ORDER BY reservation.start_time, reservation.id" in query
+
+
+@pytest.mark.asyncio
+async def test_get_reservations_when_cursor_then_seek_past_it():
+    mock_db = MagicMock()
+    mock_db.scalars.return_value.all.return_value = []
+
+    await get_reservations(
+        1, 10, 0, mock_db, cursor=encode_cursor("2025-02-01T10:00:00", 7)
+    )
+
+    query = mock_db.scalars.call_args.args[0]
+    assert "(reservation.start_time, reservation.id) >" in str(query)
+    assert datetime(2025, 2, 1, 10, 0) in query.compile().params.values()
+
+
+@pytest.mark.asyncio
+async def test_get_reservations_when_cursor_is_invalid_then_raise_400():
+    with pytest.raises(HTTPException) as exc_info:
+        await get_reservations(
+            1, 10, 0, MagicMock(), cursor=encode_cursor("not a date", 7)
+        )
+
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "Invalid pagination cursor"
+
+
+@pytest.mark.asyncio
+async def test_get_reservations_when_date_then_filter_overlapping_in_query():
+    mock_db = MagicMock()
+    mock_db.scalars.return_value.all.return_value = []
+
+    await get_reservations(
+        1,
+        10,
+        0,
+        mock_db,
+        start_time=datetime(2025, 2, 1, 18, 0),
+        day=date(2025, 2, 1),
+    )
+
+    query = mock_db.scalars.call_args.args[0]
+    assert "reservation.end_time >" in str(query)
+    assert "reservation.start_time <" in str(query)
+    params = query.compile().params.values()
+    assert datetime(2025, 2, 1, 18, 0) in params
+    assert datetime(2025, 2, 2, 0, 0) in params
+
+
+@pytest.mark.asyncio
+async def test_get_reservations_when_window_is_empty_then_raise_400():
+    mock_db = MagicMock()
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_reservations(
+            1,
+            10,
+            0,
+            mock_db,
+            start_time=datetime(2025, 2, 1, 12, 0),
+            end_time=datetime(2025, 2, 1, 10, 0),
+        )
+
+    assert exc_info.value.status_code == 400
+    mock_db.scalars.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_rooms_json_encodes_selected_columns_of_the_page():
+    mock_db = MagicMock()
+    mock_db.execute.return_value.all.return_value = [
+        RoomRow(id, f"Room {id}", 10, "Andar 1") for id in [3, 4, 5]
+    ]
+
+    response = await get_rooms_json(2, 0, mock_db)
+
+    body = orjson.loads(response)
+    assert body["rooms"] == [
+        {"id": 3, "name": "Room 3", "capacity": 10, "location": "Andar 1"},
+        {"id": 4, "name": "Room 4", "capacity": 10, "location": "Andar 1"},
+    ]
+    assert decode_cursor(body["next_cursor"], int) == [4]
+    assert RoomGetAllResponse.model_validate(body).rooms[1].id == 4
+    query = str(mock_db.execute.call_args.args[0])
+    assert query.startswith(
+        "SELECT room.id, room.name, room.capacity, room.location \nFROM room"
+    )
+    assert "ORDER BY room.id" in query
+
+
+@pytest.mark.asyncio
+async def test_get_reservations_json_matches_the_response_model():
+    mock_db = MagicMock()
+    rows = [
+        ReservationRow(
+            id, 1, "name", datetime(2025, 2, 1, id), datetime(2025, 2, 1, id, 30, 5)
+        )
+        for id in [7, 8]
+    ]
+    mock_db.execute.return_value.all.return_value = rows
+
+    response = await get_reservations_json(1, 2, 0, mock_db, day=date(2025, 2, 1))
+
+    expected = ReservationGetAllResponse(reservations=[row._asdict() for row in rows])
+    assert orjson.loads(response) == orjson.loads(expected.model_dump_json())
+    query = mock_db.execute.call_args.args[0]
+    assert "reservation.start_time <" in str(query)
+    assert datetime(2025, 2, 2, 0, 0) in query.compile().params.values()
+
+
+@pytest.mark.asyncio
+async def test_get_reservations_json_with_exception_handling():
+    mock_db = MagicMock()
+    mock_db.execute.side_effect = Exception("Database error")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_reservations_json(1, 2, 0, mock_db)
+
+    assert exc_info.value.status_code == 500
+    assert exc_info.value.detail == "Error getting reservations"
+
+
+@pytest.mark.asyncio
+async def test_get_rooms_json_when_fields_then_select_and_return_only_them():
+    mock_db = MagicMock()
+    mock_db.execute.return_value.all.return_value = [
+        namedtuple("Row", "name id")(f"Room {id}", id) for id in [3, 4, 5]
+    ]
+
+    response = await get_rooms_json(2, 0, mock_db, fields="name")
+
+    body = orjson.loads(response)
+    assert body["rooms"] == [{"name": "Room 3"}, {"name": "Room 4"}]
+    assert decode_cursor(body["next_cursor"], int) == [4]
+    query = str(mock_db.execute.call_args.args[0])
+    assert query.startswith("SELECT room.name, room.id \nFROM room")
+
+
+@pytest.mark.asyncio
+async def test_get_reservations_json_when_fields_then_keep_cursor_columns_out():
+    mock_db = MagicMock()
+    Row = namedtuple("Row", "id end_time start_time")
+    mock_db.execute.return_value.all.return_value = [
+        Row(id, datetime(2025, 2, 1, id, 30), datetime(2025, 2, 1, id)) for id in [7, 8]
+    ]
+
+    response = await get_reservations_json(1, 1, 0, mock_db, fields="id, end_time,id")
+
+    body = orjson.loads(response)
+    assert body["reservations"] == [{"id": 7, "end_time": "2025-02-01T07:30:00"}]
+    assert decode_cursor(body["next_cursor"], datetime, int) == [
+        datetime(2025, 2, 1, 7, 0),
+        7,
+    ]
+    query = str(mock_db.execute.call_args.args[0])
+    assert query.startswith(
+        "SELECT reservation.id, reservation.end_time, reservation.start_time \n"
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_rooms_json_when_fields_are_unknown_then_raise_400():
+    mock_db = MagicMock()
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_rooms_json(10, 0, mock_db, fields="id,password")
+
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail.startswith("Invalid fields")
+    mock_db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_create_room_when_committed_then_bump_catalog_version(mock_room_model):
+    room_data = RoomCreateRequest(name="Room 1", capacity=10, location="Andar 1")
+
+    with patch("app.services.room_service.versions") as mock_versions:
+        await create_room(room_data, MagicMock())
+
+    mock_versions.bump.assert_called_once_with()
+
+
+@pytest.mark.asyncio
+async def test_get_rooms_json_when_catalog_holds_every_room_then_page_it(monkeypatch):
+    monkeypatch.setattr(settings, "ROOM_CATALOG_ENABLED", True)
+    catalog = RoomCatalog(max_entries=10, ttl_seconds=60)
+    monkeypatch.setattr("app.services.room_service.room_catalog", catalog)
+    mock_db = MagicMock()
+    mock_db.execute.return_value.all.return_value = [
+        CachedRoom(id, f"Room {id}", 10, "Andar 1") for id in [2, 4, 6, 8]
+    ]
+    await catalog.warm_up(mock_db)
+    mock_db.reset_mock()
+
+    response = await get_rooms_json(2, 0, mock_db, cursor=encode_cursor(2))
+
+    body = orjson.loads(response)
+    assert [room["id"] for room in body["rooms"]] == [4, 6]
+    assert decode_cursor(body["next_cursor"], int) == [6]
+    last = orjson.loads(await get_rooms_json(2, 3, mock_db, fields="name,capacity"))
+    assert last == {"rooms": [{"name": "Room 8", "capacity": 10}], "next_cursor": None}
+    mock_db.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_rooms_json_when_replica_session_then_bypass_catalog(monkeypatch):
+    monkeypatch.setattr(settings, "ROOM_CATALOG_ENABLED", True)
+    catalog = RoomCatalog(max_entries=10, ttl_seconds=60)
+    monkeypatch.setattr("app.services.room_service.room_catalog", catalog)
+    replica_db = MagicMock()
+    replica_db.info = {"replica": True}
+    replica_db.execute.return_value.all.return_value = [
+        RoomRow(2, "Room 2", 10, "Andar 1")
+    ]
+
+    body = orjson.loads(await get_rooms_json(2, 0, replica_db))
+
+    assert [room["id"] for room in body["rooms"]] == [2]
+    assert len(catalog) == 0
+    assert "LIMIT" in str(replica_db.execute.call_args.args[0])
+
+
+@pytest.mark.asyncio
+async def test_given_cursor_of_wrong_type_when_listing_rooms_then_raise_400(
+    monkeypatch,
+):
+    monkeypatch.setattr(settings, "ROOM_CATALOG_ENABLED", True)
+    catalog = RoomCatalog(max_entries=10, ttl_seconds=60)
+    monkeypatch.setattr("app.services.room_service.room_catalog", catalog)
+    mock_db = MagicMock()
+    mock_db.execute.return_value.all.return_value = [
+        CachedRoom(id, f"Room {id}", 10, "Andar 1") for id in [2, 4]
+    ]
+    await catalog.warm_up(mock_db)
+    cursor = encode_cursor("x")
+
+    for page in [
+        get_rooms_json(2, 0, mock_db, cursor=cursor),
+        search_free_rooms(
+            datetime(2030, 2, 1, 10, 0),
+            datetime(2030, 2, 1, 12, 0),
+            2,
+            cursor=cursor,
+            db=mock_db,
+        ),
+    ]:
+        with pytest.raises(HTTPException) as exc_info:
+            await page
+
+        assert exc_info.value.status_code == 400
+        assert exc_info.value.detail == "Invalid pagination cursor"
+
+
+@pytest.mark.asyncio
+async def test_create_room_when_flushed_then_notify_the_new_room(mock_room_model):
+    room_data = RoomCreateRequest(name="Room 1", capacity=10, location="Andar 1")
+    mock_db = MagicMock()
+
+    with patch(
+        "app.services.room_service.notify_writes", new_callable=AsyncMock
+    ) as mock_notify:
+        await create_room(room_data, mock_db)
+
+    mock_notify.assert_awaited_once_with(
+        [(mock_room_model.return_value.id, None, None)], mock_db
+    )
+    mock_db.flush.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_check_availability_when_aware_times_then_query_naive_utc():
+    mock_db = MagicMock()
+    mock_db.scalar.return_value = None
+    params = RoomCheckAvailabilityRequest(
+        id=1,
+        start_time=datetime(2030, 2, 1, 10, 0, tzinfo=timezone.utc),
+        end_time=datetime(2030, 2, 1, 12, 0, tzinfo=timezone.utc),
+    )
+
+    assert await check_availability(params, mock_db) is True
+
+    bound = mock_db.scalar.call_args.args[0].compile().params.values()
+    assert datetime(2030, 2, 1, 10, 0) in bound
+    assert all(value.tzinfo is None for value in bound if isinstance(value, datetime))
+
+
+@pytest.mark.asyncio
+async def test_check_availability_when_seat_mode_and_aware_times_then_query_naive_utc(
+    monkeypatch,
+):
+    monkeypatch.setattr(settings, "BOOKING_MODE", "seat")
+    mock_db = MagicMock()
+    mock_db.scalar.return_value = False
+    params = RoomCheckAvailabilityRequest(
+        id=1,
+        start_time=datetime(2030, 2, 1, 10, 0, tzinfo=timezone(timedelta(hours=3))),
+        end_time=datetime(2030, 2, 1, 12, 0, tzinfo=timezone(timedelta(hours=3))),
+    )
+
+    assert await check_availability(params, mock_db) is True
+
+    query = mock_db.scalar.call_args.args[0]
+    bound = [
+        value
+        for value in query.compile(dialect=postgresql.dialect()).params.values()
+        if isinstance(value, datetime)
+    ]
+    assert datetime(2030, 2, 1, 7, 0) in bound
+    assert all(value.tzinfo is None for value in bound)
+
+
+@pytest.mark.asyncio
+async def test_check_availability_batch_when_aware_times_then_query_naive_utc():
+    mock_db = MagicMock()
+    mock_db.scalars.return_value.all.return_value = []
+    params = RoomBatchAvailabilityRequest(
+        room_ids=[1],
+        start_time=datetime(2030, 2, 1, 13, 0, tzinfo=timezone.utc),
+        end_time=datetime(2030, 2, 1, 15, 0, tzinfo=timezone.utc),
+    )
+
+    await check_availability_batch(params, mock_db)
+
+    query = mock_db.scalars.call_args.args[0]
+    bound = [
+        value
+        for value in query.compile(dialect=postgresql.dialect()).params.values()
+        if isinstance(value, datetime)
+    ]
+    assert datetime(2030, 2, 1, 13, 0) in bound
+    assert all(value.tzinfo is None for value in bound)
+
+
+@pytest.mark.asyncio
+async def test_search_free_rooms_with_naive_and_aware_times_compares_them_in_utc():
+    mock_db = MagicMock()
+    mock_db.scalars.return_value.all.return_value = []
+
+    await search_free_rooms(
+        start_time=datetime(2030, 2, 1, 10, 0),
+        end_time=datetime(2030, 2, 1, 9, 0, tzinfo=timezone(timedelta(hours=-3))),
+        limit=1,
+        db=mock_db,
+    )
+
+    query = mock_db.scalars.call_args.args[0]
+    bound = [
+        value
+        for value in query.compile(dialect=postgresql.dialect()).params.values()
+        if isinstance(value, datetime)
+    ]
+    assert datetime(2030, 2, 1, 12, 0) in bound
+    assert all(value.tzinfo is None for value in bound)
@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.services.slot_service import SLOTS_BATCH_SIZE, SlotSweep, find_earliest_slots
+
+START = datetime(2030, 1, 1, 9, 0)
+END = datetime(2030, 1, 1, 12, 0)
+
+
+async def collect(slots):
+    return [slot async for slot in slots]
+
+
+def sync_db(room_ids, *batches):
+    db = MagicMock(spec=Session)
+    db.scalars.return_value.all.return_value = room_ids
+    db.execute.return_value.partitions.return_value = iter(batches)
+    return db
+
+
+def test_given_reservations_when_sweep_then_return_one_slot_per_gap():
+    sweep = SlotSweep([1], START, END, timedelta(minutes=15))
+
+    slots = sweep.add(1, datetime(2030, 1, 1, 9, 10), datetime(2030, 1, 1, 10, 0))
+    slots += sweep.add(1, datetime(2030, 1, 1, 10, 20), datetime(2030, 1, 1, 11, 0))
+    slots += sweep.finish()
+
+    assert [(slot.start_time.hour, slot.start_time.minute) for slot in slots] == [
+        (10, 0),
+        (11, 0),
+    ]
+    assert slots[0].end_time == datetime(2030, 1, 1, 10, 15)
+
+
+def test_given_short_tail_when_sweep_then_skip_it():
+    sweep = SlotSweep([1], START, END, timedelta(minutes=30))
+
+    assert sweep.add(1, START, datetime(2030, 1, 1, 11, 45)) == []
+    assert sweep.finish() == []
+
+
+def test_given_later_reservation_when_sweep_then_return_gaps_certain_before_it():
+    sweep = SlotSweep([1, 2], START, END, timedelta(minutes=30))
+
+    assert sweep.add(1, START, datetime(2030, 1, 1, 10, 0)) == []
+    slots = sweep.add(2, datetime(2030, 1, 1, 10, 30), datetime(2030, 1, 1, 11, 0))
+
+    assert [(slot.room_id, slot.start_time) for slot in slots] == [
+        (2, START),
+        (1, datetime(2030, 1, 1, 10, 0)),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_given_rooms_when_find_earliest_slots_then_stream_by_start_time():
+    db = sync_db(
+        [1, 2, 3],
+        [(2, datetime(2030, 1, 1, 8, 0), datetime(2030, 1, 1, 9, 30))],
+        [
+            (1, datetime(2030, 1, 1, 9, 0), datetime(2030, 1, 1, 10, 0)),
+            (2, datetime(2030, 1, 1, 10, 0), datetime(2030, 1, 1, 12, 0)),
+        ],
+    )
+
+    slots = await collect(
+        find_earliest_slots(
+            duration_minutes=30,
+            end_time=END,
+            limit=3,
+            session_factory=lambda: db,
+            start_time=START,
+        )
+    )
+
+    assert [(slot.room_id, slot.start_time) for slot in slots] == [
+        (3, START),
+        (2, datetime(2030, 1, 1, 9, 30)),
+        (1, datetime(2030, 1, 1, 10, 0)),
+    ]
+    query = db.execute.call_args.args[0]
+    assert query.get_execution_options()["yield_per"] == SLOTS_BATCH_SIZE
+    db.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_given_limit_reached_when_find_earliest_slots_then_stop_fetching():
+    def batches():
+        yield [(1, datetime(2030, 1, 1, 10, 0), datetime(2030, 1, 1, 11, 0))]
+        pytest.fail("fetched a batch past the limit")
+
+    db = sync_db([1, 2])
+    db.execute.return_value.partitions.return_value = batches()
+
+    slots = await collect(
+        find_earliest_slots(
+            duration_minutes=30,
+            end_time=END,
+            limit=2,
+            session_factory=lambda: db,
+            start_time=START,
+        )
+    )
+
+    assert [(slot.room_id, slot.start_time) for slot in slots] == [
+        (1, START),
+        (2, START),
+    ]
+    db.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_given_async_session_when_find_earliest_slots_then_read_cursor():
+    async def partitions():
+        yield [(1, START, datetime(2030, 1, 1, 11, 0))]
+
+    db = MagicMock(spec=AsyncSession)
+    db.scalars = AsyncMock(return_value=MagicMock(all=MagicMock(return_value=[1])))
+    db.stream = AsyncMock()
+    db.stream.return_value.partitions = partitions
+    db.close = AsyncMock()
+
+    slots = await collect(
+        find_earliest_slots(
+            duration_minutes=30,
+            end_time=END,
+            limit=3,
+            session_factory=lambda: db,
+            start_time=START,
+        )
+    )
+
+    assert [(slot.room_id, slot.start_time) for slot in slots] == [
+        (1, datetime(2030, 1, 1, 11, 0))
+    ]
+    db.stream.assert_awaited_once()
+    db.close.assert_awaited_once()
+
+
+def test_given_past_horizon_when_find_earliest_slots_then_raise_bad_request():
+    session_factory = MagicMock()
+
+    with pytest.raises(HTTPException) as exc_info:
+        find_earliest_slots(
+            duration_minutes=30,
+            end_time=datetime(2020, 1, 1),
+            limit=3,
+            session_factory=session_factory,
+        )
+
+    assert exc_info.value.status_code == 400
+    session_factory.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_given_db_error_when_find_earliest_slots_then_close_session_and_raise():
+    db = sync_db([1])
+    db.execute.side_effect = Exception("Database error")
+
+    with pytest.raises(Exception):
+        await collect(
+            find_earliest_slots(
+                duration_minutes=30,
+                end_time=END,
+                limit=3,
+                session_factory=lambda: db,
+                start_time=START,
+            )
+        )
+
+    db.close.assert_called_once()